@@ -1,12 +1,18 @@
+import os
 from sqlmodel import SQLModel, create_engine
 from typing import Generator
 
-# Connection string provided by user
-DATABASE_URL = ""
+# Connection string provided by user (DATABASE_URL env var).
+# Falls back to a local SQLite file so the agent's ingestion manifest works without Postgres.
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_URL = os.getenv("DATABASE_URL") or f"sqlite:///{os.path.join(_BACKEND_DIR, 'data', 'deal_associate.db')}"
+
+# SQLite connections are shared across the API's worker threads
+connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
 
 # Create engine
 # echo=True to see SQL queries in logs
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_engine(DATABASE_URL, echo=os.getenv("SQL_ECHO", "true").lower() == "true", connect_args=connect_args)
 
 def get_session():
     from sqlmodel import Session
@@ -34,8 +34,19 @@ class Document(SQLModel, table=True):
     deal_id: int = Field(index=True)
     filename: str
     file_type: str  # pdf, xlsxA
-    s3_path: str
+    s3_path: str = ""
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
+    # Ingestion manifest: lets re-ingestion skip unchanged data-room files
+    deal_ref: Optional[str] = Field(default=None, index=True)  # agent deal ID as given (may be non-numeric)
+    path: Optional[str] = Field(default=None, index=True)  # relative to backend/data
+    size_bytes: Optional[int] = None
+    mtime: Optional[float] = None
+    content_hash: Optional[str] = None  # SHA-256 of the file bytes
+    parse_status: str = Field(default="pending")  # pending, parsed, failed
+    embed_status: str = Field(default="pending")  # pending, embedded, failed
+    embed_backend: Optional[str] = None  # vector store holding the embeddings: pinecone, local
+    parsed_at: Optional[datetime] = None
+    embedded_at: Optional[datetime] = None
 
 class Analysis(SQLModel, table=True):
     __tablename__ = "analyses"
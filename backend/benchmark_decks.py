@@ -0,0 +1,219 @@
+"""
+Deck render benchmark and regression check.
+
+Renders the IC deck, the deal summary and a scenario deck against the templates in
+data/templates/ for synthetic deals of 1, 50 and 500 assets. Reports wall time, peak
+RSS and output size per case. S3 is stubbed out, so the run is fully offline.
+
+The committed baseline (data/benchmarks/deck_baseline.json) holds only the metrics that
+are stable across machines: output size, checked tightly, and peak RSS, checked with a
+wider tolerance. Wall time is compared only against a baseline recorded with --wall-time.
+
+Usage:
+    python benchmark_decks.py                     # compare against the saved baseline
+    python benchmark_decks.py --update-baseline   # record a new baseline
+    python benchmark_decks.py --update-baseline --wall-time   # include wall time (same machine only)
+    python benchmark_decks.py --sizes 1 50 --rss-threshold 0.5
+
+Exits with status 1 when any metric regresses beyond its threshold, and with status 2
+when there is no baseline to compare against.
+"""
+import argparse
+import copy
+import json
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+# Add the current directory to sys.path to ensure we can import deal_agent
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_FILE = os.path.join(BASE_DIR, "data", "structured_json", "sample_asset_bundle.json")
+BASELINE_FILE = os.path.join(BASE_DIR, "data", "benchmarks", "deck_baseline.json")
+
+DEFAULT_SIZES = [1, 50, 500]
+DECKS = ["ic_deck", "deal_summary", "scenario_deck"]
+METRICS = ["wall_time_s", "peak_rss_mb", "output_bytes"]
+# Recorded in the baseline by default; wall time depends on the machine
+STABLE_METRICS = ["peak_rss_mb", "output_bytes"]
+CITIES = ["Daventry", "Northampton", "Rugby", "Coventry", "Milton Keynes", "Birmingham", "Lutterworth", "Leicester"]
+
+
+# --- Synthetic Deals ---------------------------------------------------------
+
+def make_synthetic_state(num_assets: int) -> dict:
+    """Builds a DealState-shaped dict with `num_assets` assets cloned from the sample bundle."""
+    from deal_agent.nodes.model import get_model_inputs, calculate_simple_metrics
+
+    with open(SAMPLE_FILE, "r", encoding="utf-8") as f:
+        sample = json.load(f)
+    prototype = sample["assets"][0]
+
+    assets = []
+    tenancy = []
+    for i in range(num_assets):
+        asset = copy.deepcopy(prototype)
+        asset["name"] = f"DC{i + 1} Synthetic Asset"
+        asset["city"] = CITIES[i % len(CITIES)]
+        asset["logistics_asset"]["area_m2"] = 20000.0 + (i % 40) * 5000
+        for j, lease in enumerate(asset["leases"]):
+            lease["area_m2"] = asset["logistics_asset"]["area_m2"] / len(asset["leases"])
+            lease["lease_end"] = f"{2027 + (i + j) % 10}-06-30"
+            tenancy.append({
+                "name": lease["tenant"]["name"],
+                "unit": f"{asset['name']} / Unit {j + 1}",
+                "area": lease["area_m2"],
+                "lease_start": lease["lease_start"],
+                "lease_end": lease["lease_end"],
+                "rent_psm": 71.0,
+            })
+        assets.append(asset)
+
+    assumptions = {"market_rent": 82.0, "erv": 82.0, "entry_yield": 0.05, "exit_yield": 0.0525,
+                   "capex": 0, "area": sum(a["logistics_asset"]["area_m2"] for a in assets)}
+    model = calculate_simple_metrics(get_model_inputs(assumptions))
+    scenarios = {
+        f"Scenario {chr(65 + k)}": {"filename": f"scenario_{k}.pptx", "irr": model["irr"], "equity_multiple": model["equity_multiple"]}
+        for k in range(3)
+    }
+
+    return {
+        "messages": [],
+        "company_name": f"Synthetic Portfolio ({num_assets} assets)",
+        "extracted_data": {
+            "source_json": {"assets": assets, "comps": sample.get("comps", [])},
+            "analysis": "Synthetic portfolio used for render benchmarking. " * 10,
+            "tenancy_schedule": tenancy,
+        },
+        "financial_assumptions": assumptions,
+        "financial_model": model,
+        "scenarios": scenarios,
+    }
+
+
+# --- Cases -------------------------------------------------------------------
+
+def _run_case(deck_name: str, num_assets: int) -> dict:
+    """Runs one render in a fresh process so peak RSS is attributable to that case."""
+    import deal_agent.nodes.deck as deck
+    from deal_agent.tools.deck_spec import DEAL_SUMMARY
+    from deal_agent.tools.metrics_tools import compute_lease_metrics
+
+    # Stub S3: record output sizes instead of uploading
+    outputs = []
+    def fake_upload(file_path, object_name=None, expiration=3600):
+        outputs.append(os.path.getsize(file_path))
+        return f"https://example.invalid/{os.path.basename(file_path)}"
+    deck.upload_to_s3_and_get_link = fake_upload
+
+    state = make_synthetic_state(num_assets)
+    output_dir = os.path.join(BASE_DIR, "data", "generated")
+    os.makedirs(output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    if deck_name == "ic_deck":
+        deck._render_ic_deck(state)
+    elif deck_name == "scenario_deck":
+        deck.refresh_deck_views(state)
+    elif deck_name == "deal_summary":
+        extracted = {**state["extracted_data"], "metrics": compute_lease_metrics(state["extracted_data"]["source_json"])}
+        context = {**state, "extracted_data": extracted,
+                   "values": {"date": "2025-01-01", "summary_bullets": "• Highlight one\n• Highlight two"}}
+        template_path = os.path.join(BASE_DIR, "data", "templates", DEAL_SUMMARY.template)
+        deck.save_deck_artifacts(DEAL_SUMMARY, context, template_path, output_dir, f"Bench_Deal_Summary_{num_assets}")
+    else:
+        raise ValueError(f"Unknown deck: {deck_name}")
+    elapsed = time.perf_counter() - start
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+    return {"wall_time_s": round(elapsed, 4), "peak_rss_mb": round(peak_mb, 1), "output_bytes": sum(outputs)}
+
+def run_benchmarks(sizes, repeat: int = 1) -> dict:
+    results = {}
+    ctx = get_context("spawn")
+    for num_assets in sizes:
+        for deck_name in DECKS:
+            key = f"{deck_name}/{num_assets}"
+            runs = []
+            for _ in range(repeat):
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+                    runs.append(executor.submit(_run_case, deck_name, num_assets).result())
+            # Best-of-N wall time damps scheduler noise; RSS and size are stable across runs
+            best = min(runs, key=lambda r: r["wall_time_s"])
+            results[key] = best
+            print(f"{key:<22} {best['wall_time_s']:>9.3f} s {best['peak_rss_mb']:>9.1f} MB {best['output_bytes']:>12,} B")
+    return results
+
+
+# --- Regression Check --------------------------------------------------------
+
+def compare(results: dict, baseline: dict, thresholds: dict) -> list:
+    """Returns a list of human-readable regressions beyond the per-metric `thresholds` (fractional)."""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric in METRICS:
+            before, after = base.get(metric), current.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if change > thresholds[metric]:
+                regressions.append(f"{key} {metric}: {before} -> {after} (+{change:.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark deck rendering and check for regressions.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Synthetic deal sizes (assets).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the fastest is kept.")
+    parser.add_argument("--threshold", type=float, default=0.3, help="Allowed wall time regression (0.3 = +30%%).")
+    parser.add_argument("--rss-threshold", type=float, default=0.25, help="Allowed peak RSS regression.")
+    parser.add_argument("--size-threshold", type=float, default=0.05, help="Allowed output size regression.")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline JSON path.")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline.")
+    parser.add_argument("--wall-time", action="store_true", help="Also record wall time in the baseline.")
+    args = parser.parse_args()
+
+    # Fail before the run rather than after it: a check without a baseline checks nothing
+    if not args.update_baseline and not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}. Run with --update-baseline to record one.")
+        return 2
+
+    print(f"{'case':<22} {'wall time':>11} {'peak RSS':>12} {'output size':>14}")
+    results = run_benchmarks(args.sizes, repeat=args.repeat)
+
+    if args.update_baseline:
+        recorded = METRICS if args.wall_time else STABLE_METRICS
+        baseline = {key: {m: r[m] for m in recorded} for key, r in results.items()}
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    thresholds = {"wall_time_s": args.threshold, "peak_rss_mb": args.rss_threshold,
+                  "output_bytes": args.size_threshold}
+    regressions = compare(results, baseline, thresholds)
+    if regressions:
+        print("--- Regressions ---")
+        for line in regressions:
+            print(f" - {line}")
+        return 1
+
+    print("--- No regressions beyond threshold ---")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
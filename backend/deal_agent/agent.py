@@ -15,7 +15,8 @@ from deal_agent.nodes import (
     deck,
     scenarios,
     chatbot,
-    human_interaction
+    human_interaction,
+    artifacts
 )
 from deal_agent.tools.rag_tools import search_documents
 
@@ -153,7 +154,9 @@ workflow.add_node("tools", ToolNode(tools))
 # Ingestion
 workflow.add_node("start_ingestion", ingestion.start_ingestion)
 workflow.add_node("load_json_data", ingestion.load_json_data)
+workflow.add_node("compute_deal_metrics", ingestion.compute_deal_metrics)
 workflow.add_node("load_pdf_documents", ingestion.load_pdf_documents)
+workflow.add_node("embed_pdf_documents", ingestion.embed_pdf_documents)
 workflow.add_node("align_with_llm", ingestion.align_with_llm)
 workflow.add_node("compute_metrics_and_draft_summary", ingestion.compute_metrics_and_draft_summary)
 
@@ -170,6 +173,9 @@ workflow.add_node("update_assumptions", assumptions.update_assumptions)
 # Model
 workflow.add_node("human_confirm_model_build", human_interaction.human_confirm_model_build) # Step 9
 workflow.add_node("build_model", model.build_model)
+workflow.add_node("export_model_excel", model.export_model_excel)
+workflow.add_node("prerender_ic_deck", deck.prerender_ic_deck)
+workflow.add_node("publish_model_artifacts", artifacts.publish_model_artifacts)
 
 # Deck
 workflow.add_node("human_confirm_deck_generation", human_interaction.human_confirm_deck_generation) # Step 11
@@ -181,6 +187,8 @@ workflow.add_node("prepare_scenario_analysis", scenarios.prepare_scenario_analys
 workflow.add_node("wait_for_scenario_requests", human_interaction.wait_for_scenario_requests) # Step 14
 workflow.add_node("apply_scenario", scenarios.apply_scenario)
 workflow.add_node("rebuild_model_for_scenario", scenarios.rebuild_model_for_scenario)
+workflow.add_node("export_scenario_model", scenarios.export_scenario_model)
+workflow.add_node("publish_scenario_artifacts", artifacts.publish_scenario_artifacts)
 workflow.add_node("wait_for_more_scenarios", scenarios.wait_for_more_scenarios)
 
 # --- Edges -----------------------------------------------------------------
@@ -211,9 +219,13 @@ workflow.add_conditional_edges(
 workflow.add_edge("tools", "chatbot")
 
 # Ingestion Flow
+# JSON (+ metrics) and PDF branches run in parallel and join before alignment;
+# vector upserts are handed to a background pool by load_json_data / embed_pdf_documents
 workflow.add_edge("start_ingestion", "load_json_data")
-workflow.add_edge("load_json_data", "load_pdf_documents")
-workflow.add_edge("load_pdf_documents", "align_with_llm")
+workflow.add_edge("start_ingestion", "load_pdf_documents")
+workflow.add_edge("load_json_data", "compute_deal_metrics")
+workflow.add_edge("load_pdf_documents", "embed_pdf_documents")
+workflow.add_edge(["compute_deal_metrics", "embed_pdf_documents"], "align_with_llm")
 workflow.add_edge("align_with_llm", "compute_metrics_and_draft_summary")
 workflow.add_edge("compute_metrics_and_draft_summary", "propose_comparables") # Auto-transition to Comps
 
@@ -229,7 +241,11 @@ workflow.add_edge("update_assumptions", "human_confirm_model_build") # Flow into
 
 # Model Flow
 workflow.add_edge("human_confirm_model_build", END) # Wait for user confirmation via Router
-workflow.add_edge("build_model", "human_confirm_deck_generation") # Flow into deck prep
+# Artifact stage: Excel export and deck render run as parallel branches, joined before deck prep
+workflow.add_edge("build_model", "export_model_excel")
+workflow.add_edge("build_model", "prerender_ic_deck")
+workflow.add_edge(["export_model_excel", "prerender_ic_deck"], "publish_model_artifacts")
+workflow.add_edge("publish_model_artifacts", "human_confirm_deck_generation") # Flow into deck prep
 
 # Deck Flow
 workflow.add_edge("human_confirm_deck_generation", END) # Wait for user confirmation via Router
@@ -239,8 +255,11 @@ workflow.add_edge("generate_deck", END)
 workflow.add_edge("prepare_scenario_analysis", "wait_for_scenario_requests")
 workflow.add_edge("wait_for_scenario_requests", END) # Wait for user input via Router
 workflow.add_edge("apply_scenario", "rebuild_model_for_scenario")
+# Artifact stage: scenario Excel export and deck refresh run in parallel, joined into one message
+workflow.add_edge("rebuild_model_for_scenario", "export_scenario_model")
 workflow.add_edge("rebuild_model_for_scenario", "refresh_deck_views")
-workflow.add_edge("refresh_deck_views", END) # Wait for user input via Router (Loop or End)
+workflow.add_edge(["export_scenario_model", "refresh_deck_views"], "publish_scenario_artifacts")
+workflow.add_edge("publish_scenario_artifacts", END) # Wait for user input via Router (Loop or End)
 workflow.add_edge("wait_for_more_scenarios", "prepare_scenario_analysis") # Loop (This node might be redundant now)
 
 # --- Compile ---------------------------------------------------------------
@@ -0,0 +1,54 @@
+from langchain_core.messages import AIMessage
+from deal_agent.state import DealState
+
+# Display order of artifacts in the joined message, independent of branch completion order
+ARTIFACT_ORDER = ["model", "deck", "deck_pdf"]
+
+def format_artifact_links(links: dict) -> str:
+    """
+    Formats the artifact records collected from the parallel branches into markdown lines.
+    """
+    lines = []
+    ordered = [k for k in ARTIFACT_ORDER if k in links] + [k for k in links if k not in ARTIFACT_ORDER]
+    for key in ordered:
+        artifact = links[key] or {}
+        if artifact.get("url"):
+            lines.append(f"📥 **[{artifact.get('label', key)}]({artifact['url']})**")
+        elif artifact.get("note"):
+            lines.append(artifact["note"])
+    return "\n\n".join(lines)
+
+def publish_model_artifacts(state: DealState):
+    """
+    Step 10c: Publish Model Artifacts (join)
+    Waits for the Excel export and the deck pre-render, then posts the model link.
+    The deck link is handed out once the user confirms deck generation.
+    """
+    print("--- Node: Publish Model Artifacts ---")
+    links = dict(state.get("artifact_links") or {})
+    links.pop("deck", None)
+
+    content = format_artifact_links(links)
+    messages = [AIMessage(content=content, name="agent")] if content else []
+
+    # Clear links so the next artifact stage starts fresh
+    return {"messages": messages, "artifact_links": None}
+
+def publish_scenario_artifacts(state: DealState):
+    """
+    Step 17a: Publish Scenario Artifacts (join)
+    Waits for the scenario Excel export and the refreshed deck, then posts both links in one message.
+    """
+    print("--- Node: Publish Scenario Artifacts ---")
+    links = state.get("artifact_links") or {}
+
+    response_content = (
+        "Deck views refreshed with the new scenario data.\n\n"
+        f"{format_artifact_links(links)}\n\n"
+        "Would you like to run another scenario (e.g., 'stress test interest rates'), or is the analysis complete?"
+    )
+
+    return {
+        "messages": [AIMessage(content=response_content, name="agent")],
+        "artifact_links": None
+    }
@@ -3,6 +3,7 @@ from langchain_openai import ChatOpenAI
 from deal_agent.state import DealState
 from deal_agent.tools.assumptions_tools import process_assumption_updates, fetch_default_assumptions
 from deal_agent.tools.comps_tools import calculate_blended_rent
+from deal_agent.tools.normalization import passing_rent_summary
 import json
 
 def propose_assumptions(state: DealState):
@@ -34,6 +35,12 @@ def propose_assumptions(state: DealState):
             assumptions_data["area"] = float(area_m2)
             assumptions_data["leasable_area"] = float(area_m2)
 
+    # Passing rent comes from the normalized lease columns (EUR PSM), not from the LLM
+    passing = passing_rent_summary(extracted.get("portfolio_columns"))
+    metrics = extracted.get("metrics", {})
+    passing_rent = metrics.get("in_place_rent_psm") or passing["rent_eur_psm"]
+    conversion_basis = "; ".join(passing["conversions"][:3]) or "Source rents already in EUR PSM"
+
     # Update default assumptions with blended rent from comps
     assumptions_data["market_rent"] = blended_rent
     assumptions_data["erv"] = blended_rent
@@ -46,18 +53,14 @@ def propose_assumptions(state: DealState):
     
     **Context:**
     - **Comps Blended Rent**: €{blended_rent}/m²/year
+    - **Current Passing Rent (normalized to EUR PSM)**: €{passing_rent}/m²/year ({conversion_basis})
     - **Ingestion Analysis**: {analysis_text[:2000]}
     - **Structured Data**: {json.dumps(source_json, indent=2)[:1000]}
     - **Default Market Assumptions**: {json.dumps(assumptions_data, indent=2)}
     
-    **CRITICAL INSTRUCTION ON CURRENCY:**
-    - The target model MUST be in **EUROS (€)**.
-    - The source data might be in GBP (£) or other currencies.
-    - **YOU MUST CONVERT ALL FIGURES TO EUROS (€) PSM (Per Square Meter).**
-    - Use conversion rate: **1 GBP = 1.2 EUR**.
-    - Use unit conversion: **1 sq ft = 0.0929 sq m** (or Price PSF * 10.764 = Price PSM).
-    - If the source rent is ~£4-6, it is likely GBP PSF. Convert it: £5.5 PSF * 10.764 * 1.2 ≈ €71 PSM.
-    - **DO NOT output GBP (£) figures in the final proposal.** All figures must be € PSM.
+    **Currency:** All rents above have already been converted to **EUROS (€) PSM** (leases carry
+    `display_rent_eur_psm` and `rent_conversion`). Use these figures as given; do not convert again
+    and **do not output GBP (£) figures**.
 
     **Task:**
     Generate a detailed "Underwriting Assumptions" proposal. 
@@ -69,8 +72,8 @@ def propose_assumptions(state: DealState):
     
     **Rent & ERV**
     
-    • Current passing rent: **£[Value] PSF** / **€[Value] PSM**
-      *(Calculation: Source Rent £[Value] PSF * 10.764 * 1.2 ≈ €[Value] PSM)*
+    • Current passing rent: **€{passing_rent} PSM**
+      *({conversion_basis})*
     
     • Blended market rent from comps: €{blended_rent}/m²/year
     
@@ -2,32 +2,45 @@ from langchain_core.messages import AIMessage, HumanMessage
 from langchain_openai import ChatOpenAI
 from deal_agent.state import DealState
 from deal_agent.tools.comps_tools import calculate_blended_rent, fetch_market_comparables, format_comps_display
+from deal_agent.tools.geo import geocode
+from deal_agent.utils.config import Config
 import json
 
+def _subject_profile(state: DealState) -> dict:
+    """Location (city, else country), size, eaves height and (lat, lon) of the first asset, for comp search."""
+    extracted = state.get("extracted_data", {}) or {}
+    assets = extracted.get("assets") or (extracted.get("source_json") or {}).get("assets", [])
+    if not assets:
+        return {}
+    # Use the first asset as the primary location context
+    asset = assets[0]
+    logistics = asset.get("logistics_asset") or {}
+    coordinates = geocode(asset)
+    if coordinates is None:
+        print(f"Could not geocode subject asset {asset.get('name')}; searching comps by city/country instead of radius")
+    return {
+        "location": asset.get("city") or asset.get("country"),
+        "size_m2": logistics.get("area_m2") or asset.get("area_m2"),
+        "eaves_height_m": logistics.get("eaves_height_m"),
+        "coordinates": coordinates,
+    }
+
 def propose_comparables(state: DealState):
     """
     Step 3: Propose Comparables
-    Finds and scores comps from memory/database.
+    Finds and scores comps from memory/database (see comp_scoring.score_comps).
     """
     print("--- Node: Propose Comparables ---")
     
-    # Try to get location from extracted data
-    location = None
-    extracted = state.get("extracted_data", {})
-    assets = extracted.get("assets", [])
-    if assets:
-        # Use the city of the first asset as the primary location context
-        location = assets[0].get("city")
-        if not location:
-            location = assets[0].get("country")
+    subject = _subject_profile(state)
+    location = subject.get("location")
             
-    # Fetch comps from Pinecone
-    # If location is found (e.g. "Daventry"), it will search "Logistics market comparables in Daventry"
-    all_comps = fetch_market_comparables(location=location)
+    # Fetch comps from Pinecone, scored against the subject on size, eaves height, distance, recency and yield
+    all_comps = fetch_market_comparables(**subject, top_k=Config.COMP_SCORING_CANDIDATES)
     
-    # Logic: take top 5 as proposal, keep the rest as options
-    comps_data = all_comps[:5]
-    other_comps = all_comps[5:]
+    # Logic: take the best-scoring comps as proposal, show the next ones as options
+    comps_data = all_comps[:Config.COMP_RECOMMENDED]
+    other_comps = all_comps[Config.COMP_RECOMMENDED:2 * Config.COMP_RECOMMENDED]
     
     # Calculate blended rent for the proposed set
     blended_rent = calculate_blended_rent(comps_data)
@@ -52,7 +65,7 @@ def propose_comparables(state: DealState):
     others_display = format_comps_display(other_comps, use_table=use_table, is_secondary=True) if other_comps else ""
 
     response_content = (
-        f"I’ve identified {len(all_comps)} internal comparable logistics assets based on location ({location or 'General'}) and specification.\n\n"
+        f"I’ve identified and scored {len(all_comps)} internal comparable logistics assets based on location ({location or 'General'}), size, specification, recency and yield.\n\n"
         f"**Recommended set ({len(comps_data)}):**\n"
         f"{comps_display}\n\n"
         f"Current blended market rent from these {len(comps_data)} comps: **€{blended_rent}/m²/year**.\n\n"
@@ -73,15 +86,8 @@ def update_comparables(state: DealState):
     """
     print("--- Node: Update Comparables ---")
     
-    # Try to get location from extracted data
-    location = None
-    extracted = state.get("extracted_data", {})
-    assets = extracted.get("assets", [])
-    if assets:
-        location = assets[0].get("city") or assets[0].get("country")
-
     # Fetch all available comps from tool to handle additions
-    all_available_comps = fetch_market_comparables(location=location)
+    all_available_comps = fetch_market_comparables(**_subject_profile(state), top_k=Config.COMP_SCORING_CANDIDATES)
     current_comps = state.get("comps_data", [])
     
     # Get last user message
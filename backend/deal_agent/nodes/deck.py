@@ -1,67 +1,23 @@
 from langchain_core.messages import AIMessage
 from deal_agent.state import DealState
-from pptx import Presentation
 import os
-import glob
+import json
+import time
+import uuid
+import hashlib
 from datetime import datetime
 from deal_agent.tools.s3_utils import upload_to_s3_and_get_link
+from deal_agent.tools.deck_spec import IC_DECK, SCENARIO_DECK, render_deck, render_deck_pdf
+from deal_agent.utils.config import Config
 
-def generate_deck(state: DealState):
+def _build_deck_values(state: DealState) -> dict:
     """
-    Step 12: Generate Deck
-    Produces a one-page summary or a full IC Deck using a template.
+    Pre-formatted text blocks shared by the IC deck and the scenario decks.
+    Deck specs bind to these through the 'values.' path prefix.
     """
-    print("--- Node: Generate Deck ---")
-    
-    # Paths
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    backend_dir = os.path.dirname(os.path.dirname(current_dir))
-    # Use the specific IC Deck template
-    template_path = os.path.join(backend_dir, "data", "templates", "ic_deck_template.pptx")
-    output_dir = os.path.join(backend_dir, "data", "generated")
-    os.makedirs(output_dir, exist_ok=True)
-
-    # Clean up old generated files in the output directory
-    for f in glob.glob(os.path.join(output_dir, "*.pptx")):
-        try:
-            os.remove(f)
-        except Exception as e:
-            print(f"Failed to delete {f}: {e}")
-
-    # Load Template or Create New if missing
-    if os.path.exists(template_path):
-        try:
-            prs = Presentation(template_path)
-        except Exception as e:
-            print(f"Error loading template: {e}. Creating new.")
-            prs = Presentation()
-    else:
-        print("Template not found, creating a basic one...")
-        prs = Presentation()
-        # Create a basic structure if template is missing (Fallback)
-        slide_layout = prs.slide_layouts[0] if len(prs.slide_layouts) > 0 else prs.slide_master.slide_layouts[0]
-        slide = prs.slides.add_slide(slide_layout)
-        if slide.shapes.title:
-            slide.shapes.title.text = "{{DEAL_NAME}}"
-        if len(slide.placeholders) > 1:
-            slide.placeholders[1].text = "{{DATE}}"
-        
-        if len(prs.slide_layouts) > 1:
-            slide_layout = prs.slide_layouts[1]
-        else:
-            slide_layout = prs.slide_layouts[0]
-            
-        slide = prs.slides.add_slide(slide_layout)
-        if slide.shapes.title:
-            slide.shapes.title.text = "Executive Summary"
-        if len(slide.placeholders) > 1:
-            slide.placeholders[1].text = "{{SUMMARY_BULLETS}}"
-
-    # --- Prepare Data for Replacement ---
     extracted = state.get("extracted_data", {})
     assumptions = state.get("financial_assumptions", {})
-    model = state.get("financial_model", {})
-    
+
     # Tenancy Logic
     tenancy_data = extracted.get("tenancy_schedule", [])
     if not tenancy_data and "source_json" in extracted:
@@ -89,23 +45,6 @@ def generate_deck(state: DealState):
     # Appendix Logic
     app_text = "Documents Reviewed:\n- Investment Memorandum.pdf\n- Rent Roll.xlsx\n- Technical DD Report.pdf"
 
-    # Safe extraction helper
-    def safe_format_percent(val):
-        if val is None:
-            return "N/A"
-        try:
-            return f"{float(val):.2%}"
-        except:
-            return "N/A"
-
-    def safe_format_float(val):
-        if val is None:
-            return "N/A"
-        try:
-            return f"{float(val):.2f}x"
-        except:
-            return "N/A"
-
     # Prepare robust values for replacements
     entry_yield_val = float(assumptions.get('entry_yield') or 0)
     if entry_yield_val == 0:
@@ -115,75 +54,149 @@ def generate_deck(state: DealState):
     if exit_yield_val == 0:
         exit_yield_val = 0.0475
 
-    replacements = {
-        "{{DEAL_NAME}}": state.get("company_name", "Project Deal") or "Project Deal",
-        "{{DATE}}": datetime.now().strftime("%Y-%m-%d"),
-        "{{SCENARIO_LABEL}}": "Base Case", # Default for main deck
-        "{{SUMMARY_BULLETS}}": extracted.get("analysis", "No analysis available.")[:500],
-        "{{MARKET_BULLETS}}": extracted.get("market_highlights", "Market data not available."),
-        "{{TENANCY_BULLETS}}": tenancy_text,
-        "{{BUSINESS_PLAN_BULLETS}}": bp_text,
-        "{{SENSITIVITY_ANALYSIS}}": sens_text,
-        "{{APPENDIX_BULLETS}}": app_text,
-        "{{ENTRY_YIELD}}": f"{entry_yield_val:.2%}",
-        "{{IRR}}": safe_format_percent(model.get('irr')),
-        "{{MOIC}}": safe_format_float(model.get('em') or model.get('equity_multiple')),
-        "{{EXIT_YIELD}}": f"{exit_yield_val:.2%}",
-        "{{MARKET_RENT}}": f"{assumptions.get('market_rent', 85)}",
+    return {
+        "date": datetime.now().strftime("%Y-%m-%d"),
+        "tenancy_bullets": tenancy_text,
+        "tenancy_rows": tenancy_data,
+        "business_plan_bullets": bp_text,
+        "sensitivity_bullets": sens_text,
+        "appendix_bullets": app_text,
+        "entry_yield": entry_yield_val,
+        "exit_yield": exit_yield_val,
+        "market_rent": f"{assumptions.get('market_rent', 85)}",
+    }
+
+# Presigned S3 links expire after an hour; re-render pre-rendered decks before that
+PRERENDER_MAX_AGE_SECONDS = 3000
+
+def _deck_signature(state: DealState) -> str:
+    """Fingerprint of the inputs the IC deck depends on, used to validate pre-rendered decks."""
+    payload = {
+        "company_name": state.get("company_name"),
+        "financial_assumptions": state.get("financial_assumptions", {}),
+        "financial_model": state.get("financial_model", {}),
+        "analysis": state.get("extracted_data", {}).get("analysis", ""),
     }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+def save_deck_artifacts(deck, context: dict, template_path: str, output_dir: str, basename: str) -> dict:
+    """
+    Renders a compiled deck spec to PPTX and PDF, uploads both to S3 and removes the
+    local copies once uploaded. The PDF is drawn directly from the spec, so no office
+    suite is needed on the worker.
+
+    Returns:
+        dict with 'url', 'pdf_url', 'filename', 'slides' and the local paths
+    """
+    output_path = os.path.join(output_dir, f"{basename}.pptx")
+    pdf_path = os.path.join(output_dir, f"{basename}.pdf")
+    result = {"url": None, "pdf_url": None, "filename": f"{basename}.pptx", "slides": [],
+              "output_path": output_path, "pdf_path": pdf_path}
 
-    # --- Replace Placeholders ---
-    # Helper to replace text in a paragraph
-    def replace_text(text_frame, replacements):
-        for paragraph in text_frame.paragraphs:
-            full_text = paragraph.text
-            original_text = full_text
-            for key, val in replacements.items():
-                if key in full_text:
-                    full_text = full_text.replace(key, str(val))
-            
-            if full_text != original_text:
-                paragraph.text = full_text
-
-    for slide in prs.slides:
-        for shape in slide.shapes:
-            if shape.has_text_frame:
-                replace_text(shape.text_frame, replacements)
-            
-            if shape.has_table:
-                for row in shape.table.rows:
-                    for cell in row.cells:
-                        if cell.text_frame:
-                            replace_text(cell.text_frame, replacements)
-
-    # Save locally with timestamp
-    filename = f"IC_Deck_v1_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pptx"
-    output_path = os.path.join(output_dir, filename)
-    
-    s3_link = None
     try:
+        # --- Render Deck Spec (one slide per section / repeated item) ---
+        prs, result["slides"] = render_deck(deck, context, template_path)
         prs.save(output_path)
-        # Upload to S3
-        s3_link = upload_to_s3_and_get_link(output_path)
-        
-        # Remove local file after upload
-        if s3_link and os.path.exists(output_path):
-            os.remove(output_path)
-            print(f"Local file {output_path} removed after upload.")
-            
+        result["url"] = upload_to_s3_and_get_link(output_path)
+    except Exception as e:
+        print(f"Error generating/uploading {deck.name} PPTX: {e}")
+
+    try:
+        with open(pdf_path, "wb") as f:
+            render_deck_pdf(deck, context, f)
+        result["pdf_url"] = upload_to_s3_and_get_link(pdf_path)
     except Exception as e:
-        print(f"Error generating/uploading deck: {e}")
+        print(f"Error generating/uploading {deck.name} PDF: {e}")
+
+    # Remove local files after upload
+    for path, url in ((output_path, result["url"]), (pdf_path, result["pdf_url"])):
+        if url and os.path.exists(path):
+            os.remove(path)
+            print(f"Local file {path} removed after upload.")
+
+    return result
+
+def _render_ic_deck(state: DealState) -> dict:
+    """
+    Renders the IC deck spec, uploads it to S3 and returns the artifact record.
+    """
+    # Paths
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    backend_dir = os.path.dirname(os.path.dirname(current_dir))
+    # Use the specific IC Deck template
+    template_path = os.path.join(backend_dir, "data", "templates", IC_DECK.template)
+    output_dir = os.path.join(backend_dir, "data", "generated")
+    os.makedirs(output_dir, exist_ok=True)
+
+    # --- Prepare Data for Bindings ---
+    extracted = state.get("extracted_data", {})
+    values = _build_deck_values(state)
+    values["scenario_label"] = "Base Case" # Default for main deck
+    values["summary_bullets"] = extracted.get("analysis", "No analysis available.")[:500]
+
+    # Unique per render: other artifact branches write to the same directory concurrently,
+    # and save_deck_artifacts removes only this render's files once they are uploaded
+    basename = f"IC_Deck_v1_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    result = save_deck_artifacts(IC_DECK, {**state, "values": values}, template_path, output_dir, basename)
+
+    return {
+        "label": "Download IC Deck",
+        "url": result["url"],
+        "pdf_url": result["pdf_url"],
+        "note": None if result["url"] else f"(Error: Could not upload deck to S3. Local file might be at {result['output_path']} if not deleted)",
+        "filename": result["filename"],
+        "slides": result["slides"],
+        "signature": _deck_signature(state),
+        "rendered_at": time.time(),
+    }
+
+def prerender_ic_deck(state: DealState):
+    """
+    Step 10b: Pre-render Deck (parallel artifact branch)
+    Renders the IC deck alongside the Excel export so that confirming deck
+    generation only has to hand out the link. Opt-in (PRERENDER_IC_DECK): it
+    uploads a deck to S3 on every model build, confirmed or not.
+    """
+    if not Config.PRERENDER_IC_DECK:
+        return {}
+    print("--- Node: Pre-render IC Deck ---")
+    deck = _render_ic_deck(state)
+    return {
+        "deck_content": {"slides": deck["slides"], "prerendered": deck}
+    }
+
+def generate_deck(state: DealState):
+    """
+    Step 12: Generate Deck
+    Produces a one-page summary or a full IC Deck using a template.
+    Reuses the deck pre-rendered after the model build when its inputs are unchanged.
+    """
+    print("--- Node: Generate Deck ---")
+
+    deck = (state.get("deck_content") or {}).get("prerendered")
+    is_fresh = (
+        deck is not None
+        and deck.get("url")
+        and deck.get("signature") == _deck_signature(state)
+        and time.time() - deck.get("rendered_at", 0) < PRERENDER_MAX_AGE_SECONDS
+    )
+    if is_fresh:
+        print("Using pre-rendered IC deck.")
+    else:
+        deck = _render_ic_deck(state)
     
     download_msg = ""
-    if s3_link:
-        download_msg = f"\n\n📥 **[Download IC Deck]({s3_link})**"
+    if deck["url"]:
+        download_msg = f"\n\n📥 **[{deck['label']}]({deck['url']})**"
+        if deck.get("pdf_url"):
+            download_msg += f"\n\n📄 **[{deck['label']} (PDF)]({deck['pdf_url']})**"
     else:
-        download_msg = f"\n\n(Error: Could not upload deck to S3. Local file might be at {output_path} if not deleted)"
+        download_msg = f"\n\n{deck['note']}"
 
     status_content = (
         "System Processing:\n"
-        "- Generated PPTX from template\n"
-        f"- Securely stored: {filename}"
+        f"- Generated PPTX and PDF from deck spec ({len(deck['slides'])} slides)\n"
+        f"- Securely stored: {deck['filename']}"
     )
     
     response_content = (
@@ -197,7 +210,7 @@ def generate_deck(state: DealState):
             AIMessage(content=status_content, name="system_log"),
             AIMessage(content=response_content, name="agent")
         ],
-        "deck_content": {"slides": ["Summary", "Market", "Tenancy", "Business Plan", "Financials", "Sensitivities", "Appendix"]}
+        "deck_content": {"slides": deck["slides"], "prerendered": deck}
     }
 
 def refresh_deck_views(state: DealState):
@@ -219,80 +232,21 @@ def refresh_deck_views(state: DealState):
     # Load Template (Same as IC Deck)
     current_dir = os.path.dirname(os.path.abspath(__file__))
     backend_dir = os.path.dirname(os.path.dirname(current_dir))
-    template_path = os.path.join(backend_dir, "data", "templates", "ic_deck_template.pptx")
-    
-    if os.path.exists(template_path):
-        try:
-            prs = Presentation(template_path)
-        except:
-            prs = Presentation()
-    else:
-        prs = Presentation()
-        # Fallback
-        slide = prs.slides.add_slide(prs.slide_layouts[0])
-        slide.shapes.title.text = f"Scenario Analysis: {scenario_name}"
+    template_path = os.path.join(backend_dir, "data", "templates", SCENARIO_DECK.template)
 
-    # --- Prepare Data for Replacement (Scenario Specific) ---
+    # --- Prepare Data for Bindings (Scenario Specific) ---
     # In a real app, we would pull the specific scenario results from state['scenarios'][scenario_name]
     # For now, we assume the 'financial_model' in state reflects the LATEST run (which is the scenario)
-    extracted = state.get("extracted_data", {})
     assumptions = state.get("financial_assumptions", {})
     model = state.get("financial_model", {})
-    
-    # Tenancy Logic (Same as Base)
-    tenancy_data = extracted.get("tenancy_schedule", [])
-    if not tenancy_data and "source_json" in extracted:
-         tenancy_data = extracted["source_json"].get("tenants", [])
-    tenancy_text = "Key Tenants:"
-    if tenancy_data:
-        for t in tenancy_data:
-            name = t.get("name", "Unknown")
-            area = t.get("area", "N/A")
-            tenancy_text += f"\n- {name}: {area} sqm"
-    else:
-        tenancy_text += "\n- Logistics Corp A: 5,000 sqm\n- E-Commerce Ltd: 3,000 sqm\n- Global Supply Chain: 2,000 sqm"
-
-    # Business Plan Logic (Same as Base)
-    bp_text = "Key Assumptions:"
-    bp_text += f"\n- Market Rent: {assumptions.get('market_rent', 85)} EUR/sqm"
-    bp_text += f"\n- Entry Yield: {assumptions.get('entry_yield', 0.045):.2%}"
-    bp_text += f"\n- Exit Yield: {assumptions.get('exit_yield', 0.0475):.2%}"
-    bp_text += f"\n- Capex: {assumptions.get('capex', 0):,} EUR"
-
-    # Sensitivities Logic (Same as Base)
-    sens_text = "Sensitivity Analysis:\n- Impact of Exit Yield expansion (+25bps)\n- Impact of Rent Growth reduction (-1%)\n- Interest Rate stress test (+100bps)"
-
-    # Appendix Logic (Same as Base)
-    app_text = "Documents Reviewed:\n- Investment Memorandum.pdf\n- Rent Roll.xlsx\n- Technical DD Report.pdf"
-
-    # Safe extraction helper
-    def safe_format_percent(val):
-        if val is None:
-            return "N/A"
-        try:
-            return f"{float(val):.2%}"
-        except:
-            return "N/A"
-
-    def safe_format_float(val):
-        if val is None:
-            return "N/A"
-        try:
-            return f"{float(val):.2f}x"
-        except:
-            return "N/A"
 
     # Prepare robust values for replacements
     print(f"[DEBUG] Refresh Deck Views - Assumptions: {assumptions}")
     print(f"[DEBUG] Refresh Deck Views - Model: {model}")
     
-    entry_yield_val = float(assumptions.get('entry_yield') or 0)
-    if entry_yield_val == 0:
-        entry_yield_val = 0.045
-        
-    exit_yield_val = float(assumptions.get('exit_yield') or 0)
-    if exit_yield_val == 0:
-        exit_yield_val = 0.0475
+    values = _build_deck_values(state)
+    entry_yield_val = values["entry_yield"]
+    exit_yield_val = values["exit_yield"]
 
     # --- NEW: Construct Dynamic Summary Bullets ---
     irr_val = model.get('irr')
@@ -312,69 +266,38 @@ def refresh_deck_views(state: DealState):
         f"• Exit Yield: {exit_yield_val:.2%}"
     )
 
-    replacements = {
-        "{{DEAL_NAME}}": state.get("company_name", "Project Deal") or "Project Deal",
-        "{{DATE}}": datetime.now().strftime("%Y-%m-%d"),
-        "{{SCENARIO_LABEL}}": f"Scenario {label}",
-        "{{SUMMARY_BULLETS}}": summary_bullets,
-        "{{MARKET_BULLETS}}": extracted.get("market_highlights", "Market data not available."),
-        "{{TENANCY_BULLETS}}": tenancy_text,
-        "{{BUSINESS_PLAN_BULLETS}}": bp_text,
-        "{{SENSITIVITY_ANALYSIS}}": sens_text,
-        "{{APPENDIX_BULLETS}}": app_text,
-        "{{ENTRY_YIELD}}": f"{entry_yield_val:.2%}",
-        "{{IRR}}": safe_format_percent(model.get('irr')),
-        "{{MOIC}}": safe_format_float(model.get('equity_multiple')),
-        "{{EXIT_YIELD}}": f"{exit_yield_val:.2%}",
-        "{{MARKET_RENT}}": f"{assumptions.get('market_rent', 0)}",
+    # Save locally
+    # Unique per render, like the IC deck: concurrent refreshes must not share (or delete) each other's files
+    basename = f"IC_Deck_v{version}_Scenario_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    filename = f"{basename}.pptx"
+
+    # Update scenarios in state to track count (and feed the comparison slides)
+    new_scenarios = scenarios.copy()
+    new_scenarios[scenario_name] = {
+        "filename": filename,
+        "irr": irr_val,
+        "equity_multiple": em_val,
+        "yield_on_cost": yoc_val
     }
 
-    # --- Replace Placeholders ---
-    def replace_text(text_frame, replacements):
-        for paragraph in text_frame.paragraphs:
-            full_text = paragraph.text
-            original_text = full_text
-            for key, val in replacements.items():
-                if key in full_text:
-                    full_text = full_text.replace(key, str(val))
-            if full_text != original_text:
-                paragraph.text = full_text
-
-    for slide in prs.slides:
-        for shape in slide.shapes:
-            if shape.has_text_frame:
-                replace_text(shape.text_frame, replacements)
-            if shape.has_table:
-                for row in shape.table.rows:
-                    for cell in row.cells:
-                        if cell.text_frame:
-                            replace_text(cell.text_frame, replacements)
+    values["scenario_label"] = scenario_name
+    values["summary_bullets"] = summary_bullets
+    values["market_rent"] = f"{assumptions.get('market_rent', 0)}"
+    values["scenario_history"] = new_scenarios
 
-    # Save locally
-    filename = f"IC_Deck_v{version}_Scenario_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pptx"
     output_dir = os.path.join(backend_dir, "data", "generated")
     os.makedirs(output_dir, exist_ok=True)
-    output_path = os.path.join(output_dir, filename)
-    
-    s3_link = None
-    try:
-        prs.save(output_path)
-        # Upload to S3
-        s3_link = upload_to_s3_and_get_link(output_path)
-        
-        # Remove local file after upload
-        if s3_link and os.path.exists(output_path):
-            os.remove(output_path)
-            print(f"Local file {output_path} removed after upload.")
 
-    except Exception as e:
-        print(f"Error generating/uploading scenario deck: {e}")
+    result = save_deck_artifacts(SCENARIO_DECK, {**state, "values": values}, template_path, output_dir, basename)
 
-    download_msg = ""
-    if s3_link:
-        download_msg = f"\n\n📥 **[Download IC Deck v{version}]({s3_link})**"
-    else:
-        download_msg = f"\n\n(Deck generated locally at {output_path}, but S3 upload failed)"
+    artifact = {
+        "label": f"Download IC Deck v{version}",
+        "url": result["url"],
+        "note": None if result["url"] else f"(Deck generated locally at {result['output_path']}, but S3 upload failed)"
+    }
+    artifact_links = {"deck": artifact}
+    if result["pdf_url"]:
+        artifact_links["deck_pdf"] = {"label": f"Download IC Deck v{version} (PDF)", "url": result["pdf_url"]}
     
     # Status update
     status_content = (
@@ -382,26 +305,12 @@ def refresh_deck_views(state: DealState):
         "- Updates sensitivity tables in Deck\n"
         "- Refreshes return charts (IRR/EM vs Base Case)"
     )
-    
-    # Agent response asking for more scenarios
-    response_content = (
-        "Deck views refreshed with the new scenario data."
-        f"{download_msg}\n\n"
-        "Would you like to run another scenario (e.g., 'stress test interest rates'), or is the analysis complete?"
-    )
-    
-    # Update scenarios in state to track count
-    new_scenarios = scenarios.copy()
-    new_scenarios[scenario_name] = {"filename": filename}
 
     return {
-        "messages": [
-            AIMessage(content=status_content, name="system_log"),
-            AIMessage(content=response_content, name="agent")
-        ],
-        "scenarios": new_scenarios
+        "messages": [AIMessage(content=status_content, name="system_log")],
+        "scenarios": new_scenarios,
+        "artifact_links": artifact_links
     }
 
 def deck_node(state: DealState):
     pass
-
@@ -1,16 +1,85 @@
 import os
 import json
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, wait
 from datetime import datetime
 from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.rate_limiters import InMemoryRateLimiter
 from langchain_openai import ChatOpenAI
+from pydantic import BaseModel, Field
+from typing import List
 from deal_agent.state import DealState
-from deal_agent.tools.pdf_parser import parse_pdf_document
-from deal_agent.tools.vector_store import ingest_deal_assets
-from pptx import Presentation
-from deal_agent.tools.s3_utils import upload_to_s3_and_get_link
+from deal_agent.tools.pdf_parser import join_pages, parse_page_ranges, parse_pdfs_parallel
+from deal_agent.tools.table_extractor import financial_figures, strip_table_text, tenancy_records
+from deal_agent.tools.vector_store import (delete_document_vectors, delete_stale_vectors, document_key,
+                                          ingest_deal_assets, ingest_document_chunks)
+from deal_agent.tools.manifest import diff_data_room, forget_documents, mark_stage, needs_stage, summarize_diff
+from deal_agent.tools.chunking import chunk_document
+from deal_agent.tools.json_stream import append_asset_columns, empty_portfolio_columns, iter_bundle_batches
+from deal_agent.tools.normalization import annotate_asset_records, normalize_comp_records, normalize_lease_columns
+from deal_agent.tools.background import submit_background
+from deal_agent.tools.prompt_builder import (build_alignment_context, compact_json, count_tokens, fit_json_records,
+                                             index_chunks)
+from deal_agent.tools.comps_tools import comp_filter_metadata
+from deal_agent.tools.deck_spec import DEAL_SUMMARY
+from deal_agent.tools.metrics_tools import compute_column_metrics, compute_lease_metrics, format_metrics_summary
+from deal_agent.nodes.deck import save_deck_artifacts
+from deal_agent.utils.config import Config
 
 # --- Granular Nodes for Real-Time Logging ---
 
+ALIGN_STATUS_MSG = "I’ve ingested the IM, rent roll and structured deal data.\n\nI’ll generate the summary, key metrics, and an initial set of comparables."
+
+# Extraction targets of align_with_llm; ranks PDF excerpts alongside the per-asset queries
+ALIGN_TASK_TERMS = ("location market highlights investment rationale risks tenant lease rent ERV NOI "
+                    "yield cap rate occupancy GLA area clear height floor loading dock doors")
+
+def _data_root() -> str:
+    """Resolves backend/data whether the server runs from the repo root, backend/ or deeper."""
+    base_dir = os.getcwd()
+    if "backend" in base_dir:
+        if base_dir.endswith("backend"):
+            return os.path.join(base_dir, "data")
+        # Fallback or deeper nesting: .../backend/deal_agent/nodes -> .../backend
+        current_file_dir = os.path.dirname(os.path.abspath(__file__))
+        backend_dir = os.path.dirname(os.path.dirname(current_file_dir))
+        return os.path.join(backend_dir, "data")
+    # In root, data is in backend/data
+    return os.path.join(base_dir, "backend", "data")
+
+def _diff_manifest(deal_id, data_root: str, subdir: str, extension: str):
+    """Diffs a data-room folder against the ingestion manifest; None means process everything."""
+    try:
+        return diff_data_room(deal_id, data_root, subdir, extension)
+    except Exception as e:
+        print(f"Ingestion manifest unavailable, processing all files in {subdir}: {e}")
+        return None
+
+def _record_stage(deal_id, rel_paths, stage: str, ok: bool = True):
+    try:
+        mark_stage(deal_id, rel_paths, stage, ok)
+    except Exception as e:
+        print(f"Could not update ingestion manifest ({stage}): {e}")
+
+def _purge_removed(deal_id, diff, namespaces) -> list:
+    """Deletes the vectors and manifest rows of files that left the data room."""
+    if not diff or not diff["removed"]:
+        return []
+    removed = []
+    for rel_path in diff["removed"]:
+        try:
+            deleted = delete_document_vectors(os.path.basename(rel_path), namespaces)
+            print(f"Removed {deleted} vectors of deleted file {rel_path}")
+            removed.append(rel_path)
+        except Exception as e:
+            # Keep the manifest row so the next run retries the delete
+            print(f"Could not remove vectors of deleted file {rel_path}: {e}")
+    try:
+        forget_documents(deal_id, removed)
+    except Exception as e:
+        print(f"Could not update ingestion manifest (removed files): {e}")
+    return removed
+
 def start_ingestion(state: DealState):
     """
     Step 1: Start Ingestion
@@ -20,166 +89,274 @@ def start_ingestion(state: DealState):
     return {
         "messages": [
             AIMessage(content="Starting data ingestion process...", name="system_log")
-        ]
+        ],
+        # Clear the previous run's data; the branches below merge their keys back in
+        "extracted_data": None
     }
 
+def _asset_vector_record(asset, source: str, deal_id, idx: int):
+    """Builds the 'deal' namespace text blob and metadata for one asset (rents already normalized)."""
+    logistics = asset.get("logistics_asset", {})
+    leases = asset.get("leases", [])
+    tenant_names = [l.get("tenant", {}).get("name", "Unknown") for l in leases]
+    avg_rent_eur_psm = asset.get("rent_eur_psm", 0)
+    # Quote the last converted lease in the vector text
+    conversions = [l.get("rent_conversion") for l in leases if l.get("rent_conversion")]
+    conversion_note = f"({conversions[-1]})" if conversions else ""
+
+    text_blob = f"""
+    Asset Name: {asset.get('name', 'Unknown')}
+    Type: {asset.get('asset_type', 'Logistics')} ({asset.get('tenure', '')})
+    Location: {asset.get('address', '')}, {asset.get('city', '')}, {asset.get('country', '')}
+    Size: {logistics.get('area_m2', 0)} sqm
+    Specs: {logistics.get('eaves_height_m', 0)}m height, {logistics.get('dock_doors', 0)} docks
+    Tenants: {', '.join(tenant_names)}
+    Current Rent (Normalized): €{avg_rent_eur_psm} /sqm/year
+    Currency Basis: Converted to EUR PSM for comparison. {conversion_note}
+    """
+    metadata = {
+        "source": source,
+        "deal_id": deal_id,
+        "record_type": "internal_asset",
+        "chunk_index": idx,
+        "city": asset.get('city', 'Unknown'),
+        "asset_name": asset.get('name', 'Unknown')
+    }
+    return text_blob.strip(), metadata
+
+def _comp_vector_record(comp, source: str, deal_id, idx: int):
+    """Builds the 'market_comps' namespace text blob and metadata for one comparable."""
+    text_blob = f"""
+    Comparable Asset: {comp.get('name', 'Unknown')}
+    Type: {comp.get('asset_type', 'Logistics')}
+    Size: {comp.get('size_m2', 0)} sqm
+    Rent: {comp.get('rent_psm_pa', 0)} /sqm
+    Yield: {comp.get('yield', 'N/A')}
+    Date: {comp.get('acquisition_date', '')}
+    Notes: {comp.get('notes', '')}
+    """
+    metadata = {
+        **comp_filter_metadata(comp),
+        "source": source,
+        "deal_id": deal_id, 
+        "chunk_index": idx,
+        "name": comp.get('name', 'Unknown'),
+        "size_m2": comp.get('size_m2', 0),
+        "yield": comp.get('yield', 0),
+        "rent_psm_pa": comp.get('rent_psm_pa', 0),
+        "rent_eur_psm": comp.get('rent_eur_psm', comp.get('rent_psm_pa', 0)),
+        "rent_conversion": comp.get('rent_conversion', ''),
+        "distance_km": comp.get('distance_km', 0)
+    }
+    return text_blob.strip(), metadata
+
+# Vector namespace and text builder per bundle array
+_BUNDLE_VECTORS = {"assets": (_asset_vector_record, "deal"), "comps": (_comp_vector_record, "market_comps")}
+
+def _prepare_batch(array: str, records, columns, filename: str):
+    """Normalizes a streamed batch in place; assets are also appended to the columnar tables."""
+    if array == "assets":
+        asset_start, lease_start = len(columns["assets"]["name"]), len(columns["leases"]["rent_psm_pa"])
+        for record in records:
+            append_asset_columns(columns, record, source=filename)
+        normalize_lease_columns(columns)
+        annotate_asset_records(records, columns, asset_start, lease_start)
+    else:
+        normalize_comp_records(records)
+
+def _record_key(record, seen: dict) -> str:
+    """Stable key of a bundle record (its id, else its name); repeats within a file are numbered."""
+    key = str(record.get("id") or record.get("name") or "record")
+    seen[key] = seen.get(key, 0) + 1
+    return key if seen[key] == 1 else f"{key}#{seen[key]}"
+
+def _bundle_vector_batch(array: str, records, filename: str, deal_id, start: int, seen: dict):
+    """Vector texts, metadata and stable record keys for one prepared batch of a bundle."""
+    build_record, namespace = _BUNDLE_VECTORS[array]
+    texts, metadatas, keys = [], [], []
+    for offset, record in enumerate(records):
+        text, metadata = build_record(record, filename, deal_id, start + offset)
+        texts.append(text)
+        metadatas.append(metadata)
+        keys.append(f"{array}:{_record_key(record, seen)}")
+    return namespace, texts, metadatas, keys
+
+def _ingest_bundle_batch(filename: str, array: str, namespace: str, texts, metadatas, keys):
+    print(f"Ingesting {len(texts)} {array} from {filename} into '{namespace}' namespace...")
+    return ingest_deal_assets(texts, metadatas, namespace=namespace,
+                              id_prefix=f"{document_key(filename, 'json')}-", record_keys=keys)
+
+def _submit_bundle_batch(name: str, in_flight: list, *args):
+    """Upserts one batch, on the background pool when enabled; returns its result or future."""
+    if not Config.BACKGROUND_EMBEDDING:
+        return _ingest_bundle_batch(*args)
+    # Each queued job holds its batch's vector texts; wait for the pool to catch up rather than buffer the file
+    in_flight[:] = [f for f in in_flight if not f.done()]
+    if len(in_flight) >= 2 * Config.BACKGROUND_WORKERS:
+        wait(in_flight, return_when=FIRST_COMPLETED)
+    future = submit_background(name, _ingest_bundle_batch, *args)
+    in_flight.append(future)
+    return future
+
+def _finish_bundle_embedding(deal_id, rel_path: str, batches: list, complete: bool):
+    """
+    Collects the batch upserts of one bundle, deletes the vectors of records
+    that left it and records the embed stage. Batches are (namespace, result or
+    future) pairs; on the FIFO background pool they finish before this job runs.
+    """
+    filename = os.path.basename(rel_path)
+    totals = {"inserted": 0, "reembedded": 0, "updated": 0, "skipped": 0, "deleted": 0}
+    current_ids = {namespace: [] for _, namespace in _BUNDLE_VECTORS.values()}
+    errors = [] if complete else ["bundle could not be read to the end"]
+    for namespace, outcome in batches:
+        try:
+            result = outcome.result() if isinstance(outcome, Future) else outcome
+        except Exception as e:
+            errors.append(str(e))
+            continue
+        # ingest_deal_assets reports failures in its result rather than raising
+        if "error" in result:
+            errors.append(result["error"])
+        current_ids[namespace].extend(result.get("ids", []))
+        for key in totals:
+            totals[key] += result.get(key, 0)
+
+    # Records removed from the bundle (or all of an earlier, unkeyed version) are no longer referenced
+    if not errors:
+        prefix = f"{document_key(filename, 'json')}-"
+        for namespace, ids in current_ids.items():
+            try:
+                totals["deleted"] += delete_stale_vectors(prefix, ids, namespace)
+            except Exception as e:
+                errors.append(f"could not prune stale vectors in '{namespace}': {e}")
+
+    for error in errors:
+        print(f"Error ingesting {filename} to Vector DB: {error}")
+    _record_stage(deal_id, [rel_path], "embed", ok=not errors)
+    print(f"Vectorized {filename}: {len(current_ids['deal'])} assets, {len(current_ids['market_comps'])} comps "
+          f"({totals['inserted']} inserted, {totals['reembedded']} re-embedded, {totals['updated']} updated, "
+          f"{totals['skipped']} skipped, {totals['deleted']} deleted)")
+
+def _finish_embedding(deal_id, rel_path: str, batches: list, complete: bool):
+    if Config.BACKGROUND_EMBEDDING:
+        submit_background(f"embed:{deal_id}:{rel_path}", _finish_bundle_embedding, deal_id, rel_path, batches, complete)
+    else:
+        _finish_bundle_embedding(deal_id, rel_path, batches, complete)
+
 def load_json_data(state: DealState):
     """
     Step 2: Load JSON Data
-    Loads the structured JSON file.
+    Streams every structured JSON bundle into columnar asset/lease tables.
+    Changed bundles are vectorized batch by batch from the same stream.
     """
     print("--- Node: Load JSON Data ---")
     
-    base_dir = os.getcwd()
-    if "backend" in base_dir:
-        # Already in backend or subdirectory
-        # If in backend/, data is in data/
-        # If in backend/deal_agent/, data is in ../data/
-        # Safest is to find 'backend' and construct path from there
-        # But assuming standard execution from root or backend:
-        if base_dir.endswith("backend"):
-             data_root = os.path.join(base_dir, "data")
-        else:
-             # Fallback or deeper nesting, try to find relative to file
-             current_file_dir = os.path.dirname(os.path.abspath(__file__))
-             # .../backend/deal_agent/nodes -> .../backend
-             backend_dir = os.path.dirname(os.path.dirname(current_file_dir))
-             data_root = os.path.join(backend_dir, "data")
-    else:
-        # In root, data is in backend/data
-        data_root = os.path.join(base_dir, "backend", "data")
-        
+    data_root = _data_root()
     json_dir = os.path.join(data_root, "structured_json")
-    structured_data = {}
-    json_files = []
+    structured_data = {"assets": [], "comps": []}
+    columns = empty_portfolio_columns()
+    json_files = sorted(f for f in os.listdir(json_dir) if f.endswith('.json')) if os.path.exists(json_dir) else []
+    loaded = []
+    failed = []
+    queued = []
+    totals = {"assets": 0, "comps": 0}
+    in_flight = []
+    # Distinguishes this run's batch jobs from a still-running earlier ingest of the same file
+    run_id = uuid.uuid4().hex[:8]
+    deal_id = state.get("current_deal_id", "unknown_deal")
+    diff = _diff_manifest(deal_id, data_root, "structured_json", ".json")
+    _purge_removed(deal_id, diff, ["deal", "market_comps"])
+
+    for filename in json_files:
+        rel_path = f"structured_json/{filename}"
+        counts = {"assets": 0, "comps": 0}
+        seen = {"assets": {}, "comps": {}}
+        # Unchanged files that were already embedded keep their vectors
+        embed = diff is None or needs_stage(diff, rel_path, "embed")
+        batches = []
+        # Row counts before this file, so a bundle that fails half-way can be rolled back
+        sizes = ({k: len(v) for k, v in structured_data.items()},
+                 {t: {c: len(v) for c, v in cols.items()} for t, cols in columns.items()})
+        try:
+            for array, records in iter_bundle_batches(os.path.join(json_dir, filename), Config.JSON_BATCH_SIZE):
+                _prepare_batch(array, records, columns, filename)
+                if embed:
+                    namespace, texts, metadatas, keys = _bundle_vector_batch(
+                        array, records, filename, deal_id, counts[array], seen[array])
+                    if texts:
+                        name = f"embed:{deal_id}:{rel_path}:{run_id}:{len(batches)}"
+                        batches.append((namespace, _submit_bundle_batch(
+                            name, in_flight, filename, array, namespace, texts, metadatas, keys)))
+                counts[array] += len(records)
+                # Metrics and totals come from the columnar tables; prompts and slides only need a sample
+                room = Config.JSON_STATE_MAX_RECORDS - len(structured_data[array])
+                if room > 0:
+                    structured_data[array].extend(records[:room])
+        except Exception as e:
+            print(f"Error reading JSON ({filename}): {e}")
+            failed.append(filename)
+            for array, size in sizes[0].items():
+                del structured_data[array][size:]
+            for table, cols in sizes[1].items():
+                for column, size in cols.items():
+                    del columns[table][column][size:]
+            _record_stage(deal_id, [rel_path], "parse", ok=False)
+            if embed:
+                # Keeps what was upserted but skips pruning, since the record set is incomplete
+                _finish_embedding(deal_id, rel_path, batches, complete=False)
+            continue
+
+        loaded.append(filename)
+        for array in totals:
+            totals[array] += counts[array]
+        print(f"Loaded {filename}: {counts['assets']} assets, {counts['comps']} comps")
+        _record_stage(deal_id, [rel_path], "parse")
+        if embed:
+            _finish_embedding(deal_id, rel_path, batches, complete=True)
+            if Config.BACKGROUND_EMBEDDING:
+                queued.append(filename)
+
+    if loaded:
+        msg = (f"Loaded structured data from {len(loaded)} bundle(s): {', '.join(loaded)} "
+               f"({totals['assets']} assets, {totals['comps']} comps)")
+    else:
+        msg = "No structured JSON found."
+    if failed:
+        msg += f"\nCould not load {len(failed)} bundle(s): {', '.join(failed)}"
+    if diff:
+        msg += f" (manifest: {summarize_diff(diff)})"
+    if queued:
+        msg += f"\nVectorizing {len(queued)} bundle(s) in the background."
     
-    if os.path.exists(json_dir):
-        json_files = [f for f in os.listdir(json_dir) if f.endswith('.json')]
-        if json_files:
-            try:
-                file_path = os.path.join(json_dir, json_files[0])
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    structured_data = json.load(f)
-                
-                print(f"Vectorizing JSON data from {json_files[0]}...")
-                deal_id = state.get("current_deal_id", "unknown_deal")
-                
-                # --- 1. Process Assets (Internal) -> Namespace: deal ---
-                assets = structured_data.get("assets", [])
-                asset_texts = []
-                asset_metadatas = []
-                
-                for idx, asset in enumerate(assets):
-                    # Extract nested fields
-                    logistics = asset.get("logistics_asset", {})
-                    leases = asset.get("leases", [])
-                    tenant_names = [l.get("tenant", {}).get("name", "Unknown") for l in leases]
-                    
-                    # --- Currency & Unit Conversion Logic ---
-                    # Original Data: GBP PSF (assumed for UK assets if value < 10)
-                    # Target Data: EUR PSM
-                    # Conversion Factors:
-                    # 1. Unit: 1 sq m = 10.764 sq ft. So Price PSM = Price PSF * 10.764
-                    # 2. Currency: 1 GBP = 1.2 EUR (Approx)
-                    
-                    raw_currency = asset.get('currency', 'GBP')
-                    display_currency = "EUR"
-                    conversion_note = ""
-                    
-                    # Calculate weighted average rent for display
-                    total_rent = 0
-                    total_area = 0
-                    
-                    for lease in leases:
-                        raw_rent = lease.get('rent_psm_pa', 0) # In JSON this is actually PSF if it's ~5.5
-                        area = lease.get('area_m2', 0)
-                        
-                        # Conversion Logic
-                        if raw_currency == "GBP" and raw_rent < 20: # Heuristic check for PSF
-                            # Convert GBP PSF -> EUR PSM
-                            rent_eur_psm = raw_rent * 10.764 * 1.2
-                            conversion_note = f"(Converted from £{raw_rent} PSF to €{rent_eur_psm:.2f} PSM)"
-                        else:
-                            rent_eur_psm = raw_rent # Assume already EUR PSM or close enough
-                            
-                        total_rent += rent_eur_psm * area
-                        total_area += area
-                        
-                        # Update lease info for text blob (optional, but good for detail)
-                        lease['display_rent_eur_psm'] = round(rent_eur_psm, 2)
-
-                    avg_rent_eur_psm = round(total_rent / total_area, 2) if total_area > 0 else 0
-
-                    text_blob = f"""
-                    Asset Name: {asset.get('name', 'Unknown')}
-                    Type: {asset.get('asset_type', 'Logistics')} ({asset.get('tenure', '')})
-                    Location: {asset.get('address', '')}, {asset.get('city', '')}, {asset.get('country', '')}
-                    Size: {logistics.get('area_m2', 0)} sqm
-                    Specs: {logistics.get('eaves_height_m', 0)}m height, {logistics.get('dock_doors', 0)} docks
-                    Tenants: {', '.join(tenant_names)}
-                    Current Rent (Normalized): €{avg_rent_eur_psm} /sqm/year
-                    Currency Basis: Converted to EUR PSM for comparison. {conversion_note}
-                    """
-                    asset_texts.append(text_blob.strip())
-                    asset_metadatas.append({
-                        "source": json_files[0],
-                        "deal_id": deal_id,
-                        "record_type": "internal_asset",
-                        "chunk_index": idx,
-                        "city": asset.get('city', 'Unknown'),
-                        "asset_name": asset.get('name', 'Unknown')
-                    })
-
-                if asset_texts:
-                    # Ingest into "deal" Namespace (Private Context)
-                    print(f"Ingesting {len(asset_texts)} assets into 'deal' namespace...")
-                    ingest_deal_assets(asset_texts, asset_metadatas, namespace="deal")
-                
-                # --- 2. Process Comps (Market) -> Namespace: market_comps ---
-                comps = structured_data.get("comps", [])
-                comp_texts = []
-                comp_metadatas = []
-                
-                for idx, comp in enumerate(comps):
-                    text_blob = f"""
-                    Comparable Asset: {comp.get('name', 'Unknown')}
-                    Type: {comp.get('asset_type', 'Logistics')}
-                    Size: {comp.get('size_m2', 0)} sqm
-                    Rent: {comp.get('rent_psm_pa', 0)} /sqm
-                    Yield: {comp.get('yield', 'N/A')}
-                    Date: {comp.get('acquisition_date', '')}
-                    Notes: {comp.get('notes', '')}
-                    """
-                    comp_texts.append(text_blob.strip())
-                    comp_metadatas.append({
-                        "source": json_files[0],
-                        "deal_id": deal_id, 
-                        "record_type": "market_comp",
-                        "chunk_index": idx,
-                        "city": "Unknown",
-                        "name": comp.get('name', 'Unknown'),
-                        "size_m2": comp.get('size_m2', 0),
-                        "yield": comp.get('yield', 0),
-                        "rent_psm_pa": comp.get('rent_psm_pa', 0),
-                        "distance_km": comp.get('distance_km', 0)
-                    })
-                
-                if comp_texts:
-                    # Ingest into "market_comps" Namespace (Public Knowledge Base)
-                    print(f"Ingesting {len(comp_texts)} comps into 'market_comps' namespace...")
-                    ingest_deal_assets(comp_texts, comp_metadatas, namespace="market_comps")
-
-            except Exception as e:
-                print(f"Error reading JSON or Ingesting to Vector DB: {e}")
-                return {
-                    "messages": [AIMessage(content=f"Error processing JSON/Vector DB: {e}", name="system_log")]
-                }
+    return {
+        "messages": [AIMessage(content=msg, name="system_log")],
+        "extracted_data": {
+            "source_json": structured_data if loaded else {},
+            "portfolio_columns": columns,
+            "portfolio_counts": totals,
+        }
+    }
 
-    msg = f"Loaded structured data from {json_files[0]}" if json_files else "No structured JSON found."
-    
+def compute_deal_metrics(state: DealState):
+    """
+    Step 2b: Compute Deal Metrics
+    Deterministic GLA, occupancy, WALT and in-place rent from the lease arrays.
+    Runs alongside PDF parsing; needs only the structured data.
+    """
+    print("--- Node: Compute Deal Metrics ---")
+    extracted = state.get("extracted_data", {})
+    source_json = extracted.get("source_json", {})
+    if not source_json:
+        return {"messages": [AIMessage(content="No structured data for deal metrics.", name="system_log")]}
+
+    # The columnar tables cover every streamed asset, source_json only the first JSON_STATE_MAX_RECORDS
+    columns = extracted.get("portfolio_columns")
+    metrics = compute_column_metrics(columns) if columns else compute_lease_metrics(source_json)
+    msg = (f"Computed metrics for {metrics['asset_count']} asset(s): {metrics['total_gla_m2']:,.0f} sqm GLA, "
+           f"{metrics['occupancy']:.1%} occupancy, WALT {metrics['walt_years']:.1f} years.")
     return {
         "messages": [AIMessage(content=msg, name="system_log")],
-        "extracted_data": {"source_json": structured_data}
+        "extracted_data": {"metrics": metrics}
     }
 
 def load_pdf_documents(state: DealState):
@@ -189,46 +366,154 @@ def load_pdf_documents(state: DealState):
     """
     print("--- Node: Load PDF Documents ---")
     
-    base_dir = os.getcwd()
-    if "backend" in base_dir:
-        if base_dir.endswith("backend"):
-             data_root = os.path.join(base_dir, "data")
-        else:
-             current_file_dir = os.path.dirname(os.path.abspath(__file__))
-             backend_dir = os.path.dirname(os.path.dirname(current_file_dir))
-             data_root = os.path.join(backend_dir, "data")
-    else:
-        data_root = os.path.join(base_dir, "backend", "data")
-        
+    data_root = _data_root()
     pdf_dir = os.path.join(data_root, "raw_pdfs")
     pdf_texts = []
     pdf_files = []
-    
+    failed = []
+    pdf_chunks = []
+    tenancy_schedule = []
+    pdf_financials = {}
+    deal_id = state.get("current_deal_id", "unknown_deal")
+    # Every PDF still feeds the prompt (unchanged files come from the parse cache);
+    # the manifest records which files are new and whether they parsed
+    diff = _diff_manifest(deal_id, data_root, "raw_pdfs", ".pdf")
+
     if os.path.exists(pdf_dir):
-        pdf_files = [f for f in os.listdir(pdf_dir) if f.endswith('.pdf')]
-        for pdf_file in pdf_files:
-            try:
-                full_path = os.path.join(pdf_dir, pdf_file)
-                # Send a log for each file being parsed (optional, or just one summary log)
-                # Since we can't stream partial updates easily within a node without custom callback, 
-                # we'll just do the work and return the result.
-                text = parse_pdf_document.invoke(full_path)
-                pdf_texts.append(f"--- Document: {pdf_file} ---\n{text[:10000]}...\n")
-            except Exception as e:
-                print(f"Error reading PDF {pdf_file}: {e}")
+        pdf_files = sorted(f for f in os.listdir(pdf_dir) if f.endswith('.pdf'))
 
-    msg = f"Parsed {len(pdf_files)} PDF documents: {', '.join(pdf_files)}"
-    
-    # Merge with existing extracted_data
-    existing_data = state.get("extracted_data", {})
-    existing_data["pdf_texts"] = pdf_texts
-    existing_data["pdf_files"] = pdf_files
+        def report_progress(done, total, result):
+            if result["error"]:
+                status = f"failed ({result['error']})"
+            else:
+                status = "cache hit" if result["cached"] else f"{result['seconds']}s"
+            print(f"[{done}/{total}] Parsed {result['file']}: {status}")
+
+        # pdfminer is CPU-bound pure Python, so fan out across processes.
+        # Whole documents: align_with_llm selects excerpts from every page under its token
+        # budget, and the full parse is cached for embed_pdf_documents anyway
+        results = parse_pdfs_parallel(
+            [os.path.join(pdf_dir, f) for f in pdf_files],
+            on_result=report_progress,
+            page_numbers=parse_page_ranges(Config.PDF_PAGE_RANGES),
+            table_pages=Config.PDF_TABLE_PAGES,
+        )
+        for result in results:
+            if result["error"]:
+                print(f"Error reading PDF {result['file']}: {result['error']}")
+                failed.append(result["file"])
+                continue
+            pages = [strip_table_text(page, result["tables"]) for page in result["pages"]]
+            text, cut = join_pages(pages, Config.PDF_CHAR_BUDGET)
+            suffix = "..." if cut else ""
+            pdf_texts.append(f"--- Document: {result['file']} ---\n{text}{suffix}\n")
+            # Section chunks of the whole document let align_with_llm pick the excerpts relevant to each asset
+            pdf_chunks.extend(chunk_document(pages, result["file"], max_chars=Config.PDF_CHUNK_CHARS,
+                                             overlap=0, page_numbers=result["page_numbers"]))
+            # Rent rolls and financial tables become typed records instead of prompt text
+            tenancy_schedule.extend(tenancy_records(result["tables"], source=result["file"]))
+            for field, figure in financial_figures(result["tables"], source=result["file"]).items():
+                pdf_financials.setdefault(field, figure)
+
+    parsed = [f for f in pdf_files if f not in failed]
+    _record_stage(deal_id, [f"raw_pdfs/{f}" for f in parsed], "parse")
+    _record_stage(deal_id, [f"raw_pdfs/{f}" for f in failed], "parse", ok=False)
+    msg = f"Parsed {len(parsed)} PDF documents: {', '.join(parsed)}"
+    if diff:
+        msg += f" (manifest: {summarize_diff(diff)})"
+    if failed:
+        msg += f"\nCould not parse {len(failed)} document(s): {', '.join(failed)}"
+    if tenancy_schedule or pdf_financials:
+        msg += f"\nExtracted {len(tenancy_schedule)} tenancy rows and {len(pdf_financials)} financial figures from tables."
+
+    # Only this branch's keys: the extracted_data reducer merges them with the JSON branch
+    pdf_data = {"pdf_texts": pdf_texts, "pdf_files": pdf_files, "pdf_chunks": pdf_chunks}
+    if tenancy_schedule:
+        pdf_data["tenancy_schedule"] = tenancy_schedule
+    if pdf_financials:
+        pdf_data["pdf_financials"] = pdf_financials
 
     return {
         "messages": [AIMessage(content=msg, name="system_log")],
-        "extracted_data": existing_data
+        "extracted_data": pdf_data
     }
 
+def _embed_pdf_files(deal_id) -> str:
+    """Chunks and embeds new or changed PDFs; returns the summary line."""
+    data_root = _data_root()
+    pdf_dir = os.path.join(data_root, "raw_pdfs")
+    diff = _diff_manifest(deal_id, data_root, "raw_pdfs", ".pdf")
+    removed = _purge_removed(deal_id, diff, ["deal"])
+
+    pdf_files = sorted(f for f in os.listdir(pdf_dir) if f.endswith('.pdf')) if os.path.exists(pdf_dir) else []
+    if diff is not None:
+        # Only new, changed or previously failed files need re-embedding
+        pdf_files = [f for f in pdf_files if needs_stage(diff, f"raw_pdfs/{f}", "embed")]
+    if not pdf_files:
+        msg = "No new or changed PDF documents to embed."
+        if removed:
+            msg += f" Removed vectors of {len(removed)} deleted document(s)."
+        return msg
+
+    # No character budget here: retrieval needs every page, not just the prompt prefix
+    results = parse_pdfs_parallel(
+        [os.path.join(pdf_dir, f) for f in pdf_files],
+        page_numbers=parse_page_ranges(Config.PDF_PAGE_RANGES),
+    )
+
+    totals = {"documents": 0, "chunks": 0, "embedded": 0, "skipped": 0, "deleted": 0}
+    for result in results:
+        rel_path = f"raw_pdfs/{result['file']}"
+        if result["error"]:
+            _record_stage(deal_id, [rel_path], "embed", ok=False)
+            continue
+        chunks = chunk_document(result["pages"], result["file"], max_chars=Config.PDF_CHUNK_CHARS,
+                                overlap=Config.PDF_CHUNK_OVERLAP, page_numbers=result["page_numbers"])
+        try:
+            summary = ingest_document_chunks(result["file"], chunks, {"deal_id": deal_id, "sha256": result["sha256"]})
+        except Exception as e:
+            print(f"Error embedding {result['file']}: {e}")
+            _record_stage(deal_id, [rel_path], "embed", ok=False)
+            continue
+        if "error" in summary:
+            print(f"Skipping PDF embedding: {summary['error']}")
+            return f"PDF embedding skipped: {summary['error']}"
+
+        print(f"Embedded {result['file']}: {len(chunks)} chunks, {summary['embedded']} new, "
+              f"{summary['skipped']} unchanged, {summary['deleted']} removed")
+        _record_stage(deal_id, [rel_path], "embed")
+        totals["documents"] += 1
+        totals["chunks"] += len(chunks)
+        for key in ("embedded", "skipped", "deleted"):
+            totals[key] += summary[key]
+
+    msg = (f"Indexed {totals['documents']} PDF documents into the 'deal' namespace: {totals['chunks']} chunks "
+           f"({totals['embedded']} embedded, {totals['skipped']} unchanged, {totals['deleted']} removed).")
+    if removed:
+        msg += f" Removed vectors of {len(removed)} deleted document(s)."
+    print(msg)
+    return msg
+
+def embed_pdf_documents(state: DealState):
+    """
+    Step 3b: Embed PDF Documents
+    Chunks the full text of each PDF by section and embeds new chunks into the
+    'deal' namespace, so chat Q&A can retrieve from the whole document.
+    Runs as a background job unless BACKGROUND_EMBEDDING is off.
+    """
+    print("--- Node: Embed PDF Documents ---")
+
+    if not Config.PDF_EMBED_DOCUMENTS:
+        return {"messages": [AIMessage(content="PDF embedding disabled.", name="system_log")]}
+
+    deal_id = state.get("current_deal_id", "unknown_deal")
+    if not Config.BACKGROUND_EMBEDDING:
+        return {"messages": [AIMessage(content=_embed_pdf_files(deal_id), name="system_log")]}
+
+    submit_background(f"embed:{deal_id}:raw_pdfs", _embed_pdf_files, deal_id)
+    msg = "Indexing PDF documents into the 'deal' namespace in the background."
+    return {"messages": [AIMessage(content=msg, name="system_log")]}
+
 def align_with_llm(state: DealState):
     """
     Step 4: Align with LLM
@@ -240,6 +525,9 @@ def align_with_llm(state: DealState):
     structured_data = extracted.get("source_json", {})
     pdf_texts = extracted.get("pdf_texts", [])
     pdf_files = extracted.get("pdf_files", [])
+    pdf_chunks = extracted.get("pdf_chunks", [])
+    tenancy_schedule = extracted.get("tenancy_schedule", [])
+    pdf_financials = extracted.get("pdf_financials", {})
 
     if not structured_data and not pdf_texts:
         return {
@@ -249,25 +537,55 @@ def align_with_llm(state: DealState):
             ]
         }
 
+    budget = Config.ALIGN_PROMPT_TOKENS
+
+    # Figures already read from PDF tables are passed as data, not re-extracted from text
+    tables_section = ""
+    if tenancy_schedule or pdf_financials:
+        figures = {k: v.get("text") for k, v in pdf_financials.items()}
+        tenancy_json, rows = fit_json_records(tenancy_schedule, budget // 4)
+        shown = f" ({rows} of {len(tenancy_schedule)} rows)" if rows < len(tenancy_schedule) else ""
+        tables_section = f"""
+    3. **Extracted Tables (authoritative, parsed from the PDF layout)**:
+    Tenancy schedule{shown}: {tenancy_json}
+    Financial figures: {compact_json(figures)}
+"""
+        financials_task = "- 'financials': Use the extracted tables above for NOI, ERV, Cap Rate and tenancy figures; do not re-derive them from the text."
+    else:
+        financials_task = "- 'financials': Extract NOI, ERV, Cap Rate if available."
+
+    assets = structured_data.get("assets", []) or []
+    if len(assets) >= Config.ALIGN_MAP_REDUCE_MIN_ASSETS:
+        return _align_map_reduce(assets, pdf_chunks, tables_section, financials_task)
+
     llm = ChatOpenAI(model="gpt-4o", temperature=0.2)
 
+    # Whole JSON records and the PDF excerpts most relevant to each asset, within the token budget
+    context = build_alignment_context(structured_data, pdf_chunks, budget - count_tokens(tables_section),
+                                      task_query=ALIGN_TASK_TERMS)
+    print(f"Alignment context: {context['tokens']} tokens ({context['assets_included']}/{context['assets_total']} assets, "
+          f"{context['chunks_included']}/{context['chunks_total']} PDF excerpts)")
+    assets_note = ""
+    if context["assets_included"] < context["assets_total"]:
+        assets_note = f" ({context['assets_included']} of {context['assets_total']} assets shown)"
+
     prompt = f"""
     You are an expert Real Estate Investment Analyst.
 
     I have two data sources:
-    1. **Structured Data (JSON)**: This is the source of truth for IDs and basic specs.
-    {json.dumps(structured_data, indent=2)[:5000]} 
-
-    2. **Unstructured Data (PDF Content)**:
-    {"".join(pdf_texts)}
+    1. **Structured Data (JSON)**: This is the source of truth for IDs and basic specs{assets_note}.
+    {context["json"]}
 
+    2. **Unstructured Data (PDF excerpts, most relevant to each asset)**:
+    {context["documents"]}
+    {tables_section}
     **Your Task:**
     1. **Align**: Match the assets in the JSON with the descriptions in the PDF. Use Address or Property Name as the key.
     2. **Extract & Enrich**: For each matched asset, extract the following from the PDF and add it to the data:
        - 'market_highlights': Key selling points of the location.
        - 'investment_rationale': Why is this a good deal?
        - 'risk_factors': Any mentioned risks.
-       - 'financials': Extract NOI, ERV, Cap Rate if available.
+       {financials_task}
        - 'physical_specs': Extract Clear Height, Floor Loading, Dock Doors if available.
     3. **Verify**: Check if the GLA (Gross Leasable Area) and Occupancy in the JSON match the PDF. If different, create a 'discrepancies' field.
 
@@ -280,23 +598,121 @@ def align_with_llm(state: DealState):
 
     response = llm.invoke([HumanMessage(content=prompt)])
 
-    status_msg = "I’ve ingested the IM, rent roll and structured deal data.\n\nI’ll generate the summary, key metrics, and an initial set of comparables."
-    
-    # Update extracted data with analysis
-    extracted["analysis"] = response.content
+    return {
+        "messages": [
+            AIMessage(content=ALIGN_STATUS_MSG, name="system_log"),
+            AIMessage(content=response.content, name="agent")
+        ],
+        # Merged into extracted_data by its reducer
+        "extracted_data": {"analysis": response.content}
+    }
+
+# --- Map-reduce alignment (multi-asset deals) ---
+
+class AssetAlignment(BaseModel):
+    """Alignment findings for one asset."""
+    asset_name: str = Field(..., description="Name of the asset as given in the structured data")
+    matched_documents: List[str] = Field(default_factory=list, description="PDF documents that describe this asset")
+    market_highlights: List[str] = Field(default_factory=list, description="Key selling points of the location")
+    investment_rationale: List[str] = Field(default_factory=list, description="Why this is a good deal")
+    risk_factors: List[str] = Field(default_factory=list, description="Risks mentioned in the documents")
+    financials: str = Field("", description="NOI, ERV, Cap Rate if stated; empty if not")
+    physical_specs: str = Field("", description="Clear height, floor loading, dock doors if stated")
+    discrepancies: List[str] = Field(default_factory=list, description="GLA/occupancy differences between the JSON and the PDF, in plain language")
+
+_align_rate_limiter = None
+
+def _get_align_rate_limiter() -> InMemoryRateLimiter:
+    """One limiter per process, so concurrent ingestions share the request budget."""
+    global _align_rate_limiter
+    if _align_rate_limiter is None:
+        _align_rate_limiter = InMemoryRateLimiter(
+            requests_per_second=Config.ALIGN_REQUESTS_PER_SECOND,
+            max_bucket_size=Config.ALIGN_MAX_CONCURRENCY,
+        )
+    return _align_rate_limiter
+
+def _align_map_reduce(assets, pdf_chunks, tables_section: str, financials_task: str):
+    """
+    Map: one structured-output call per asset over the PDF excerpts retrieved for it,
+    sent concurrently under the rate limiter. Reduce: one call that writes the
+    portfolio summary from the per-asset findings.
+    """
+    llm = ChatOpenAI(model="gpt-4o", temperature=0.2, rate_limiter=_get_align_rate_limiter())
+
+    # Tokenize the excerpts once for all assets. Each asset gets only its own best-matching
+    # chunks: no task-term query and no document-order filler, which would pad every prompt alike
+    chunk_index = index_chunks(pdf_chunks)
+    prompts = []
+    for asset in assets:
+        context = build_alignment_context({"assets": [asset]}, pdf_chunks, Config.ALIGN_ASSET_PROMPT_TOKENS,
+                                          fill=False, top_k=Config.ALIGN_ASSET_TOP_CHUNKS, chunk_index=chunk_index)
+        prompts.append([HumanMessage(content=f"""
+    You are an expert Real Estate Investment Analyst. Align one asset with the PDF excerpts retrieved for it.
+
+    **Asset (structured data, source of truth for IDs and basic specs)**:
+    {context["json"]}
+
+    **PDF excerpts**:
+    {context["documents"] or "No excerpts matched this asset."}
+
+    Extract only what the excerpts state about this asset: market highlights, investment rationale,
+    risk factors, financials (NOI, ERV, Cap Rate), physical specs (clear height, floor loading, dock doors).
+    Compare GLA and occupancy with the structured data and describe any discrepancy in plain language.
+    Leave a field empty rather than guessing.
+    """)])
+
+    print(f"Aligning {len(assets)} assets (max {Config.ALIGN_MAX_CONCURRENCY} concurrent calls)...")
+    results = llm.with_structured_output(AssetAlignment).batch(
+        prompts, config={"max_concurrency": Config.ALIGN_MAX_CONCURRENCY}, return_exceptions=True
+    )
+
+    findings, failed = [], []
+    for asset, result in zip(assets, results):
+        if isinstance(result, Exception) or result is None:
+            print(f"Alignment failed for {asset.get('name', 'Unknown')}: {result}")
+            failed.append(asset.get("name", "Unknown"))
+            continue
+        # Key findings by the record's own name, whatever the model echoed back
+        findings.append({**result.model_dump(), "asset_name": asset.get("name", "Unknown")})
+
+    # --- Reduce ---
+    non_empty = [{k: v for k, v in finding.items() if v} for finding in findings]
+    findings_json, included = fit_json_records(non_empty, Config.ALIGN_PROMPT_TOKENS - count_tokens(tables_section))
+    omitted = f" ({included} of {len(findings)} assets shown)" if included < len(findings) else ""
+    failed_note = f"\n    Alignment could not be completed for: {', '.join(failed)}." if failed else ""
+    prompt = f"""
+    You are an expert Real Estate Investment Analyst.
+
+    1. **Per-asset alignment findings** for a {len(assets)}-asset portfolio{omitted}:
+    {findings_json}{failed_note}
+    {tables_section}
+    **Your Task:**
+    Merge the findings into one portfolio view: market highlights, investment rationale and risk factors
+    (portfolio-wide first, then notable assets), physical specs, and discrepancies.
+    {financials_task}
+
+    **Output Requirements:**
+    - Return a professional summary of the aligned deal data.
+    - **Do NOT use placeholders** like "[Insert value]". If a value is missing, state "Not specified" or omit the line.
+    - **Discrepancies**: Describe them clearly in natural language, naming the asset. Do not use technical formats like "JSON - X, PDF - Y".
+    - Ensure the tone is suitable for an Investment Committee memo.
+    """
+    response = llm.invoke([HumanMessage(content=prompt)])
 
     return {
         "messages": [
-            AIMessage(content=status_msg, name="system_log"),
+            AIMessage(content=ALIGN_STATUS_MSG, name="system_log"),
             AIMessage(content=response.content, name="agent")
         ],
-        "extracted_data": extracted
+        "extracted_data": {"analysis": response.content, "asset_alignment": findings}
     }
 
 def compute_metrics_and_draft_summary(state: DealState):
     """
     Step 5: Compute Metrics and Draft Summary
-    Reads initial data and computes preliminary summaries.
+    Computes GLA, occupancy, WALT and in-place rent from the lease arrays and
+    renders the deal summary; the LLM only drafts the highlights.
     """
     print("--- Node: Compute Metrics and Draft Summary ---")
 
@@ -307,122 +723,69 @@ def compute_metrics_and_draft_summary(state: DealState):
     if not source_json and not analysis_text:
         return {"messages": [AIMessage(content="No data available to compute metrics.", name="agent")]}
 
-    # Use LLM to synthesize metrics from the ingested data
-    llm = ChatOpenAI(model="gpt-4o", temperature=0.2)
+    # --- Deterministic metrics from the lease arrays (computed during ingestion when possible) ---
+    metrics = extracted.get("metrics")
+    if not metrics:
+        columns = extracted.get("portfolio_columns")
+        metrics = compute_column_metrics(columns) if columns else compute_lease_metrics(source_json)
+    extracted = {**extracted, "metrics": metrics}
 
-    prompt = f"""
-    You are a Real Estate Analyst. 
-    Based on the provided structured data and the analysis from the ingestion step, generate a concise "Metrics Summary".
+    # LLM only drafts the qualitative highlights; the numbers above are not its job
+    highlights = []
+    try:
+        llm = ChatOpenAI(model="gpt-4o", temperature=0.2)
+
+        prompt = f"""
+    You are a Real Estate Analyst.
+    Write exactly two concise key highlights (one sentence each) for an Investment Committee deal summary.
 
-    **Source Data (JSON):**
-    {json.dumps(source_json, indent=2)[:2000]}
+    **Computed Metrics (authoritative, do not restate or change them):**
+    {format_metrics_summary(metrics)}
 
     **Preliminary Analysis:**
     {analysis_text}
 
-    **Task:**
-    Compute or extract the following key metrics. Keep it brief (bullet points).
-
-    **Output Format:**
-    ### Compute Metrics and Deal Summary
-    - **Total GLA**: [Value]
-    - **Occupancy**: [Value]
-    - **WALT**: [Value]
-    - **In-Place Rent**: [Value]
-    - **Key Highlight 1**: [Brief text]
-    - **Key Highlight 2**: [Brief text]
+    Return the two highlights on separate lines, with no numbering, bullets or headings.
     """
 
-    response = llm.invoke([HumanMessage(content=prompt)])
-    content = response.content
+        response = llm.invoke([HumanMessage(content=prompt)])
+        highlights = [line.strip("-•* ").strip() for line in response.content.splitlines() if line.strip()][:2]
+    except Exception as e:
+        print(f"Highlight drafting failed: {e}")
+
+    content = format_metrics_summary(metrics, highlights)
 
-    # --- Generate PPT ---
+    # --- Generate PPT + PDF from the Deal Summary spec ---
     ppt_link_msg = ""
     try:
         # Paths
         current_dir = os.path.dirname(os.path.abspath(__file__))
         backend_dir = os.path.dirname(os.path.dirname(current_dir))
         # Use the specific Deal Summary template
-        template_path = os.path.join(backend_dir, "data", "templates", "deal_summary_template.pptx")
+        template_path = os.path.join(backend_dir, "data", "templates", DEAL_SUMMARY.template)
         output_dir = os.path.join(backend_dir, "data", "generated")
         os.makedirs(output_dir, exist_ok=True)
 
-        # Load Template
-        if os.path.exists(template_path):
-            try:
-                prs = Presentation(template_path)
-            except:
-                prs = Presentation()
-        else:
-            prs = Presentation()
-            # Fallback layout
-            slide = prs.slides.add_slide(prs.slide_layouts[0])
-            slide.shapes.title.text = "{{DEAL_NAME}}"
-            if len(slide.placeholders) > 1:
-                slide.placeholders[1].text = "{{DATE}}"
-            
-            if len(prs.slide_layouts) > 1:
-                slide_layout = prs.slide_layouts[1]
-            else:
-                slide_layout = prs.slide_layouts[0]
-            slide = prs.slides.add_slide(slide_layout)
-            slide.shapes.title.text = "Executive Summary"
-            if len(slide.placeholders) > 1:
-                slide.placeholders[1].text = "{{SUMMARY_BULLETS}}"
-
-        # Replacements
-        replacements = {
-            "{{DEAL_NAME}}": state.get("company_name", "Project Deal") or "Project Deal",
-            "{{DATE}}": datetime.now().strftime("%Y-%m-%d"),
-            "{{SUMMARY_BULLETS}}": content,
-            # Deal Summary might not have these yet, but we keep them for safety
-            "{{MARKET_BULLETS}}": "Pending Market Analysis...",
-            "{{ENTRY_YIELD}}": "TBD",
-            "{{IRR}}": "TBD",
-            "{{MOIC}}": "TBD"
+        values = {
+            "date": datetime.now().strftime("%Y-%m-%d"),
+            "summary_bullets": "\n".join(f"• {h}" for h in highlights) or "Highlights not available.",
         }
-
-        # Helper to replace text
-        def replace_text(text_frame, replacements):
-            for paragraph in text_frame.paragraphs:
-                full_text = paragraph.text
-                original_text = full_text
-                for key, val in replacements.items():
-                    if key in full_text:
-                        full_text = full_text.replace(key, str(val))
-                if full_text != original_text:
-                    paragraph.text = full_text
-
-        for slide in prs.slides:
-            for shape in slide.shapes:
-                if shape.has_text_frame:
-                    replace_text(shape.text_frame, replacements)
-                if shape.has_table:
-                    for row in shape.table.rows:
-                        for cell in row.cells:
-                            if cell.text_frame:
-                                replace_text(cell.text_frame, replacements)
-
-        # Save locally
-        ppt_filename = f"Deal_Summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pptx"
-        output_path = os.path.join(output_dir, ppt_filename)
+        basename = f"Deal_Summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        context = {**state, "extracted_data": extracted, "values": values}
+        result = save_deck_artifacts(DEAL_SUMMARY, context, template_path, output_dir, basename)
         
-        prs.save(output_path)
-        
-        # Upload to S3
-        s3_link = upload_to_s3_and_get_link(output_path)
-        
-        # Remove local
-        if s3_link and os.path.exists(output_path):
-            os.remove(output_path)
-        
-        if s3_link:
-            ppt_link_msg = f"\n\n\n📥 **[Download Deal Summary]({s3_link})**"
+        if result["url"]:
+            ppt_link_msg = f"\n\n\n📥 **[Download Deal Summary]({result['url']})**"
+            if result["pdf_url"]:
+                ppt_link_msg += f"\n\n📄 **[Download Deal Summary (PDF)]({result['pdf_url']})**"
         else:
-            ppt_link_msg = f"\n\n(PPT generated locally at {output_path}, but S3 upload failed - check AWS credentials)"
+            ppt_link_msg = f"\n\n(PPT generated locally at {result['output_path']}, but S3 upload failed - check AWS credentials)"
             
     except Exception as e:
         print(f"PPT Generation Error: {e}")
         ppt_link_msg = f"\n\n(Error generating PPT: {e})"
 
-    return {"messages": [AIMessage(content=content + ppt_link_msg, name="agent")]}
+    return {
+        "messages": [AIMessage(content=content + ppt_link_msg, name="agent")],
+        "extracted_data": extracted
+    }
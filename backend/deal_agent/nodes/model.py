@@ -155,26 +155,15 @@ def calculate_simple_metrics(inputs: dict):
     return {
         "irr": irr,
         "equity_multiple": equity_multiple,
-        "yield_on_cost": yield_on_cost
+        "yield_on_cost": yield_on_cost,
+        "cash_flows": [round(cf, 2) for cf in stream] # Year 0 equity outlay, then years 1-10 (incl. exit)
     }
 
-def build_model(state: DealState):
+def get_excel_inputs(inputs: dict) -> dict:
     """
-    Step 10: Build Model
-    Calculates IRR, Multiple, YOC, etc., using current assumptions and leases.
+    Maps normalized model inputs to the named ranges in the Excel template.
     """
-    print("--- Node: Build Model (UPDATED v2) ---", flush=True)
-    
-    # Prepare data for Excel
-    # Mapping state keys to named ranges
-    # We use safe defaults if keys are missing
-    assumptions = state.get("financial_assumptions", {})
-    print(f"DEBUG: Assumptions used: {assumptions}")
-    
-    # Use centralized logic to get inputs
-    inputs = get_model_inputs(assumptions)
-    
-    excel_inputs = {
+    return {
         "Market_Rent": inputs["market_rent"],
         "Area": inputs["area"],
         "Exit_Yield": inputs["exit_yield"],
@@ -185,11 +174,18 @@ def build_model(state: DealState):
         "OpEx_Ratio": inputs["opex_ratio"],
         "Capex": inputs["capex"]
     }
-    
-    # --- Calculate Metrics Dynamically ---
-    metrics = calculate_simple_metrics(inputs)
-    print(f"DEBUG: Metrics calculated: {metrics}")
-    
+
+def export_financial_model(state: DealState, s3_object_name: str, include_rent_roll: bool = True):
+    """
+    Renders the Excel template with the current assumptions and uploads it to S3.
+
+    Returns:
+        (artifact dict for `artifact_links`, log detail string)
+    """
+    # Use centralized logic to get inputs
+    inputs = get_model_inputs(state.get("financial_assumptions", {}))
+    excel_inputs = get_excel_inputs(inputs)
+
     # Define template path
     # Use path relative to this file to ensure it works regardless of CWD
     # model.py is in backend/deal_agent/nodes/
@@ -199,16 +195,19 @@ def build_model(state: DealState):
     template_path = os.path.join(backend_dir, "data", "templates", "financial_model_template.xlsx")
     
     print(f"DEBUG: Looking for template at: {template_path}")
+
+    artifact = {"label": "Download Financial_Model", "url": None, "note": None}
+    if not os.path.exists(template_path):
+        artifact["note"] = "(Financial model skipped: template not found)"
+        return artifact, "(Skipped: Template not found)"
+
+    # 1. Fill Named Ranges
+    # fill_excel_named_ranges is a StructuredTool, so we must use .invoke()
+    result = fill_excel_named_ranges.invoke({"file_path": template_path, "data": excel_inputs})
+    log_detail = f"(Result: {result})"
     
-    # Execute Excel update if template exists
-    download_link = ""
-    if os.path.exists(template_path):
-        # 1. Fill Named Ranges
-        # fill_excel_named_ranges is a StructuredTool, so we must use .invoke()
-        result = fill_excel_named_ranges.invoke({"file_path": template_path, "data": excel_inputs})
-        log_detail = f"(Result: {result})"
-        
-        # 2. Fill Rent Roll (if data exists)
+    # 2. Fill Rent Roll (if data exists)
+    if include_rent_roll:
         extracted = state.get("extracted_data", {})
         # Try to find tenancy data in various places
         tenancy_data = extracted.get("tenancy_schedule", [])
@@ -225,55 +224,67 @@ def build_model(state: DealState):
                 {"name": "Global Supply Chain", "unit": "Unit 3", "area": 2000, "lease_start": "2022-01-01", "lease_end": "2027-12-31", "annual_rent": 160000, "rent_psm": 80},
             ]
              
-        if tenancy_data:
-            # Format data for Excel: List of Lists
-            # Headers: ["Tenant Name", "Unit", "Area (sqm)", "Lease Start", "Lease End", "Annual Rent (EUR)", "Rent/sqm/yr"]
-            rr_rows = []
-            for t in tenancy_data:
-                row = [
-                    t.get("name", "Unknown"),
-                    t.get("unit", ""),
-                    t.get("area", 0),
-                    t.get("lease_start", ""),
-                    t.get("lease_end", ""),
-                    t.get("annual_rent", 0),
-                    t.get("rent_psm", 0)
-                ]
-                rr_rows.append(row)
-            
-            if rr_rows:
-                rr_result = write_list_to_excel.invoke({
-                    "file_path": template_path, 
-                    "sheet_name": "Rent Roll", 
-                    "data": rr_rows
-                })
-                log_detail += f" | Rent Roll: {rr_result}"
+        # Format data for Excel: List of Lists
+        # Headers: ["Tenant Name", "Unit", "Area (sqm)", "Lease Start", "Lease End", "Annual Rent (EUR)", "Rent/sqm/yr"]
+        rr_rows = []
+        for t in tenancy_data:
+            row = [
+                t.get("name", "Unknown"),
+                t.get("unit", ""),
+                t.get("area", 0),
+                t.get("lease_start", ""),
+                t.get("lease_end", ""),
+                t.get("annual_rent", 0),
+                t.get("rent_psm", 0)
+            ]
+            rr_rows.append(row)
         
-        # Upload to S3
-        try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            # Use deal_id if available, else 'temp'
-            deal_id = state.get("deal_id", "temp")
-            s3_object_name = f"financial_models/Financial_Model_{timestamp}.xlsx"
-            
-            s3_url = upload_to_s3_and_get_link(template_path, s3_object_name)
-            
-            if s3_url:
-                download_link = f"📥 **[Download Financial_Model]({s3_url})**"
-            else:
-                download_link = "(Upload to S3 failed. Please check AWS credentials.)"
-        except Exception as e:
-            print(f"Error uploading to S3: {e}")
-            download_link = f"(Error uploading to S3: {e})"
-    else:
-        log_detail = "(Skipped: Template not found)"
+        if rr_rows:
+            rr_result = write_list_to_excel.invoke({
+                "file_path": template_path, 
+                "sheet_name": "Rent Roll", 
+                "data": rr_rows
+            })
+            log_detail += f" | Rent Roll: {rr_result}"
+    
+    # Upload to S3
+    try:
+        s3_url = upload_to_s3_and_get_link(template_path, s3_object_name)
+        
+        if s3_url:
+            artifact["url"] = s3_url
+        else:
+            artifact["note"] = "(Upload to S3 failed. Please check AWS credentials.)"
+    except Exception as e:
+        print(f"Error uploading to S3: {e}")
+        artifact["note"] = f"(Error uploading to S3: {e})"
+
+    return artifact, log_detail
+
+def build_model(state: DealState):
+    """
+    Step 10: Build Model
+    Calculates IRR, Multiple, YOC, etc., using current assumptions and leases.
+    Artifacts (Excel export, deck) are rendered by the parallel branches that follow.
+    """
+    print("--- Node: Build Model (UPDATED v2) ---", flush=True)
+    
+    # We use safe defaults if keys are missing
+    assumptions = state.get("financial_assumptions", {})
+    print(f"DEBUG: Assumptions used: {assumptions}")
+    
+    # Use centralized logic to get inputs
+    inputs = get_model_inputs(assumptions)
+    
+    # --- Calculate Metrics Dynamically ---
+    metrics = calculate_simple_metrics(inputs)
+    print(f"DEBUG: Metrics calculated: {metrics}")
     
     # Status update simulating system actions
     status_content = (
         "System Processing:\n"
-        f"- Fills named ranges in the Excel template {log_detail}\n"
-        "- Uploads model to secure cloud storage\n"
-        "- Runs the model and computes IRR, equity multiple, YoC, etc."
+        "- Runs the model and computes IRR, equity multiple, YoC, etc.\n"
+        "- Renders the Excel model and IC deck in parallel"
     )
     
     # Format metrics for display
@@ -298,7 +309,6 @@ def build_model(state: DealState):
         f"- 10-year leveraged IRR: {irr_display}\n"
         f"- Equity multiple: {em_display}\n"
         f"- Yield on cost at stabilisation: {yoc_display}\n\n"
-        f"{download_link}\n\n"
     )
     
     return {
@@ -310,10 +320,26 @@ def build_model(state: DealState):
             "irr": metrics['irr'], 
             "equity_multiple": metrics['equity_multiple'],
             "yield_on_cost": metrics['yield_on_cost'],
+            "cash_flows": metrics['cash_flows'],
             "status": "built"
         }
     }
 
+def export_model_excel(state: DealState):
+    """
+    Step 10a: Export Model (parallel artifact branch)
+    Fills the Excel template and uploads it to S3.
+    """
+    print("--- Node: Export Model Excel ---")
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    s3_object_name = f"financial_models/Financial_Model_{timestamp}.xlsx"
+
+    artifact, log_detail = export_financial_model(state, s3_object_name)
+
+    return {
+        "messages": [AIMessage(content=f"- Fills named ranges in the Excel template {log_detail}", name="system_log")],
+        "artifact_links": {"model": artifact}
+    }
+
 def model_node(state: DealState):
     pass
-
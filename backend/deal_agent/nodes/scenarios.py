@@ -1,8 +1,6 @@
 from langchain_core.messages import AIMessage
 from deal_agent.state import DealState
-from deal_agent.nodes.model import get_model_inputs, calculate_simple_metrics
-from deal_agent.tools.excel_engine import fill_excel_named_ranges, write_list_to_excel
-from deal_agent.tools.s3_utils import upload_to_s3_and_get_link
+from deal_agent.nodes.model import get_model_inputs, calculate_simple_metrics, export_financial_model
 import os
 import time
 from datetime import datetime
@@ -246,45 +244,6 @@ def rebuild_model_for_scenario(state: DealState):
     else:
         insight = "📉 **Impact**: Moderate impact on returns, but the project remains viable."
 
-    # --- Generate Excel Model for Scenario ---
-    download_link = ""
-    try:
-        # Prepare inputs for Excel
-        excel_inputs = {
-            "Market_Rent": inputs["market_rent"],
-            "Area": inputs["area"],
-            "Exit_Yield": inputs["exit_yield"],
-            "Rent_Growth": inputs["rent_growth"],
-            "Entry_Yield": inputs["entry_yield"],
-            "LTV": inputs["ltv"],
-            "Interest_Rate": inputs["interest_rate"],
-            "OpEx_Ratio": inputs["opex_ratio"],
-            "Capex": inputs["capex"]
-        }
-        
-        # Locate template
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        backend_dir = os.path.dirname(os.path.dirname(current_dir))
-        template_path = os.path.join(backend_dir, "data", "templates", "financial_model_template.xlsx")
-        
-        if os.path.exists(template_path):
-            # Update Excel with scenario assumptions
-            fill_excel_named_ranges.invoke({"file_path": template_path, "data": excel_inputs})
-            
-            # Upload to S3
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            deal_id = state.get("deal_id", "temp")
-            # Sanitize scenario name for filename
-            safe_scenario_name = "".join([c if c.isalnum() else "_" for c in scenario_name])
-            s3_object_name = f"financial_models/Financial_Model_{safe_scenario_name}_{timestamp}.xlsx"
-            
-            s3_url = upload_to_s3_and_get_link(template_path, s3_object_name)
-            
-            if s3_url:
-                download_link = f"📥 **[Download Financial_Model]({s3_url})**"
-    except Exception as e:
-        print(f"Error generating scenario Excel: {e}")
-
     # 3. Format Response (Professional Structure)
     scenario_irr_pct = f"{scenario_irr*100:.1f}%"
     base_irr_pct = f"{base_irr*100:.1f}%"
@@ -308,7 +267,6 @@ def rebuild_model_for_scenario(state: DealState):
         f"- Equity multiple: {scenario_em_fmt} (vs Base {base_em_fmt}, {em_delta:+.2f}x)\n"
         f"- Yield on cost at stabilisation: {scenario_yoc_pct} (vs Base {base_yoc_pct})\n\n"
         f"The financial model has been rebuilt.\n\n"
-        f"{download_link}\n\n"
         f"{insight}"
     )
     
@@ -318,6 +276,31 @@ def rebuild_model_for_scenario(state: DealState):
         "financial_assumptions": scenario_assumptions
     }
 
+def export_scenario_model(state: DealState):
+    """
+    Step 16a: Export Scenario Model (parallel artifact branch)
+    Fills the Excel template with the scenario assumptions and uploads it to S3.
+    """
+    print("--- Node: Export Scenario Model ---")
+    scenario_name = state.get("current_scenario", "Scenario")
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    # Sanitize scenario name for filename
+    safe_scenario_name = "".join([c if c.isalnum() else "_" for c in scenario_name])
+    s3_object_name = f"financial_models/Financial_Model_{safe_scenario_name}_{timestamp}.xlsx"
+
+    try:
+        # Scenario exports only refresh the named ranges; the rent roll is unchanged
+        artifact, log_detail = export_financial_model(state, s3_object_name, include_rent_roll=False)
+    except Exception as e:
+        print(f"Error generating scenario Excel: {e}")
+        artifact, log_detail = {"label": "Download Financial_Model", "url": None, "note": None}, f"(Error: {e})"
+
+    return {
+        "messages": [AIMessage(content=f"- Fills named ranges in the Excel template {log_detail}", name="system_log")],
+        "artifact_links": {"model": artifact}
+    }
+
 def wait_for_more_scenarios(state: DealState):
     """
     Step 18: Wait for More Scenarios
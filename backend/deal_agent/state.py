@@ -2,6 +2,24 @@ from typing import TypedDict, Annotated, List, Dict, Any, Optional
 from langgraph.graph.message import add_messages
 from langchain_core.messages import BaseMessage
 
+def merge_artifact_links(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reducer for artifact links written by parallel branches.
+    Branches add their own key; returning None clears the links once they are published.
+    """
+    if right is None:
+        return {}
+    return {**(left or {}), **right}
+
+def merge_extracted_data(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reducer for extracted_data, which the parallel ingestion branches write to.
+    Each update is merged key by key; returning None starts a fresh ingestion.
+    """
+    if right is None:
+        return {}
+    return {**(left or {}), **right}
+
 class DealState(TypedDict):
     """
     State definition for the AI Deal Associate.
@@ -17,10 +35,11 @@ class DealState(TypedDict):
     current_process_step: Optional[str]
     
     # Data storage
-    extracted_data: Dict[str, Any]  # From PDF ingestion
+    extracted_data: Annotated[Dict[str, Any], merge_extracted_data]  # From JSON/PDF ingestion
     comps_data: List[Dict[str, Any]] # Comparable companies
     financial_assumptions: Dict[str, Any]
     last_assumption_changes: Optional[str] # Track last changes for UI feedback
     financial_model: Dict[str, Any] # Calculated model results
     deck_content: Dict[str, Any] # Generated deck structure
     scenarios: Dict[str, Any] # Scenario analysis results
+    artifact_links: Annotated[Dict[str, Any], merge_artifact_links] # Download links from the artifact stage
@@ -0,0 +1,74 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+from deal_agent.utils.config import Config
+
+# Shared by all graph runs in this process; work submitted here never blocks a node
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_jobs: Dict[str, Dict[str, Any]] = {}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=Config.BACKGROUND_WORKERS, thread_name_prefix="deal-bg")
+        return _executor
+
+def submit_background(name: str, fn: Callable, *args, **kwargs) -> Future:
+    """
+    Runs fn(*args, **kwargs) on the background pool and tracks it under `name`.
+    If a job with the same name is still running (e.g. a re-ingest of the same
+    file), that future is returned instead of starting a duplicate.
+    """
+    with _executor_lock:
+        job = _jobs.get(name)
+        if job and not job["future"].done():
+            return job["future"]
+
+    def run():
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            print(f"Background job {name} failed: {e}")
+            raise
+        finally:
+            print(f"Background job {name} finished in {time.perf_counter() - started:.1f}s")
+
+    future = _get_executor().submit(run)
+    with _executor_lock:
+        _jobs[name] = {"future": future, "submitted_at": time.time()}
+    return future
+
+def background_status() -> Dict[str, str]:
+    """Maps each tracked job to 'running', 'done' or 'failed'."""
+    status = {}
+    with _executor_lock:
+        jobs = dict(_jobs)
+    for name, job in jobs.items():
+        future = job["future"]
+        if not future.done():
+            status[name] = "running"
+        else:
+            status[name] = "failed" if future.exception() else "done"
+    return status
+
+def wait_for_background(timeout: Optional[float] = None) -> bool:
+    """Blocks until every tracked job has finished; returns False on timeout (scripts, tests)."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with _executor_lock:
+        futures = [job["future"] for job in _jobs.values()]
+    for future in futures:
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            future.result(timeout=remaining)
+        except FutureTimeoutError:
+            return False
+        except Exception:
+            pass
+    return True
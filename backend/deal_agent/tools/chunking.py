@@ -0,0 +1,122 @@
+import hashlib
+import re
+from typing import Any, Dict, List, Optional
+
+# Numbered headings ("2.1 Location", "3 Tenancy") or short upper-case lines ("KEY METRICS")
+_NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)*\.?)\s+[A-Z][^.!?]{2,80}$")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _is_heading(line: str) -> bool:
+    line = line.strip()
+    if not line or len(line) > 90 or line.endswith((".", ",", ";", ":")):
+        return False
+    if _NUMBERED_HEADING.match(line):
+        return True
+    letters = [c for c in line if c.isalpha()]
+    # Upper-case headings, including letter-spaced ones ("K E Y   M E T R I C S")
+    return len(letters) >= 4 and all(c.isupper() for c in letters)
+
+def _normalize_line(line: str) -> str:
+    # Collapse letter-spaced display type ("K E Y   M E T R I C S" -> "KEY METRICS")
+    tokens = line.split()
+    if len(tokens) >= 4 and sum(len(t) == 1 for t in tokens) >= 0.8 * len(tokens):
+        line = " ".join(word.replace(" ", "") for word in re.split(r"\s{2,}", line.strip()))
+    return " ".join(line.split())
+
+def _paragraphs(pages: List[str], page_numbers: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """Splits pages into paragraphs tagged with their 1-based page and enclosing section heading."""
+    blocks = []
+    section = ""
+    for position, page_text in enumerate(pages):
+        page = (page_numbers[position] if page_numbers else position) + 1
+        for raw in re.split(r"\n\s*\n", page_text):
+            lines = [_normalize_line(l) for l in raw.split("\n") if l.strip()]
+            if not lines:
+                continue
+            if len(lines) == 1 and _is_heading(lines[0]):
+                section = lines[0]
+                blocks.append({"heading": True, "section": section, "page": page, "text": section})
+                continue
+            blocks.append({"heading": False, "section": section, "page": page, "text": " ".join(lines)})
+    return blocks
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """Breaks an oversized paragraph at sentence boundaries, hard-splitting run-on text."""
+    pieces, current = [], ""
+    for sentence in _SENTENCE_END.split(text):
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        candidate = f"{current} {sentence}".strip()
+        if len(candidate) > max_chars and current:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+def _tail(text: str, overlap: int) -> str:
+    """Last `overlap` characters of a chunk, starting at a word boundary."""
+    if overlap <= 0 or len(text) <= overlap:
+        return text if overlap > 0 else ""
+    tail = text[-overlap:]
+    space = tail.find(" ")
+    return tail[space + 1:] if space != -1 else tail
+
+def chunk_document(pages: List[str], source: str, max_chars: int = 1500, overlap: int = 200,
+                   page_numbers: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """
+    Splits a parsed PDF into overlapping, section-aware chunks.
+
+    Paragraphs are packed greedily up to `max_chars`. A chunk never spans two
+    sections; within a section, consecutive chunks share `overlap` characters
+    so sentences cut at a boundary stay retrievable.
+
+    Returns dicts with: text, embed_text (section-prefixed), section, page_start,
+    page_end, chunk_index, hash (SHA-256 of source + embed_text), source.
+    """
+    chunks: List[Dict[str, Any]] = []
+    current: List[str] = []
+    pages_in_chunk: List[int] = []
+    section = ""
+    has_new = False  # False while `current` only holds the overlap carried from the last chunk
+
+    def flush(carry: bool):
+        nonlocal current, pages_in_chunk, has_new
+        text = " ".join(current).strip()
+        if text and has_new:
+            embed_text = f"{section}\n{text}" if section else text
+            chunks.append({
+                "text": text,
+                "embed_text": embed_text,
+                "section": section,
+                "page_start": min(pages_in_chunk),
+                "page_end": max(pages_in_chunk),
+                "chunk_index": len(chunks),
+                "hash": hashlib.sha256(f"{source}\n{embed_text}".encode("utf-8")).hexdigest(),
+                "source": source,
+            })
+        tail = _tail(text, overlap) if carry and text else ""
+        current = [tail] if tail else []
+        pages_in_chunk = pages_in_chunk[-1:] if tail else []
+        has_new = False
+
+    for block in _paragraphs(pages, page_numbers):
+        if block["heading"]:
+            flush(carry=False)
+            section = block["section"]
+            continue
+        for piece in _split_long(block["text"], max_chars):
+            if current and len(" ".join(current)) + len(piece) + 1 > max_chars:
+                flush(carry=True)
+            current.append(piece)
+            pages_in_chunk.append(block["page"])
+            has_new = True
+    flush(carry=False)
+    return chunks
@@ -0,0 +1,118 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from deal_agent.utils.config import Config
+
+# Similarity components, each in [0, 1] (1 = identical to the subject)
+COMPONENTS = ("relevance", "size", "eaves", "distance", "recency", "yield")
+
+
+def _column(candidates: List[Dict[str, Any]], key: str) -> np.ndarray:
+    """Float column with NaN for missing or non-numeric values (0 is a real value)."""
+    values = np.full(len(candidates), np.nan)
+    for i, candidate in enumerate(candidates):
+        value = candidate.get(key)
+        if value is None:
+            continue
+        try:
+            values[i] = float(value)
+        except (TypeError, ValueError):
+            continue
+    return values
+
+def _positive(values: np.ndarray) -> np.ndarray:
+    """NaN where a value is not strictly positive (sizes, dates stored as 0 for unknown)."""
+    return np.where(values > 0, values, np.nan)
+
+def _days_since(yyyymmdd: np.ndarray, today: date) -> np.ndarray:
+    """Age in days of YYYYMMDD numbers (NaN stays NaN), via datetime64 arithmetic."""
+    days = np.full(len(yyyymmdd), np.nan)
+    known = ~np.isnan(yyyymmdd)
+    if known.any():
+        n = yyyymmdd[known].astype(np.int64)
+        months = ((n // 10000 - 1970) * 12 + n // 100 % 100 - 1).astype("datetime64[M]")
+        dates = months.astype("datetime64[D]") + (n % 100 - 1).astype("timedelta64[D]")
+        days[known] = (np.datetime64(today, "D") - dates).astype(float)
+    return days
+
+def score_comps(candidates: List[Dict[str, Any]], subject: Dict[str, Any],
+                weights: Optional[Dict[str, float]] = None,
+                today: Optional[date] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Scores every candidate against the subject asset in one NumPy pass.
+
+    Candidates are dicts with any of: relevance (vector score), size_m2,
+    eaves_height_m, distance_km, acquisition_yyyymmdd, yield, city, country.
+    The subject supplies size_m2, eaves_height_m, location and coordinates
+    ((lat, lon), from which distance_km was measured). Yield is
+    compared with the candidates' median, so outliers rank lower.
+
+    Components a candidate (or the subject) has no data for are NaN and
+    left out of that candidate's score; the remaining weights
+    (Config.COMP_SCORE_WEIGHTS by default) are re-normalized. Returns
+    (scores, {component: similarities}).
+    """
+    weights = weights or Config.COMP_SCORE_WEIGHTS
+    n = len(candidates)
+    if not n:
+        return np.zeros(0), {name: np.zeros(0) for name in COMPONENTS}
+    components: Dict[str, np.ndarray] = {}
+
+    components["relevance"] = np.clip(_column(candidates, "relevance"), 0, 1)
+
+    size = _positive(_column(candidates, "size_m2"))
+    subject_size = subject.get("size_m2") or np.nan
+    # Symmetric in the ratio: half or double the subject's size score the same
+    components["size"] = np.exp(-np.abs(np.log(size / subject_size)) / Config.COMP_SIZE_SCALE)
+
+    eaves = _column(candidates, "eaves_height_m")
+    subject_eaves = np.nan if subject.get("eaves_height_m") is None else float(subject["eaves_height_m"])
+    components["eaves"] = np.exp(-np.abs(eaves - subject_eaves) / Config.COMP_EAVES_SCALE_M)
+
+    # A comp without coordinates has an unknown distance (NaN), not a far one
+    distance = _column(candidates, "distance_km")
+    distance_score = 0.5 ** (distance / Config.COMP_DISTANCE_HALF_LIFE_KM)
+    location = subject.get("location")
+    if location and not subject.get("coordinates"):
+        # Without subject coordinates, fall back to place names: the subject's city/country
+        # counts as close, another named place as far and an unnamed one as unknown
+        def place_score(c):
+            if location in (c.get("city"), c.get("country")):
+                return 1.0
+            return 0.0 if c.get("city") or c.get("country") else np.nan
+        distance_score = np.where(np.isnan(distance), [place_score(c) for c in candidates], distance_score)
+    components["distance"] = distance_score
+
+    age_years = _days_since(_positive(_column(candidates, "acquisition_yyyymmdd")), today or date.today()) / 365.25
+    components["recency"] = 0.5 ** (np.maximum(age_years, 0) / Config.COMP_RECENCY_HALF_LIFE_YEARS)
+
+    yields = _column(candidates, "yield")
+    median_yield = np.nanmedian(yields) if np.isfinite(yields).any() else np.nan
+    components["yield"] = np.exp(-np.abs(yields - median_yield) / Config.COMP_YIELD_SCALE)
+
+    names = [name for name in COMPONENTS if weights.get(name, 0)]
+    matrix = np.column_stack([components[name] for name in names]) if names else np.zeros((n, 0))
+    w = np.array([weights[name] for name in names], dtype=float)
+    known = ~np.isnan(matrix)
+    weight_sum = (known * w).sum(axis=1)
+    scores = np.where(weight_sum > 0, np.nansum(matrix * w, axis=1) / np.where(weight_sum > 0, weight_sum, 1), 0.0)
+    return scores, components
+
+def score_breakdowns(scores: np.ndarray, components: Dict[str, np.ndarray],
+                     weights: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+    """Per-candidate {"score", "components": {name: similarity}, "weights": effective weights}."""
+    weights = weights or Config.COMP_SCORE_WEIGHTS
+    breakdowns = []
+    for i, score in enumerate(scores):
+        similarities = {name: round(float(values[i]), 4) for name, values in components.items()
+                        if not np.isnan(values[i])}
+        used = {name: weights.get(name, 0) for name in similarities if weights.get(name, 0)}
+        total = sum(used.values()) or 1
+        breakdowns.append({
+            "score": round(float(score), 4),
+            "components": similarities,
+            "weights": {name: round(weight / total, 4) for name, weight in used.items()},
+        })
+    return breakdowns
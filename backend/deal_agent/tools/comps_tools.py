@@ -1,5 +1,9 @@
+from datetime import date, datetime
 from deal_agent.tools.vector_store import get_pinecone_index
-from langchain_openai import OpenAIEmbeddings
+from deal_agent.tools.embedding_cache import get_embeddings
+from deal_agent.tools.geo import cells_within, geocode, grid_cell, haversine_km
+from deal_agent.tools.comp_scoring import score_breakdowns, score_comps
+from deal_agent.utils.config import Config
 
 def calculate_blended_rent(comps_data: list) -> float:
     """
@@ -81,10 +85,127 @@ def format_comps_display(comps_data: list, use_table: bool = False, is_secondary
         return rows
 
 
-def fetch_market_comparables(location: str = None, asset_type: str = "Logistics") -> list:
+# --- Comp retrieval (metadata prefilter + weighted re-rank) ---
+
+def acquisition_date_number(value) -> int:
+    """"2024-05-15" -> 20240515, so date windows can be range-filtered in the index (0 if unparseable)."""
+    try:
+        return int(datetime.strptime(str(value)[:10], "%Y-%m-%d").strftime("%Y%m%d"))
+    except (TypeError, ValueError):
+        return 0
+
+def comp_filter_metadata(comp: dict) -> dict:
+    """Filterable comp fields stored with every market comp vector (plus lat/lon and grid cell when geocodable)."""
+    metadata = {
+        "record_type": "market_comp",
+        "asset_type": comp.get("asset_type", "Logistics"),
+        "city": comp.get("city", "Unknown"),
+        "country": comp.get("country", "Unknown"),
+        "size_m2": comp.get("size_m2", 0),
+        "acquisition_date": comp.get("acquisition_date", ""),
+        "acquisition_yyyymmdd": acquisition_date_number(comp.get("acquisition_date")),
+    }
+    if comp.get("eaves_height_m"):
+        metadata["eaves_height_m"] = comp["eaves_height_m"]
+    point = geocode(comp)
+    if point:
+        metadata.update({"lat": point[0], "lon": point[1], "geo_cell": grid_cell(*point)})
+    else:
+        # Left out of radius searches; only city/country filters can find it
+        print(f"Could not geocode comp {comp.get('name') or comp.get('id')} ({metadata['city']}, {metadata['country']})")
+    return metadata
+
+def build_comp_filter(asset_type: str = None, location: str = None, size_m2: float = None,
+                      acquired_after: date = None, coordinates: tuple = None) -> dict:
+    """
+    Pinecone metadata filter for comps: asset type family, location (grid
+    cells within Config.COMP_RADIUS_KM of the subject's coordinates, else city
+    or country), size band around the subject and acquisition date window.
+    Criteria left as None are not filtered on.
+    """
+    clauses = []
+    if asset_type:
+        family = Config.COMP_ASSET_TYPE_GROUPS.get(asset_type, [asset_type])
+        clauses.append({"asset_type": {"$in": family}})
+    if coordinates:
+        clauses.append({"geo_cell": {"$in": cells_within(coordinates[0], coordinates[1], Config.COMP_RADIUS_KM)}})
+    elif location:
+        clauses.append({"$or": [{"city": {"$eq": location}}, {"country": {"$eq": location}}]})
+    if size_m2:
+        low, high = Config.COMP_SIZE_BAND
+        clauses.append({"size_m2": {"$gte": size_m2 * low, "$lte": size_m2 * high}})
+    if acquired_after:
+        clauses.append({"acquisition_yyyymmdd": {"$gte": int(acquired_after.strftime("%Y%m%d"))}})
+    if not clauses:
+        return {}
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def search_comparables(index, vector, location: str = None, asset_type: str = None, size_m2: float = None,
+                       coordinates: tuple = None, eaves_height_m: float = None, top_k: int = None) -> list:
+    """
+    Queries 'market_comps' with structured prefilters, relaxing them (date
+    window, then size band, then location, then asset type) until at least
+    Config.COMP_MIN_RESULTS comps match, and ranks them with the comp
+    scoring engine (comp_scoring.score_comps).
+
+    With subject coordinates, location is a radius search over grid cells and
+    every geocoded comp gets its great-circle distance. Returns dicts of
+    {"match", "distance_km" (or None), "score", "breakdown"}, best first.
+    """
+    top_k = top_k or Config.COMP_CANDIDATES
+    acquired_after = None
+    if Config.COMP_MAX_AGE_YEARS:
+        today = date.today()
+        acquired_after = today.replace(year=today.year - Config.COMP_MAX_AGE_YEARS, day=min(today.day, 28))
+    criteria = {"asset_type": asset_type, "location": location, "coordinates": coordinates,
+                "size_m2": size_m2, "acquired_after": acquired_after}
+
+    matches, tried = [], []
+    # Legacy vectors without the filter fields are still found once every filter is relaxed
+    for relaxed in ([], ["acquired_after"], ["acquired_after", "size_m2"],
+                    ["acquired_after", "size_m2", "location", "coordinates"], list(criteria)):
+        metadata_filter = build_comp_filter(**{k: v for k, v in criteria.items() if k not in relaxed})
+        if metadata_filter in tried:
+            continue
+        tried.append(metadata_filter)
+        results = index.query(vector=vector, top_k=top_k, include_metadata=True,
+                              namespace="market_comps", filter=metadata_filter or None)
+        matches = results.matches
+        radius_search = bool(coordinates) and "coordinates" not in relaxed
+        if len(matches) >= Config.COMP_MIN_RESULTS:
+            break
+
+    distances = [None] * len(matches)
+    if coordinates:
+        located = [i for i, m in enumerate(matches)
+                   if (m.metadata or {}).get("lat") is not None and (m.metadata or {}).get("lon") is not None]
+        if located:
+            km = haversine_km(coordinates[0], coordinates[1],
+                              [matches[i].metadata["lat"] for i in located], [matches[i].metadata["lon"] for i in located])
+            for i, d in zip(located, km):
+                distances[i] = float(d)
+        if radius_search:
+            # Grid cells cover a square around the subject; keep the circle
+            keep = [i for i, d in enumerate(distances) if d is None or d <= Config.COMP_RADIUS_KM]
+            matches, distances = [matches[i] for i in keep], [distances[i] for i in keep]
+
+    candidates = [{**(m.metadata or {}), "relevance": m.score, "distance_km": d} for m, d in zip(matches, distances)]
+    subject = {"size_m2": size_m2, "eaves_height_m": eaves_height_m, "location": location,
+               "coordinates": coordinates}
+    scores, components = score_comps(candidates, subject)
+    breakdowns = score_breakdowns(scores, components)
+    ranked = [{"match": m, "distance_km": d, "score": float(score), "breakdown": breakdown}
+              for m, d, score, breakdown in zip(matches, distances, scores, breakdowns)]
+    return sorted(ranked, key=lambda comp: comp["score"], reverse=True)
+
+def fetch_market_comparables(location: str = None, asset_type: str = "Logistics", size_m2: float = None,
+                             coordinates: tuple = None, eaves_height_m: float = None, top_k: int = None) -> list:
     """
     Fetches comparable properties from the Pinecone vector database.
-    Returns a list of comparable properties.
+    Comps are prefiltered on type, location (a radius around `coordinates`,
+    (lat, lon), when given), size and date, then scored against the subject;
+    each carries its "score", "score_breakdown" and, when both ends are
+    geocoded, its real distance. Returns a list of comparable properties, best first.
     """
     try:
         index = get_pinecone_index()
@@ -92,8 +213,8 @@ def fetch_market_comparables(location: str = None, asset_type: str = "Logistics"
             print("Pinecone index not found, returning empty list.")
             return []
 
-        # Initialize Embeddings
-        embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        # Cached: the same asset type/location query is only embedded once
+        embeddings = get_embeddings()
         
         # Construct a query vector
         query_text = f"{asset_type} market comparables"
@@ -102,17 +223,12 @@ def fetch_market_comparables(location: str = None, asset_type: str = "Logistics"
             
         vector = embeddings.embed_query(query_text)
 
-        # Query 'market_comps' namespace
-        results = index.query(
-            vector=vector,
-            top_k=10, # Fetch more to filter
-            include_metadata=True,
-            namespace="market_comps"
-        )
-        
         comps_list = []
-        for match in results.matches:
-            meta = match.metadata
+        ranked = search_comparables(index, vector, location=location, asset_type=asset_type, size_m2=size_m2,
+                                    coordinates=coordinates, eaves_height_m=eaves_height_m, top_k=top_k)
+        for ranked_comp in ranked:
+            meta = ranked_comp["match"].metadata
+            distance_km = ranked_comp["distance_km"]
             # Map metadata to expected format
             # Expected: name, size, yield, rent, dist
             
@@ -124,12 +240,12 @@ def fetch_market_comparables(location: str = None, asset_type: str = "Logistics"
             yield_val = meta.get("yield", 0)
             yield_str = f"{yield_val*100:.1f}%" if yield_val else "N/A"
             
-            # Handle rent
-            rent_val = meta.get("rent_psm_pa", 0)
+            # Handle rent (normalized to EUR PSM at ingestion; older vectors only carry the raw figure)
+            rent_val = meta.get("rent_eur_psm", meta.get("rent_psm_pa", 0))
 
-            # Handle distance
-            dist_val = meta.get("distance_km", 0)
-            dist_str = f"{dist_val} km" if dist_val else "Unknown"
+            # Handle distance (great-circle from the subject; else the figure stored with the comp)
+            dist_val = round(distance_km) if distance_km is not None else meta.get("distance_km", 0)
+            dist_str = f"{dist_val} km" if dist_val or distance_km is not None else "Unknown"
             
             comp = {
                 "name": meta.get("name", "Unknown Asset"),
@@ -137,6 +253,9 @@ def fetch_market_comparables(location: str = None, asset_type: str = "Logistics"
                 "yield": yield_str,
                 "rent": rent_val,
                 "dist": dist_str,
+                "distance_km": distance_km,
+                "score": round(ranked_comp["score"], 4),
+                "score_breakdown": ranked_comp["breakdown"],
                 "raw_metadata": meta # Keep raw data just in case
             }
             comps_list.append(comp)
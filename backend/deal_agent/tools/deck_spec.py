@@ -0,0 +1,547 @@
+import copy
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pptx import Presentation
+from pptx.oxml.ns import qn
+from deal_agent.tools import pdf_engine
+
+# Matches template placeholders such as {{DEAL_NAME}} or {{ASSET_BULLETS}}
+PLACEHOLDER_PATTERN = re.compile(r"\{\{[A-Z0-9_]+\}\}")
+
+# Relationship types that belong to the slide itself and must not be copied onto a clone
+_SKIPPED_RELTYPES = ("/slideLayout", "/notesSlide")
+
+
+# --- Formatters -------------------------------------------------------------
+# Formatters turn a resolved binding value into slide text.
+# A formatter that raises falls back to the binding default ("N/A" unless set).
+
+def _format_bullets(value) -> str:
+    if isinstance(value, (list, tuple)):
+        return "\n".join(f"- {v}" for v in value)
+    return str(value)
+
+def _format_asset_bullets(asset: dict) -> str:
+    logistics = asset.get("logistics_asset", {}) or {}
+    leases = asset.get("leases", []) or []
+    tenants = [l.get("tenant", {}).get("name", "Unknown") for l in leases]
+    lines = [
+        f"Type: {asset.get('asset_type', 'Logistics')} ({asset.get('tenure', 'N/A')})",
+        f"Location: {asset.get('address', '')}, {asset.get('city', '')}".strip(", "),
+        f"Size: {float(logistics.get('area_m2') or 0):,.0f} sqm",
+        f"Specs: {logistics.get('eaves_height_m', 'N/A')}m eaves, {logistics.get('dock_doors', 'N/A')} dock doors",
+        f"Tenants: {', '.join(tenants) if tenants else 'Vacant'}",
+    ]
+    return "\n".join(lines)
+
+def _format_scenario_bullets(scenario: dict) -> str:
+    lines = []
+    if scenario.get("irr") is not None:
+        lines.append(f"Leveraged IRR: {float(scenario['irr']):.2%}")
+    if scenario.get("equity_multiple") is not None:
+        lines.append(f"Equity Multiple: {float(scenario['equity_multiple']):.2f}x")
+    if scenario.get("yield_on_cost") is not None:
+        lines.append(f"Yield on Cost: {float(scenario['yield_on_cost']):.2%}")
+    if scenario.get("adjustments"):
+        lines.append(f"Adjustments: {', '.join(scenario['adjustments'])}")
+    return "\n".join(lines) if lines else "No results recorded."
+
+FORMATTERS: Dict[str, Callable[[Any], str]] = {
+    "text": str,
+    "percent": lambda v: f"{float(v):.2%}",
+    "multiple": lambda v: f"{float(v):.2f}x",
+    "number": lambda v: f"{float(v):,.0f}",
+    "sqm": lambda v: f"{float(v):,.0f} sqm",
+    "years": lambda v: f"{float(v):.1f} years",
+    "currency": lambda v: f"€{float(v):,.0f}",
+    "currency_psm": lambda v: f"€{float(v):,.2f}/sqm",
+    "bullets": _format_bullets,
+    "asset_bullets": _format_asset_bullets,
+    "scenario_bullets": _format_scenario_bullets,
+}
+
+def register_formatter(name: str, func: Callable[[Any], str]):
+    """Register a custom formatter that deck specs can reference by name."""
+    FORMATTERS[name] = func
+
+
+# --- Compiled Spec -----------------------------------------------------------
+
+@dataclass
+class CompiledBinding:
+    placeholder: str
+    paths: List[Tuple[str, ...]]
+    formatter: Callable[[Any], str]
+    default: str
+
+@dataclass
+class CompiledSection:
+    name: str
+    slide: Optional[int]
+    layout: int
+    title: str
+    body: str
+    repeat: Optional[Tuple[str, ...]]
+    label: Optional[Tuple[str, ...]]
+    bindings: List[CompiledBinding] = field(default_factory=list)
+    table: Optional[Dict[str, Any]] = None
+    chart: Optional[Dict[str, Any]] = None
+
+@dataclass
+class CompiledDeck:
+    name: str
+    template: Optional[str]
+    sections: List[CompiledSection]
+    bindings: List[CompiledBinding]
+
+
+def _split_path(path: str) -> Tuple[str, ...]:
+    return tuple(p for p in path.split(".") if p)
+
+def _compile_bindings(bindings: Dict[str, Any]) -> List[CompiledBinding]:
+    compiled = []
+    for placeholder, binding in (bindings or {}).items():
+        if not PLACEHOLDER_PATTERN.fullmatch(placeholder):
+            raise ValueError(f"Invalid placeholder '{placeholder}' in deck spec.")
+        if isinstance(binding, str):
+            binding = {"path": binding}
+        paths = binding.get("path", [])
+        if isinstance(paths, str):
+            paths = [paths]
+        fmt = binding.get("format", "text")
+        if fmt not in FORMATTERS:
+            raise ValueError(f"Unknown formatter '{fmt}' for {placeholder}.")
+        compiled.append(CompiledBinding(
+            placeholder=placeholder,
+            paths=[_split_path(p) for p in paths],
+            formatter=FORMATTERS[fmt],
+            default=str(binding.get("default", "N/A")),
+        ))
+    return compiled
+
+def _compile_table(table: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not table:
+        return None
+    columns = []
+    for column in table["columns"]:
+        header, key = column[0], column[1]
+        fmt = column[2] if len(column) > 2 else "text"
+        if fmt not in FORMATTERS:
+            raise ValueError(f"Unknown formatter '{fmt}' for table column {header}.")
+        columns.append((header, key, FORMATTERS[fmt]))
+    return {"path": _split_path(table["path"]), "columns": columns}
+
+def _compile_chart(chart: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not chart:
+        return None
+    return {
+        "path": _split_path(chart["path"]),
+        "title": chart.get("title"),
+        "label": chart.get("label", "{n}"),
+    }
+
+def compile_deck_spec(spec: Dict[str, Any]) -> CompiledDeck:
+    """
+    Compiles a declarative deck spec into a reusable render plan.
+
+    A spec looks like:
+        {
+            "name": "IC Deck",
+            "template": "ic_deck_template.pptx",
+            "bindings": {"{{IRR}}": {"path": "financial_model.irr", "format": "percent"}},
+            "sections": [
+                {"name": "Summary", "slide": 1, "title": "Executive Summary", "body": "{{SUMMARY_BULLETS}}"},
+                {"name": "Asset", "layout": 1, "title": "{{ASSET_NAME}}", "body": "{{ASSET_BULLETS}}",
+                 "repeat": "extracted_data.source_json.assets", "label": "item.name",
+                 "bindings": {"{{ASSET_NAME}}": "item.name",
+                              "{{ASSET_BULLETS}}": {"path": "item", "format": "asset_bullets"}}},
+            ],
+        }
+
+    'slide' points at a prototype slide in the template. Sections without one (or whose
+    prototype is missing from the template) are built from 'layout' using 'title'/'body'.
+    'repeat' emits one slide per element of the list (or dict) found at that state path;
+    bindings can reach the current element through the 'item' prefix.
+
+    Sections may also declare a 'table' ({"path", "columns": [[header, key, format?], ...]})
+    or a 'chart' ({"path", "title", "label"}) over arrays in the context. The PDF renderer
+    draws these; the PPTX renderer relies on the template's own shapes.
+    """
+    sections = []
+    for raw in spec.get("sections", []):
+        sections.append(CompiledSection(
+            name=raw["name"],
+            slide=raw.get("slide"),
+            layout=raw.get("layout", 1),
+            title=raw.get("title", raw["name"]),
+            body=raw.get("body", ""),
+            repeat=_split_path(raw["repeat"]) if raw.get("repeat") else None,
+            label=_split_path(raw["label"]) if raw.get("label") else None,
+            bindings=_compile_bindings(raw.get("bindings", {})),
+            table=_compile_table(raw.get("table")),
+            chart=_compile_chart(raw.get("chart")),
+        ))
+    return CompiledDeck(
+        name=spec.get("name", "Deck"),
+        template=spec.get("template"),
+        sections=sections,
+        bindings=_compile_bindings(spec.get("bindings", {})),
+    )
+
+
+# --- Binding Evaluation ------------------------------------------------------
+
+def _resolve(context: Dict[str, Any], path: Tuple[str, ...], item: Any = None) -> Any:
+    if path and path[0] == "item":
+        current, path = item, path[1:]
+    else:
+        current = context
+    for key in path:
+        if current is None:
+            return None
+        if isinstance(current, dict):
+            current = current.get(key)
+        elif isinstance(current, (list, tuple)) and key.isdigit():
+            idx = int(key)
+            current = current[idx] if idx < len(current) else None
+        else:
+            current = getattr(current, key, None)
+    return current
+
+def _evaluate(bindings: List[CompiledBinding], context: Dict[str, Any], item: Any = None) -> Dict[str, str]:
+    values = {}
+    for binding in bindings:
+        value = None
+        for path in binding.paths:
+            value = _resolve(context, path, item)
+            if value is not None:
+                break
+        if value is None:
+            values[binding.placeholder] = binding.default
+            continue
+        try:
+            values[binding.placeholder] = binding.formatter(value)
+        except (ValueError, TypeError, AttributeError):
+            values[binding.placeholder] = binding.default
+    return values
+
+def _iter_items(section: CompiledSection, context: Dict[str, Any]) -> List[Any]:
+    if section.repeat is None:
+        return [None]
+    items = _resolve(context, section.repeat)
+    if isinstance(items, dict):
+        # Scenario-style mappings: expose the key as 'name' alongside the stored fields
+        return [{"name": k, **v} if isinstance(v, dict) else {"name": k, "value": v} for k, v in items.items()]
+    return list(items or [])
+
+def evaluate_deck(deck: CompiledDeck, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Expands a compiled deck against the given context without touching any template.
+    Returns one entry per produced slide with its section, label, title, body and values.
+    Renderers (PPTX, PDF) share this so the slide set is identical across formats.
+    """
+    global_values = _evaluate(deck.bindings, context)
+    slides = []
+    for section in deck.sections:
+        for item in _iter_items(section, context):
+            values = dict(global_values)
+            values.update(_evaluate(section.bindings, context, item))
+            label = section.name
+            if section.label is not None:
+                label_value = _resolve(context, section.label, item)
+                if label_value is not None:
+                    label = f"{section.name}: {label_value}"
+            slides.append({
+                "section": section,
+                "item": item,
+                "label": label,
+                "title": fill_placeholders(section.title, values),
+                "body": fill_placeholders(section.body, values),
+                "values": values,
+            })
+    return slides
+
+
+# --- PPTX Rendering ----------------------------------------------------------
+
+def fill_placeholders(text: str, values: Dict[str, str]) -> str:
+    """Replaces every known {{PLACEHOLDER}} in a single pass; unknown ones are left as-is."""
+    if "{{" not in text:
+        return text
+    return PLACEHOLDER_PATTERN.sub(lambda m: values.get(m.group(0), m.group(0)), text)
+
+def replace_text(text_frame, values: Dict[str, str]):
+    for paragraph in text_frame.paragraphs:
+        original_text = paragraph.text
+        full_text = fill_placeholders(original_text, values)
+        if full_text != original_text:
+            paragraph.text = full_text
+
+def fill_slide(slide, values: Dict[str, str]):
+    for shape in slide.shapes:
+        if shape.has_text_frame:
+            replace_text(shape.text_frame, values)
+        if shape.has_table:
+            for row in shape.table.rows:
+                for cell in row.cells:
+                    if cell.text_frame:
+                        replace_text(cell.text_frame, values)
+
+def _load_template(template_path: Optional[str]):
+    if template_path and os.path.exists(template_path):
+        try:
+            return Presentation(template_path)
+        except Exception as e:
+            print(f"Error loading template: {e}. Creating new.")
+    elif template_path:
+        print(f"Template not found at {template_path}, building slides from layouts...")
+    return Presentation()
+
+def _clone_slide(prs, source):
+    """Appends a copy of `source` (a slide in `prs`) and returns it."""
+    dest = prs.slides.add_slide(source.slide_layout)
+    for shape in list(dest.shapes):
+        shape._element.getparent().remove(shape._element)
+
+    # Re-point images/charts/hyperlinks at the same parts from the new slide
+    rid_map = {}
+    for rId, rel in source.part.rels.items():
+        if rel.is_external or rel.reltype.endswith(_SKIPPED_RELTYPES):
+            continue
+        rid_map[rId] = dest.part.relate_to(rel.target_part, rel.reltype)
+
+    r_attrs = (qn("r:embed"), qn("r:link"), qn("r:id"))
+    for shape in source.shapes:
+        element = copy.deepcopy(shape._element)
+        if rid_map:
+            for node in element.iter():
+                for attr in r_attrs:
+                    if node.get(attr) in rid_map:
+                        node.set(attr, rid_map[node.get(attr)])
+        dest.shapes._spTree.insert_element_before(element, "p:extLst")
+    return dest
+
+def _new_slide(prs, section: CompiledSection):
+    layouts = prs.slide_layouts
+    layout = layouts[min(section.layout, len(layouts) - 1)]
+    slide = prs.slides.add_slide(layout)
+    if slide.shapes.title is not None:
+        slide.shapes.title.text = section.title
+    if section.body and len(slide.placeholders) > 1:
+        slide.placeholders[1].text = section.body
+    return slide
+
+def _drop_leading_slides(prs, count: int):
+    sld_id_lst = prs.slides._sldIdLst
+    for sld_id in list(sld_id_lst)[:count]:
+        prs.part.drop_rel(sld_id.rId)
+        sld_id_lst.remove(sld_id)
+
+def render_deck(deck: CompiledDeck, context: Dict[str, Any], template_path: Optional[str] = None):
+    """
+    Executes a compiled deck against `context` (usually the DealState plus a 'values' dict
+    of pre-formatted blocks). Every produced slide is cloned once from its prototype or
+    built once from its layout, so rendering is linear in the number of slides produced.
+
+    Returns:
+        (Presentation, list of produced slide labels)
+    """
+    prs = _load_template(template_path)
+    prototypes = list(prs.slides)
+
+    slides = evaluate_deck(deck, context)
+    for entry in slides:
+        section = entry["section"]
+        if section.slide is not None and section.slide < len(prototypes):
+            slide = _clone_slide(prs, prototypes[section.slide])
+        else:
+            slide = _new_slide(prs, section)
+        fill_slide(slide, entry["values"])
+
+    # Prototypes are only sources; the output contains the produced slides alone
+    _drop_leading_slides(prs, len(prototypes))
+    return prs, [entry["label"] for entry in slides]
+
+
+# --- PDF Rendering -----------------------------------------------------------
+
+def _table_rows(table: Dict[str, Any], context: Dict[str, Any], item: Any) -> List[List[str]]:
+    rows = []
+    for record in _resolve(context, table["path"], item) or []:
+        row = []
+        for _, key, formatter in table["columns"]:
+            value = record.get(key) if isinstance(record, dict) else None
+            try:
+                row.append(formatter(value) if value not in (None, "") else "")
+            except (ValueError, TypeError):
+                row.append(str(value))
+        rows.append(row)
+    return rows
+
+def _draw_pdf_slide(page, entry: Dict[str, Any], context: Dict[str, Any], footer: str, page_number: int):
+    section = entry["section"]
+    margin = 40
+    width = page.width - 2 * margin
+    bottom = page.height - 36
+
+    if section.layout == 0:
+        # Title slide: centred title block on a dark band
+        page.rect(0, 0, page.width, page.height, fill=pdf_engine.DARK)
+        y = page.text_block(margin, page.height * 0.35, entry["title"], width, size=32, bold=True, color=(1, 1, 1))
+        page.text_block(margin, y + 10, entry["body"], width, size=16, color=pdf_engine.LIGHT)
+        return
+
+    page.rect(0, 0, page.width, 64, fill=pdf_engine.DARK)
+    page.text_block(margin, 20, entry["title"], width, size=22, bold=True, color=(1, 1, 1), max_y=64)
+
+    has_visual = section.table is not None or section.chart is not None
+    y = page.text_block(margin, 84, entry["body"], width, size=12, max_y=bottom if not has_visual else page.height * 0.55)
+
+    if section.table is not None:
+        rows = _table_rows(section.table, context, entry["item"])
+        if rows:
+            headers = [header for header, _, _ in section.table["columns"]]
+            y = pdf_engine.draw_table(page, margin, y + 12, width, headers, rows, size=9, max_y=bottom)
+
+    if section.chart is not None:
+        values = _resolve(context, section.chart["path"], entry["item"]) or []
+        if values and y + 80 < bottom:
+            labels = [section.chart["label"].format(n=i) for i in range(len(values))]
+            pdf_engine.draw_bar_chart(page, margin, y + 12, width, bottom - y - 12, values, labels,
+                                      title=section.chart["title"])
+
+    page.line(margin, page.height - 28, page.width - margin, page.height - 28, color=pdf_engine.LIGHT)
+    page.text(margin, page.height - 24, footer, 8, color=pdf_engine.MUTED)
+    page.text(page.width - margin - 20, page.height - 24, str(page_number), 8, color=pdf_engine.MUTED)
+
+def render_deck_pdf(deck: CompiledDeck, context: Dict[str, Any], stream) -> List[str]:
+    """
+    Draws the same slide set as `render_deck` straight to PDF, writing each page to
+    `stream` (any binary file-like object) as soon as it is drawn. No office suite or
+    external process is involved.
+
+    Returns:
+        list of produced slide labels
+    """
+    writer = pdf_engine.PdfStreamWriter(stream)
+    slides = evaluate_deck(deck, context)
+    footer = f"{deck.name} | {fill_placeholders('{{DEAL_NAME}}', slides[0]['values']) if slides else ''}"
+    for number, entry in enumerate(slides, start=1):
+        page = writer.new_page()
+        _draw_pdf_slide(page, entry, context, footer, number)
+        writer.finish_page(page)
+    writer.close()
+    return [entry["label"] for entry in slides]
+
+
+# --- Default Specs -----------------------------------------------------------
+
+_COMMON_BINDINGS = {
+    "{{DEAL_NAME}}": {"path": "company_name", "default": "Project Deal"},
+    "{{DATE}}": "values.date",
+    "{{SCENARIO_LABEL}}": {"path": "values.scenario_label", "default": "Base Case"},
+    "{{SUMMARY_BULLETS}}": {"path": "values.summary_bullets", "default": "No analysis available."},
+    "{{MARKET_BULLETS}}": {"path": "extracted_data.market_highlights", "default": "Market data not available."},
+    "{{TENANCY_BULLETS}}": "values.tenancy_bullets",
+    "{{BUSINESS_PLAN_BULLETS}}": "values.business_plan_bullets",
+    "{{SENSITIVITY_ANALYSIS}}": "values.sensitivity_bullets",
+    "{{APPENDIX_BULLETS}}": "values.appendix_bullets",
+    "{{ENTRY_YIELD}}": {"path": "values.entry_yield", "format": "percent"},
+    "{{EXIT_YIELD}}": {"path": "values.exit_yield", "format": "percent"},
+    "{{IRR}}": {"path": "financial_model.irr", "format": "percent"},
+    "{{MOIC}}": {"path": ["financial_model.em", "financial_model.equity_multiple"], "format": "multiple"},
+    "{{MARKET_RENT}}": "values.market_rent",
+}
+
+_ASSET_SECTION = {
+    "name": "Asset",
+    "layout": 1,
+    "title": "{{ASSET_NAME}}",
+    "body": "{{ASSET_BULLETS}}",
+    "repeat": "extracted_data.source_json.assets",
+    "label": "item.name",
+    "bindings": {
+        "{{ASSET_NAME}}": {"path": "item.name", "default": "Asset"},
+        "{{ASSET_BULLETS}}": {"path": "item", "format": "asset_bullets"},
+    },
+}
+
+_IC_SECTIONS = [
+    {"name": "Title", "slide": 0, "layout": 0, "title": "{{DEAL_NAME}}",
+     "body": "Investment Committee Presentation\n{{DATE}}\n{{SCENARIO_LABEL}}"},
+    {"name": "Summary", "slide": 1, "title": "Executive Summary", "body": "{{SUMMARY_BULLETS}}"},
+    {"name": "Market", "slide": 2, "title": "Market Overview", "body": "{{MARKET_BULLETS}}"},
+    _ASSET_SECTION,
+    {"name": "Tenancy", "slide": 3, "title": "Tenancy Schedule", "body": "{{TENANCY_BULLETS}}",
+     "table": {"path": "values.tenancy_rows",
+               "columns": [["Tenant", "name"], ["Area (sqm)", "area", "number"], ["Lease Start", "lease_start"],
+                           ["Lease End", "lease_end"], ["Rent (EUR/sqm)", "rent_psm"]]}},
+    {"name": "Business Plan", "slide": 4, "title": "Business Plan", "body": "{{BUSINESS_PLAN_BULLETS}}"},
+    {"name": "Financials", "slide": 5, "title": "Financial Overview",
+     "body": "Key Metrics:\nEntry Yield: {{ENTRY_YIELD}}\nIRR: {{IRR}}\nEquity Multiple: {{MOIC}}\nExit Yield: {{EXIT_YIELD}}",
+     "chart": {"path": "financial_model.cash_flows", "title": "Levered Cash Flows (EUR)", "label": "Y{n}"}},
+    {"name": "Sensitivities", "slide": 6, "title": "Sensitivities", "body": "{{SENSITIVITY_ANALYSIS}}"},
+    {"name": "Appendix", "slide": 7, "title": "Appendix", "body": "{{APPENDIX_BULLETS}}"},
+]
+
+_SCENARIO_SECTION = {
+    "name": "Scenario",
+    "layout": 1,
+    "title": "Scenario Comparison: {{SCENARIO_NAME}}",
+    "body": "{{SCENARIO_BULLETS}}",
+    "repeat": "values.scenario_history",
+    "label": "item.name",
+    "bindings": {
+        "{{SCENARIO_NAME}}": "item.name",
+        "{{SCENARIO_BULLETS}}": {"path": "item", "format": "scenario_bullets"},
+    },
+}
+
+IC_DECK_SPEC = {
+    "name": "IC Deck",
+    "template": "ic_deck_template.pptx",
+    "bindings": _COMMON_BINDINGS,
+    "sections": _IC_SECTIONS,
+}
+
+# Same storyline as the IC deck, with one comparison slide per scenario run so far
+SCENARIO_DECK_SPEC = {
+    "name": "Scenario Deck",
+    "template": "ic_deck_template.pptx",
+    "bindings": _COMMON_BINDINGS,
+    "sections": _IC_SECTIONS[:-1] + [_SCENARIO_SECTION] + _IC_SECTIONS[-1:],
+}
+
+IC_DECK = compile_deck_spec(IC_DECK_SPEC)
+SCENARIO_DECK = compile_deck_spec(SCENARIO_DECK_SPEC)
+
+# Headline metrics are typed placeholders filled from the deterministic lease metrics;
+# only the highlights on the summary slide come from the LLM
+DEAL_SUMMARY_SPEC = {
+    "name": "Deal Summary",
+    "template": "deal_summary_template.pptx",
+    "bindings": {
+        **_COMMON_BINDINGS,
+        "{{TOTAL_GLA}}": {"path": "extracted_data.metrics.total_gla_m2", "format": "sqm"},
+        "{{OCCUPANCY}}": {"path": "extracted_data.metrics.occupancy", "format": "percent"},
+        "{{WALT}}": {"path": "extracted_data.metrics.walt_years", "format": "years"},
+        "{{IN_PLACE_RENT}}": {"path": "extracted_data.metrics.in_place_rent_pa", "format": "currency"},
+        "{{IN_PLACE_RENT_PSM}}": {"path": "extracted_data.metrics.in_place_rent_psm", "format": "currency_psm"},
+        "{{METRICS_AS_OF}}": "extracted_data.metrics.as_of",
+    },
+    "sections": [
+        {"name": "Title", "slide": 0, "layout": 0, "title": "{{DEAL_NAME}}",
+         "body": "Deal Summary / One-Pager\n{{DATE}}"},
+        {"name": "Key Metrics", "layout": 1, "title": "Key Metrics",
+         "body": ("Total GLA: {{TOTAL_GLA}}\nOccupancy: {{OCCUPANCY}}\nWALT: {{WALT}}\n"
+                  "In-Place Rent: {{IN_PLACE_RENT}} p.a. ({{IN_PLACE_RENT_PSM}})\nAs of: {{METRICS_AS_OF}}"),
+         "table": {"path": "extracted_data.metrics.assets",
+                   "columns": [["Asset", "name"], ["GLA (sqm)", "total_gla_m2", "number"], ["Occupancy", "occupancy", "percent"],
+                               ["WALT", "walt_years", "years"], ["Rent p.a.", "in_place_rent_pa", "currency"]]}},
+        {"name": "Summary", "slide": 1, "title": "Executive Summary", "body": "{{SUMMARY_BULLETS}}"},
+    ],
+}
+
+DEAL_SUMMARY = compile_deck_spec(DEAL_SUMMARY_SPEC)
@@ -0,0 +1,179 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from deal_agent.utils.config import Config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used);
+"""
+
+
+def embedding_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """
+    Persistent SQLite store of float32 embedding vectors keyed by sha256(model + text).
+    Least recently used rows are evicted once the table exceeds `max_entries`.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # One shared connection; the lock serializes access from parallel branches and background jobs
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Returns the cached vectors among `keys` and refreshes their LRU timestamp."""
+        found: Dict[str, List[float]] = {}
+        if not keys:
+            return found
+        with self._lock:
+            unique = list(dict.fromkeys(keys))
+            # SQLite caps bound parameters per statement
+            for i in range(0, len(unique), 500):
+                part = unique[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE embeddings SET hits = hits + 1, last_used = ? WHERE key = ?",
+                                       [(now, key) for key in found])
+                self._conn.commit()
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, model: str, items: Dict[str, List[float]]):
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, model, len(vector), np.asarray(vector, dtype=np.float32).tobytes(), now, now)
+                for key, vector in items.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dim, vector, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+            self._evict()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,))
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends cache misses to the underlying model."""
+
+    def __init__(self, base: Embeddings, model: str, cache: EmbeddingCache):
+        self.base = base
+        self.model = model
+        self.cache = cache
+
+    def _lookup(self, texts: List[str]):
+        keys = [embedding_key(self.model, text) for text in texts]
+        found = self.cache.get_many(keys)
+        # Embed each distinct missing text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        return keys, found, missing
+
+    def _store(self, keys, found, missing, vectors) -> List[List[float]]:
+        fresh = dict(zip(missing.keys(), vectors))
+        self.cache.put_many(self.model, fresh)
+        found.update(fresh)
+        return [found[key] for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._lookup(texts)
+        vectors = self.base.embed_documents(list(missing.values())) if missing else []
+        return self._store(keys, found, missing, vectors)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._lookup(texts)
+        vectors = await self.base.aembed_documents(list(missing.values())) if missing else []
+        return self._store(keys, found, missing, vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = embedding_key(self.model, text)
+        found = self.cache.get_many([key])
+        if key in found:
+            return found[key]
+        vector = self.base.embed_query(text)
+        self.cache.put_many(self.model, {key: vector})
+        return vector
+
+_cache: Optional[EmbeddingCache] = None
+_embeddings: Dict[str, Embeddings] = {}
+_factory_lock = threading.Lock()
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    global _cache
+    if _cache is None and Config.EMBED_CACHE_ENABLED:
+        try:
+            _cache = EmbeddingCache(Config.EMBED_CACHE_PATH, Config.EMBED_CACHE_MAX_ENTRIES)
+        except Exception as e:
+            print(f"Embedding cache unavailable, calling the API directly: {e}")
+            return None
+    return _cache
+
+def get_embeddings(model: Optional[str] = None) -> Embeddings:
+    """
+    Process-wide embeddings client for `model` (default Config.EMBEDDING_MODEL),
+    fronted by the persistent cache. Use this instead of constructing
+    OpenAIEmbeddings at call sites.
+    """
+    model = model or Config.EMBEDDING_MODEL
+    with _factory_lock:
+        if model not in _embeddings:
+            base = OpenAIEmbeddings(model=model)
+            cache = get_embedding_cache()
+            _embeddings[model] = CachedEmbeddings(base, model, cache) if cache else base
+        return _embeddings[model]
+
+def embedding_cache_stats() -> Dict[str, float]:
+    cache = get_embedding_cache()
+    return cache.stats() if cache else {}
@@ -0,0 +1,85 @@
+import json
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from deal_agent.utils.config import Config
+
+EARTH_RADIUS_KM = 6371.0088
+
+_gazetteer = None
+
+
+def gazetteer() -> Dict[str, Tuple[float, float]]:
+    """
+    City centroids (lat, lon) for records that carry a city but no coordinates,
+    read once from the JSON file at Config.GEO_GAZETTEER_PATH ({"city": [lat, lon]}).
+    """
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = {}
+        try:
+            with open(Config.GEO_GAZETTEER_PATH, "r", encoding="utf-8") as f:
+                _gazetteer = {k.lower(): tuple(v) for k, v in json.load(f).items()}
+        except Exception as e:
+            print(f"Could not read gazetteer {Config.GEO_GAZETTEER_PATH}, geocoding from coordinates only: {e}")
+    return _gazetteer
+
+def geocode(record: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """
+    (lat, lon) of an asset or comp: its GeoJSON point, explicit lat/lon
+    fields, its city in the gazetteer, or a gazetteer city named in its
+    name (e.g. "Lyon Distribution Park"). None if nothing matches.
+    """
+    coordinates = (record.get("geocoordinates") or {}).get("coordinates") or []
+    if len(coordinates) > 1 and coordinates[0] is not None and coordinates[1] is not None:
+        # GeoJSON point: [lon, lat]
+        return float(coordinates[1]), float(coordinates[0])
+    if record.get("lat") is not None and record.get("lon") is not None:
+        return float(record["lat"]), float(record["lon"])
+
+    places = gazetteer()
+    city = str(record.get("city") or "").strip().lower()
+    if city in places:
+        return places[city]
+    name = str(record.get("name") or "").lower()
+    for place, point in places.items():
+        if re.search(rf"\b{re.escape(place)}\b", name):
+            return point
+    return None
+
+def haversine_km(lat: float, lon: float, lats, lons) -> np.ndarray:
+    """Great-circle distances from one point to arrays of points, in km."""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(np.asarray(lats, dtype=float)), np.radians(np.asarray(lons, dtype=float))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+# --- Grid buckets ---
+
+def _cell_index(lat: float, lon: float, size: float) -> Tuple[int, int]:
+    columns = int(round(360 / size))
+    return int(math.floor((min(lat, 89.9999) + 90) / size)), int(math.floor((lon + 180) / size)) % columns
+
+def grid_cell(lat: float, lon: float, size: float = None) -> str:
+    """Key of the lat/lon grid bucket holding a point (stored as comp metadata)."""
+    row, column = _cell_index(lat, lon, size or Config.GEO_CELL_DEGREES)
+    return f"{row}:{column}"
+
+def cells_within(lat: float, lon: float, radius_km: float, size: float = None) -> List[str]:
+    """Keys of every grid bucket that may hold points within radius_km of (lat, lon)."""
+    size = size or Config.GEO_CELL_DEGREES
+    lat_span = radius_km / 111.0
+    south, north = max(-90.0, lat - lat_span), min(89.9999, lat + lat_span)
+    # Longitude degrees shrink towards the poles; use the widest latitude in the box
+    widest = max(abs(south), abs(north))
+    lon_span = 180.0 if widest >= 89 else min(180.0, radius_km / (111.0 * math.cos(math.radians(widest))))
+
+    columns = int(round(360 / size))
+    first_row, first_column = _cell_index(south, lon - lon_span, size)
+    last_row, _ = _cell_index(north, lon, size)
+    column_count = min(columns, int(math.ceil(2 * lon_span / size)) + 1)
+    return [f"{row}:{(first_column + step) % columns}"
+            for row in range(first_row, last_row + 1) for step in range(column_count)]
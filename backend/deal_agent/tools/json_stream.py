@@ -0,0 +1,106 @@
+import json
+from typing import Any, Dict, Iterator, List, Tuple
+
+try:
+    import ijson
+except ImportError:  # Optional: fall back to json.load (whole document in memory)
+    ijson = None
+
+# Top-level arrays of a structured deal bundle that are streamed record by record
+BUNDLE_ARRAYS = ("assets", "comps")
+
+ASSET_COLUMNS = ("name", "asset_type", "city", "country", "currency", "area_m2", "lon", "lat", "source")
+LEASE_COLUMNS = ("asset_index", "tenant", "area_m2", "rent_psm_pa", "lease_start", "lease_end")
+# Filled by normalization.normalize_lease_columns after each batch
+NORMALIZED_ASSET_COLUMNS = ("rent_eur_psm",)
+NORMALIZED_LEASE_COLUMNS = ("rent_eur_psm", "fx_rate", "unit_factor", "source_unit", "rent_conversion")
+
+
+def _iter_items(f, arrays: Tuple[str, ...]) -> Iterator[Tuple[str, Any]]:
+    """Single pass over the token stream, building one array element at a time."""
+    targets = {f"{name}.item": name for name in arrays}
+    builder = None
+    current = None
+    for prefix, event, value in ijson.parse(f, use_float=True):
+        if builder is None:
+            if prefix not in targets:
+                continue
+            if event in ("start_map", "start_array"):
+                builder, current = ijson.ObjectBuilder(), prefix
+                builder.event(event, value)
+            else:
+                # Scalar array element
+                yield targets[prefix], value
+            continue
+        builder.event(event, value)
+        if prefix == current and event in ("end_map", "end_array"):
+            yield targets[current], builder.value
+            builder = None
+
+def iter_bundle_batches(file_path: str, batch_size: int = 500,
+                        arrays: Tuple[str, ...] = BUNDLE_ARRAYS) -> Iterator[Tuple[str, List[Any]]]:
+    """
+    Streams the top-level record arrays of a JSON bundle.
+
+    Yields (array_name, records) with at most `batch_size` records per batch, in
+    file order. With ijson installed only the current batch is held in memory;
+    without it the file is loaded whole and sliced.
+    """
+    batches: Dict[str, List[Any]] = {name: [] for name in arrays}
+
+    if ijson is None:
+        with open(file_path, "r", encoding="utf-8") as f:
+            document = json.load(f)
+        for name in arrays:
+            records = document.get(name, []) or []
+            for i in range(0, len(records), batch_size):
+                yield name, records[i:i + batch_size]
+        return
+
+    with open(file_path, "rb") as f:
+        for name, record in _iter_items(f, arrays):
+            batch = batches[name]
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield name, batch
+                batches[name] = []
+    for name in arrays:
+        if batches[name]:
+            yield name, batches[name]
+
+def empty_portfolio_columns() -> Dict[str, Dict[str, list]]:
+    """Column-oriented asset and lease tables (one list per field, aligned by row)."""
+    return {
+        "assets": {column: [] for column in ASSET_COLUMNS + NORMALIZED_ASSET_COLUMNS},
+        "leases": {column: [] for column in LEASE_COLUMNS + NORMALIZED_LEASE_COLUMNS},
+    }
+
+def append_asset_columns(columns: Dict[str, Dict[str, list]], asset: Dict[str, Any], source: str) -> int:
+    """
+    Appends one asset (and its leases) to the columnar tables.
+    Returns the asset's row index, which its lease rows reference.
+    """
+    assets, leases = columns["assets"], columns["leases"]
+    asset_index = len(assets["name"])
+    logistics = asset.get("logistics_asset", {}) or {}
+    # GeoJSON point: [lon, lat]
+    coordinates = (asset.get("geocoordinates", {}) or {}).get("coordinates") or [None, None]
+
+    assets["name"].append(asset.get("name", "Unknown"))
+    assets["asset_type"].append(asset.get("asset_type", "Logistics"))
+    assets["city"].append(asset.get("city", ""))
+    assets["country"].append(asset.get("country", ""))
+    assets["currency"].append(asset.get("currency", ""))
+    assets["area_m2"].append(float(logistics.get("area_m2") or 0))
+    assets["lon"].append(coordinates[0] if len(coordinates) > 1 else None)
+    assets["lat"].append(coordinates[1] if len(coordinates) > 1 else None)
+    assets["source"].append(source)
+
+    for lease in asset.get("leases", []) or []:
+        leases["asset_index"].append(asset_index)
+        leases["tenant"].append((lease.get("tenant", {}) or {}).get("name", "Unknown"))
+        leases["area_m2"].append(float(lease.get("area_m2") or 0))
+        leases["rent_psm_pa"].append(float(lease.get("rent_psm_pa") or 0))
+        leases["lease_start"].append(lease.get("lease_start"))
+        leases["lease_end"].append(lease.get("lease_end"))
+    return asset_index
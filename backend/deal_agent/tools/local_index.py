@@ -0,0 +1,348 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from deal_agent.utils.config import Config
+
+# Rows added to a namespace file at a time (the memmap is re-opened on growth)
+_GROWTH_ROWS = 1024
+
+
+class _Result(dict):
+    """Dict that also allows attribute access, mirroring Pinecone's response objects."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+# --- Metadata filters (Pinecone syntax) ---
+
+def _compare(value, op: str, operand) -> bool:
+    if op == "$exists":
+        return (value is not None) == bool(operand)
+    if value is None:
+        return op in ("$ne", "$nin")
+    if op == "$eq":
+        return value == operand
+    if op == "$ne":
+        return value != operand
+    if op == "$in":
+        return value in operand
+    if op == "$nin":
+        return value not in operand
+    try:
+        if op == "$gt":
+            return value > operand
+        if op == "$gte":
+            return value >= operand
+        if op == "$lt":
+            return value < operand
+        if op == "$lte":
+            return value <= operand
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+def matches_filter(metadata: Dict[str, Any], metadata_filter: Optional[Dict[str, Any]]) -> bool:
+    """Evaluates a Pinecone metadata filter ($eq/$ne/$gt/$gte/$lt/$lte/$in/$nin/$exists/$and/$or)."""
+    if not metadata_filter:
+        return True
+    for key, condition in metadata_filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, c) for c in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, c) for c in condition):
+                return False
+        else:
+            value = metadata.get(key)
+            # A list-valued field matches if any of its elements does
+            values = value if isinstance(value, list) else [value]
+            conditions = condition.items() if isinstance(condition, dict) else [("$eq", condition)]
+            for op, operand in conditions:
+                if op in ("$ne", "$nin"):
+                    ok = all(_compare(v, op, operand) for v in values)
+                else:
+                    ok = any(_compare(v, op, operand) for v in values)
+                if not ok:
+                    return False
+    return True
+
+# --- Namespace storage ---
+
+class _Namespace:
+    """
+    One namespace: unit-normalized float32 rows in a memory-mapped file, with
+    IDs and metadata held in memory and persisted to the index's SQLite file.
+    Deleted rows are zeroed and reused by later upserts.
+    """
+
+    def __init__(self, root: str, name: str, dim: int, rows: List[tuple]):
+        self.name = name
+        self.dim = dim
+        self.path = os.path.join(root, f"{name or '__default__'}.f32")
+        self.ids: List[Optional[str]] = []
+        self.metadata: List[Optional[Dict[str, Any]]] = []
+        self.rows: Dict[str, int] = {}
+        for row, record_id, meta in rows:
+            while len(self.ids) <= row:
+                self.ids.append(None)
+                self.metadata.append(None)
+            self.ids[row] = record_id
+            self.metadata[row] = meta
+            self.rows[record_id] = row
+        self.free = [row for row, record_id in enumerate(self.ids) if record_id is None]
+        self.matrix = None
+        self._open(max(len(self.ids), _GROWTH_ROWS))
+        self.ivf = None
+
+    def _open(self, capacity: int):
+        size = capacity * self.dim * 4
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < size:
+            with open(self.path, "ab") as f:
+                f.truncate(size)
+        self.matrix = np.memmap(self.path, dtype=np.float32, mode="r+",
+                                shape=(os.path.getsize(self.path) // (self.dim * 4), self.dim))
+
+    def allocate(self) -> int:
+        if self.free:
+            return self.free.pop()
+        row = len(self.ids)
+        if row >= self.matrix.shape[0]:
+            self.matrix.flush()
+            self._open(self.matrix.shape[0] + max(_GROWTH_ROWS, self.matrix.shape[0] // 2))
+            if self.ivf is not None:
+                # Grow the IVF list assignments with the matrix, so upsert can assign the new rows
+                grown = self.matrix.shape[0] - len(self.ivf["lists"])
+                self.ivf["lists"] = np.pad(self.ivf["lists"], (0, grown), constant_values=-1)
+        self.ids.append(None)
+        self.metadata.append(None)
+        return row
+
+    def alive(self) -> np.ndarray:
+        return np.fromiter((record_id is not None for record_id in self.ids), dtype=bool, count=len(self.ids))
+
+    def count(self) -> int:
+        return len(self.rows)
+
+class LocalVectorIndex:
+    """
+    In-process vector index with the subset of the Pinecone Index API the agent
+    uses: upsert, query, fetch, update, delete, list and describe_index_stats.
+
+    Vectors are stored per namespace as contiguous float32 matrices memory-mapped
+    from `root`, and searched by brute-force cosine similarity with NumPy. Namespaces
+    with at least Config.LOCAL_INDEX_IVF_MIN_VECTORS vectors are partitioned into
+    IVF lists (built in memory on first query) and only the nearest lists are scanned.
+    Safe for threads within one process; not for several processes at once.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(root, "records.sqlite"), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS namespaces (name TEXT PRIMARY KEY, dim INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS records (
+                namespace TEXT NOT NULL, id TEXT NOT NULL, row INTEGER NOT NULL, metadata TEXT,
+                PRIMARY KEY (namespace, id)
+            );
+        """)
+        self._namespaces: Dict[str, _Namespace] = {}
+        for name, dim in self._db.execute("SELECT name, dim FROM namespaces").fetchall():
+            rows = [(row, record_id, json.loads(meta) if meta else {}) for record_id, row, meta in
+                    self._db.execute("SELECT id, row, metadata FROM records WHERE namespace = ?", (name,))]
+            self._namespaces[name] = _Namespace(root, name, dim, rows)
+
+    def _namespace(self, namespace: str, dim: Optional[int] = None) -> Optional[_Namespace]:
+        ns = self._namespaces.get(namespace)
+        if ns is None and dim is not None:
+            self._db.execute("INSERT INTO namespaces (name, dim) VALUES (?, ?)", (namespace, dim))
+            ns = self._namespaces[namespace] = _Namespace(self.root, namespace, dim, [])
+        return ns
+
+    def upsert(self, vectors: List[Any], namespace: str = "", **kwargs) -> Dict[str, int]:
+        """Accepts (id, values), (id, values, metadata) tuples or {"id", "values", "metadata"} dicts."""
+        records = []
+        for vector in vectors:
+            if isinstance(vector, dict):
+                records.append((vector["id"], vector["values"], vector.get("metadata") or {}))
+            else:
+                records.append((vector[0], vector[1], vector[2] if len(vector) > 2 else {}))
+        if not records:
+            return _Result(upserted_count=0)
+
+        values = np.asarray([r[1] for r in records], dtype=np.float32)
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        values = values / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            ns = self._namespace(namespace, dim=values.shape[1])
+            if values.shape[1] != ns.dim:
+                raise ValueError(f"Vector dimension {values.shape[1]} does not match namespace dimension {ns.dim}")
+            written = []
+            for (record_id, _, meta), vector in zip(records, values):
+                row = ns.rows.get(record_id)
+                if row is None:
+                    row = ns.allocate()
+                    ns.rows[record_id] = row
+                    ns.ids[row] = record_id
+                ns.matrix[row] = vector
+                ns.metadata[row] = dict(meta)
+                written.append((namespace, record_id, row, json.dumps(meta, default=str)))
+                if ns.ivf is not None:
+                    ns.ivf["lists"][row] = int(np.argmax(ns.ivf["centroids"] @ vector))
+            ns.matrix.flush()
+            self._db.executemany("INSERT OR REPLACE INTO records (namespace, id, row, metadata) VALUES (?, ?, ?, ?)", written)
+            self._db.commit()
+        return _Result(upserted_count=len(records))
+
+    def update(self, id: str, values: Optional[List[float]] = None, set_metadata: Optional[Dict[str, Any]] = None,
+               namespace: str = "", **kwargs):
+        """Replaces the vector and/or merges keys into the metadata of an existing record."""
+        with self._lock:
+            ns = self._namespace(namespace)
+            if ns is None or id not in ns.rows:
+                return _Result()
+            row = ns.rows[id]
+            meta = {**(ns.metadata[row] or {}), **(set_metadata or {})}
+            if values is not None:
+                self.upsert([(id, values, meta)], namespace=namespace)
+            else:
+                ns.metadata[row] = meta
+                self._db.execute("UPDATE records SET metadata = ? WHERE namespace = ? AND id = ?",
+                                 (json.dumps(meta, default=str), namespace, id))
+                self._db.commit()
+        return _Result()
+
+    def fetch(self, ids: List[str], namespace: str = "", **kwargs):
+        vectors = {}
+        with self._lock:
+            ns = self._namespace(namespace)
+            for record_id in ids:
+                row = ns.rows.get(record_id) if ns else None
+                if row is not None:
+                    vectors[record_id] = _Result(id=record_id, values=ns.matrix[row].tolist(),
+                                                 metadata=dict(ns.metadata[row] or {}))
+        return _Result(vectors=vectors, namespace=namespace)
+
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False, namespace: str = "",
+               filter: Optional[Dict[str, Any]] = None, **kwargs):
+        with self._lock:
+            ns = self._namespace(namespace)
+            if ns is None:
+                return _Result()
+            if delete_all:
+                targets = list(ns.rows)
+            elif filter:
+                targets = [record_id for record_id, row in ns.rows.items() if matches_filter(ns.metadata[row], filter)]
+            else:
+                targets = [record_id for record_id in ids or [] if record_id in ns.rows]
+            for record_id in targets:
+                row = ns.rows.pop(record_id)
+                ns.ids[row] = None
+                ns.metadata[row] = None
+                ns.matrix[row] = 0
+                ns.free.append(row)
+            ns.matrix.flush()
+            self._db.executemany("DELETE FROM records WHERE namespace = ? AND id = ?",
+                                 [(namespace, record_id) for record_id in targets])
+            self._db.commit()
+        return _Result()
+
+    def list(self, prefix: str = "", namespace: str = "", limit: int = 100, **kwargs) -> Iterator[List[str]]:
+        """Yields pages of IDs starting with `prefix`, like Pinecone's list()."""
+        with self._lock:
+            ns = self._namespace(namespace)
+            ids = sorted(record_id for record_id in (ns.rows if ns else {}) if record_id.startswith(prefix))
+        for i in range(0, len(ids), limit):
+            yield ids[i:i + limit]
+
+    def _build_ivf(self, ns: _Namespace, alive: np.ndarray):
+        """k-means (a few Lloyd iterations on a sample) into ~sqrt(n) lists."""
+        rows = np.flatnonzero(alive)
+        n_lists = max(1, int(np.sqrt(len(rows))))
+        rng = np.random.default_rng(0)
+        sample = ns.matrix[rng.choice(rows, size=min(len(rows), n_lists * 40), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(10):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for k in range(n_lists):
+                members = sample[assign == k]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    centroids[k] = centroid / (np.linalg.norm(centroid) or 1)
+        lists = np.full(ns.matrix.shape[0], -1, dtype=np.int32)
+        for i in range(0, len(rows), 65536):
+            block = rows[i:i + 65536]
+            lists[block] = np.argmax(ns.matrix[block] @ centroids.T, axis=1)
+        ns.ivf = {"centroids": centroids, "lists": lists, "size": len(rows)}
+
+    def query(self, vector: List[float], top_k: int = 10, namespace: str = "",
+              filter: Optional[Dict[str, Any]] = None, include_metadata: bool = False,
+              include_values: bool = False, **kwargs):
+        with self._lock:
+            ns = self._namespace(namespace)
+            if ns is None or not ns.rows:
+                return _Result(matches=[], namespace=namespace)
+            query = np.asarray(vector, dtype=np.float32)
+            query = query / (np.linalg.norm(query) or 1)
+            n = len(ns.ids)
+            candidates = ns.alive()
+
+            if n >= Config.LOCAL_INDEX_IVF_MIN_VECTORS:
+                # Rebuild the partitioning once the namespace has grown or shrunk by a quarter
+                if ns.ivf is None or abs(ns.count() - ns.ivf["size"]) > ns.ivf["size"] // 4:
+                    self._build_ivf(ns, candidates)
+                if len(ns.ivf["lists"]) < ns.matrix.shape[0]:
+                    ns.ivf["lists"] = np.pad(ns.ivf["lists"], (0, ns.matrix.shape[0] - len(ns.ivf["lists"])), constant_values=-1)
+                nearest = np.argsort(-(ns.ivf["centroids"] @ query))[:Config.LOCAL_INDEX_IVF_PROBES]
+                candidates &= np.isin(ns.ivf["lists"][:n], nearest)
+
+            if filter:
+                candidates &= np.fromiter((meta is not None and matches_filter(meta, filter) for meta in ns.metadata),
+                                          dtype=bool, count=n)
+            rows = np.flatnonzero(candidates)
+            if not len(rows):
+                return _Result(matches=[], namespace=namespace)
+
+            # A dense scan beats gathering scattered rows when most rows are candidates
+            scores = (ns.matrix[:n] @ query)[rows] if len(rows) * 2 > n else ns.matrix[rows] @ query
+            k = min(top_k, len(rows))
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            matches = []
+            for i in best:
+                row = int(rows[i])
+                matches.append(_Result(
+                    id=ns.ids[row],
+                    score=float(scores[i]),
+                    values=ns.matrix[row].tolist() if include_values else [],
+                    metadata=dict(ns.metadata[row] or {}) if include_metadata else None,
+                ))
+        return _Result(matches=matches, namespace=namespace)
+
+    def describe_index_stats(self, **kwargs):
+        with self._lock:
+            namespaces = {name: _Result(vector_count=ns.count()) for name, ns in self._namespaces.items()}
+            dims = {ns.dim for ns in self._namespaces.values()}
+        return _Result(dimension=dims.pop() if len(dims) == 1 else None,
+                       total_vector_count=sum(ns.vector_count for ns in namespaces.values()),
+                       namespaces=namespaces)
+
+_local_indexes: Dict[str, LocalVectorIndex] = {}
+_local_lock = threading.Lock()
+
+def get_local_index(index_name: str) -> LocalVectorIndex:
+    """Process-wide local index stored under Config.LOCAL_INDEX_DIR/<index_name>."""
+    with _local_lock:
+        if index_name not in _local_indexes:
+            _local_indexes[index_name] = LocalVectorIndex(os.path.join(Config.LOCAL_INDEX_DIR, index_name))
+        return _local_indexes[index_name]
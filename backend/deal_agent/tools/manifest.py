@@ -0,0 +1,152 @@
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import inspect, text
+from sqlmodel import Session, SQLModel, select
+
+from api.database import engine
+from api.models import Document
+from deal_agent.tools.parse_cache import file_sha256
+from deal_agent.tools.vector_store import vector_backend
+
+_tables_ready = False
+# Parallel ingestion branches can hit the manifest at the same time on first use
+_tables_lock = threading.Lock()
+
+
+def _ensure_table():
+    global _tables_ready
+    with _tables_lock:
+        if not _tables_ready:
+            SQLModel.metadata.create_all(engine, tables=[Document.__table__])
+            # create_all does not add columns to an existing table; add manifest columns introduced later
+            existing = {column["name"] for column in inspect(engine).get_columns(Document.__tablename__)}
+            with engine.begin() as conn:
+                for column in Document.__table__.columns:
+                    if column.name not in existing:
+                        conn.execute(text(f"ALTER TABLE {Document.__tablename__} ADD COLUMN {column.name} "
+                                          f"{column.type.compile(engine.dialect)}"))
+            _tables_ready = True
+
+def deal_key(deal_id: Any) -> int:
+    """documents.deal_id is an integer; non-numeric agent deal IDs map to 0 (unassigned)."""
+    try:
+        return int(deal_id)
+    except (TypeError, ValueError):
+        return 0
+
+def deal_ref(deal_id: Any) -> str:
+    """Manifest key: the agent's deal ID verbatim, so non-numeric IDs never share rows."""
+    return str(deal_id)
+
+def diff_data_room(deal_id: Any, data_root: str, subdir: str, extension: str) -> Dict[str, Any]:
+    """
+    Compares the files in data_root/subdir against the deal's manifest rows.
+
+    Size and mtime are checked first; the file is only re-hashed when they differ,
+    so an unchanged data room costs one stat() per file. New files get a manifest
+    row, changed files have their parse/embed status reset.
+
+    Returns:
+        {"added": [path], "changed": [path], "unchanged": [path], "removed": [path],
+         "documents": {path: {"parse_status", "embed_status", "content_hash"}}}
+        Paths are relative to `data_root` (e.g. "raw_pdfs/report.pdf").
+    """
+    _ensure_table()
+    ref = deal_ref(deal_id)
+    directory = os.path.join(data_root, subdir)
+    on_disk = sorted(f for f in os.listdir(directory) if f.endswith(extension)) if os.path.isdir(directory) else []
+    file_type = extension.lstrip(".")
+
+    diff: Dict[str, Any] = {"added": [], "changed": [], "unchanged": [], "removed": [], "documents": {}}
+    with Session(engine) as session:
+        rows = session.exec(
+            select(Document).where(Document.deal_ref == ref, Document.file_type == file_type)
+        ).all()
+        by_path = {row.path: row for row in rows if row.path and row.path.startswith(f"{subdir}/")}
+
+        for filename in on_disk:
+            rel_path = f"{subdir}/{filename}"
+            stat = os.stat(os.path.join(directory, filename))
+            row = by_path.pop(rel_path, None)
+
+            if row is None:
+                row = Document(deal_id=deal_key(deal_id), deal_ref=ref, filename=filename, file_type=file_type,
+                               path=rel_path, uploaded_at=datetime.now(timezone.utc), size_bytes=stat.st_size, mtime=stat.st_mtime,
+                               content_hash=file_sha256(os.path.join(directory, filename)))
+                session.add(row)
+                diff["added"].append(rel_path)
+            elif row.size_bytes == stat.st_size and row.mtime == stat.st_mtime:
+                diff["unchanged"].append(rel_path)
+            else:
+                content_hash = file_sha256(os.path.join(directory, filename))
+                if content_hash == row.content_hash:
+                    # Touched but identical (e.g. re-copied): just refresh the stat fields
+                    diff["unchanged"].append(rel_path)
+                else:
+                    row.content_hash = content_hash
+                    row.parse_status = "pending"
+                    row.embed_status = "pending"
+                    diff["changed"].append(rel_path)
+                row.size_bytes, row.mtime = stat.st_size, stat.st_mtime
+                session.add(row)
+
+            diff["documents"][rel_path] = {"parse_status": row.parse_status, "embed_status": row.embed_status,
+                                           "embed_backend": row.embed_backend, "content_hash": row.content_hash}
+
+        # Rows left over no longer exist on disk; they are deleted once their vectors are
+        diff["removed"] = sorted(by_path)
+        session.commit()
+    return diff
+
+def needs_stage(diff: Dict[str, Any], rel_path: str, stage: str) -> bool:
+    """
+    True when a file is new, changed, or has not completed `stage` ('parse' or 'embed').
+    Embeddings stored in another vector backend (Pinecone vs local) count as not done.
+    """
+    if rel_path in diff["added"] or rel_path in diff["changed"]:
+        return True
+    document = diff["documents"].get(rel_path, {})
+    if stage == "embed" and document.get("embed_backend") != vector_backend():
+        return True
+    done = {"parse": "parsed", "embed": "embedded"}[stage]
+    return document.get(f"{stage}_status") != done
+
+def mark_stage(deal_id: Any, rel_paths: List[str], stage: str, ok: bool = True):
+    """Records parse/embed completion (or failure) for the given files."""
+    if not rel_paths:
+        return
+    _ensure_table()
+    status = {"parse": "parsed", "embed": "embedded"}[stage] if ok else "failed"
+    with Session(engine) as session:
+        rows = session.exec(
+            select(Document).where(Document.deal_ref == deal_ref(deal_id), Document.path.in_(rel_paths))
+        ).all()
+        for row in rows:
+            setattr(row, f"{stage}_status", status)
+            setattr(row, {"parse": "parsed_at", "embed": "embedded_at"}[stage], datetime.now(timezone.utc))
+            if stage == "embed":
+                row.embed_backend = vector_backend()
+            session.add(row)
+        session.commit()
+
+def forget_documents(deal_id: Any, rel_paths: List[str]):
+    """Deletes manifest rows for files removed from the data room (after their vectors)."""
+    if not rel_paths:
+        return
+    _ensure_table()
+    with Session(engine) as session:
+        rows = session.exec(
+            select(Document).where(Document.deal_ref == deal_ref(deal_id), Document.path.in_(rel_paths))
+        ).all()
+        for row in rows:
+            session.delete(row)
+        session.commit()
+
+def summarize_diff(diff: Optional[Dict[str, Any]]) -> str:
+    if not diff:
+        return ""
+    return (f"{len(diff['added'])} new, {len(diff['changed'])} changed, "
+            f"{len(diff['unchanged'])} unchanged, {len(diff['removed'])} removed")
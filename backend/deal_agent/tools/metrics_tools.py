@@ -0,0 +1,149 @@
+import numpy as np
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+def _parse_date(value) -> Optional[date]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+def _lease_rent_psm(lease: dict) -> float:
+    # load_json_data stores the EUR PSM normalized rent on each lease; fall back to the raw figure
+    rent = lease.get("display_rent_eur_psm", lease.get("rent_psm_pa", 0))
+    try:
+        return float(rent or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def _summarize(gla: float, areas: np.ndarray, rents_psm: np.ndarray, years_left: np.ndarray) -> Dict[str, Any]:
+    """
+    Core calculation over the lease arrays of one asset (or the whole portfolio).
+    Only leases with unexpired terms count towards occupancy, WALT and in-place rent.
+    """
+    active = years_left > 0
+    leased = float(areas[active].sum())
+    rent_pa = areas[active] * rents_psm[active]
+    total_rent = float(rent_pa.sum())
+
+    return {
+        "total_gla_m2": round(gla, 2),
+        "leased_area_m2": round(min(leased, gla) if gla > 0 else leased, 2),
+        "occupancy": round(min(leased / gla, 1.0), 4) if gla > 0 else 0.0,
+        # WALT: income-weighted average unexpired term
+        "walt_years": round(float((rent_pa * years_left[active]).sum() / total_rent), 2) if total_rent > 0 else 0.0,
+        "in_place_rent_pa": round(total_rent, 2),
+        "in_place_rent_psm": round(total_rent / leased, 2) if leased > 0 else 0.0,
+        "lease_count": int(len(areas)),
+        "active_lease_count": int(active.sum()),
+    }
+
+def _years_left(ends: List[Any], as_of: date) -> np.ndarray:
+    # Leases without an end date are treated as expired (no contracted income to count)
+    dates = [_parse_date(e) for e in ends]
+    return np.array([(e - as_of).days / 365.25 if e else 0.0 for e in dates], dtype=np.float64)
+
+def _portfolio_metrics(assets: List[Tuple[str, str, float, np.ndarray, np.ndarray, np.ndarray]],
+                       as_of: date) -> Dict[str, Any]:
+    """Per-asset and portfolio metrics from (name, city, gla, areas, rents_psm, years_left) per asset."""
+    per_asset = []
+    total_gla = 0.0
+    for name, city, gla, areas, rents, years_left in assets:
+        if gla <= 0:
+            gla = float(areas.sum())
+        total_gla += gla
+        asset_metrics = _summarize(gla, areas, rents, years_left)
+        asset_metrics["name"] = name
+        asset_metrics["city"] = city
+        per_asset.append(asset_metrics)
+
+    if assets:
+        # Portfolio leased area is the sum of per-asset (capped) leased area, not raw lease area
+        metrics = _summarize(
+            total_gla,
+            np.concatenate([a[3] for a in assets]),
+            np.concatenate([a[4] for a in assets]),
+            np.concatenate([a[5] for a in assets]),
+        )
+        leased = sum(a["leased_area_m2"] for a in per_asset)
+        metrics["leased_area_m2"] = round(leased, 2)
+        metrics["occupancy"] = round(leased / total_gla, 4) if total_gla > 0 else 0.0
+    else:
+        metrics = _summarize(0.0, np.zeros(0), np.zeros(0), np.zeros(0))
+
+    metrics["as_of"] = as_of.isoformat()
+    metrics["asset_count"] = len(assets)
+    metrics["assets"] = per_asset
+    return metrics
+
+def compute_lease_metrics(source_json: dict, as_of: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Computes Total GLA, Occupancy, WALT and In-Place Rent deterministically from the
+    asset and lease arrays in the structured JSON bundle.
+
+    Args:
+        source_json: The structured deal bundle ({"assets": [...]}).
+        as_of: Valuation date for unexpired terms. Defaults to today.
+
+    Returns:
+        Portfolio-level metrics plus a per-asset breakdown under 'assets'.
+    """
+    as_of = as_of or date.today()
+    rows = []
+    for asset in (source_json or {}).get("assets", []) or []:
+        leases = asset.get("leases", []) or []
+        rows.append((
+            asset.get("name", "Unknown"),
+            asset.get("city", ""),
+            float((asset.get("logistics_asset", {}) or {}).get("area_m2") or 0),
+            np.array([float(l.get("area_m2") or 0) for l in leases], dtype=np.float64),
+            np.array([_lease_rent_psm(l) for l in leases], dtype=np.float64),
+            _years_left([l.get("lease_end") for l in leases], as_of),
+        ))
+    return _portfolio_metrics(rows, as_of)
+
+def compute_column_metrics(columns: Dict[str, Dict[str, list]], as_of: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Same metrics as compute_lease_metrics, from the columnar asset/lease tables
+    built while streaming the bundles (json_stream), so every asset counts even
+    when state only keeps a sample of the records.
+    """
+    as_of = as_of or date.today()
+    assets = (columns or {}).get("assets", {})
+    leases = (columns or {}).get("leases", {})
+    count = len(assets.get("name", []))
+    rents_all = np.asarray(leases.get("rent_eur_psm", []), dtype=np.float64)
+    lease_count = len(rents_all)
+    owners = np.asarray(leases.get("asset_index", [])[:lease_count], dtype=np.int64)
+    areas_all = np.asarray(leases.get("area_m2", [])[:lease_count], dtype=np.float64)
+    years_all = _years_left(leases.get("lease_end", [])[:lease_count], as_of)
+
+    # Lease rows are appended asset by asset, so each asset's leases are one contiguous slice
+    bounds = np.searchsorted(owners, np.arange(count + 1))
+    rows = []
+    for i in range(count):
+        lease_rows = slice(bounds[i], bounds[i + 1])
+        rows.append((assets["name"][i], assets["city"][i], float(assets["area_m2"][i] or 0),
+                     areas_all[lease_rows], rents_all[lease_rows], years_all[lease_rows]))
+    return _portfolio_metrics(rows, as_of)
+
+def format_metrics_summary(metrics: Dict[str, Any], highlights: Optional[List[str]] = None) -> str:
+    """
+    Formats computed metrics (and optional LLM highlights) as the markdown summary shown in chat.
+    """
+    lines = [
+        "### Compute Metrics and Deal Summary",
+        f"- **Total GLA**: {metrics.get('total_gla_m2', 0):,.0f} sqm across {metrics.get('asset_count', 0)} asset(s)",
+        f"- **Occupancy**: {metrics.get('occupancy', 0):.1%} ({metrics.get('active_lease_count', 0)} of {metrics.get('lease_count', 0)} leases active as of {metrics.get('as_of')})",
+        f"- **WALT**: {metrics.get('walt_years', 0):.1f} years",
+        f"- **In-Place Rent**: €{metrics.get('in_place_rent_pa', 0):,.0f} p.a. (€{metrics.get('in_place_rent_psm', 0):,.2f}/sqm)",
+    ]
+    for i, highlight in enumerate(highlights or [], start=1):
+        lines.append(f"- **Key Highlight {i}**: {highlight}")
+    return "\n".join(lines)
@@ -0,0 +1,147 @@
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+from deal_agent.utils.config import Config
+
+# All rents are reported in the model currency per square metre per year
+TARGET_CURRENCY = "EUR"
+TARGET_UNIT = "sqm"
+
+CURRENCY_SYMBOLS = {"EUR": "€", "GBP": "£", "USD": "$", "CHF": "CHF "}
+UNIT_LABELS = {"sqm": "PSM", "sqft": "PSF"}
+
+
+def infer_rent_units(rents: np.ndarray, currencies: np.ndarray) -> np.ndarray:
+    """
+    Guesses the area unit each rent is quoted in. Markets listed in
+    Config.PSF_RENT_THRESHOLDS quote per sq ft, so a rent below the market's
+    threshold (e.g. £5.50 in the UK) is read as per sq ft, anything else per sqm.
+    """
+    keys, inverse = np.unique(currencies.astype(str), return_inverse=True)
+    thresholds = np.array([Config.PSF_RENT_THRESHOLDS.get(k, 0) for k in keys], dtype=np.float64)[inverse]
+    return np.where((rents > 0) & (rents < thresholds), "sqft", TARGET_UNIT)
+
+def normalize_rents(rents, currencies, units=None) -> Dict[str, np.ndarray]:
+    """
+    Converts a column of rents to EUR per sqm per year in one pass.
+
+    FX rates come from Config.FX_RATES_TO_EUR and area factors from
+    Config.AREA_UNITS_PER_SQM; lookups are done once per distinct currency/unit,
+    not per record. Unknown currencies are left unconverted and flagged.
+
+    Returns arrays aligned with the input: rent_eur_psm, fx_rate, unit_factor,
+    source_unit, currency, fx_known.
+    """
+    rents = np.nan_to_num(np.asarray(rents, dtype=np.float64))
+    currencies = np.asarray(currencies, dtype=object).astype(str)
+    units = infer_rent_units(rents, currencies) if units is None else np.asarray(units, dtype=object).astype(str)
+
+    keys, inverse = np.unique(currencies, return_inverse=True)
+    fx = np.array([Config.FX_RATES_TO_EUR.get(k, np.nan) for k in keys], dtype=np.float64)[inverse]
+    fx_known = ~np.isnan(fx)
+    fx = np.where(fx_known, fx, 1.0)
+
+    unit_keys, unit_inverse = np.unique(units, return_inverse=True)
+    unit_factor = np.array([Config.AREA_UNITS_PER_SQM.get(k, 1.0) for k in unit_keys], dtype=np.float64)[unit_inverse]
+
+    return {
+        # Rent per sq ft * sq ft per sqm = rent per sqm
+        "rent_eur_psm": rents * unit_factor * fx,
+        "fx_rate": fx,
+        "unit_factor": unit_factor,
+        "source_unit": units,
+        "currency": currencies,
+        "fx_known": fx_known,
+    }
+
+def conversion_labels(rents, normalized: Dict[str, np.ndarray]) -> List[str]:
+    """Per-record description of the applied conversion ("" when the rent was already EUR PSM)."""
+    labels = []
+    for raw, currency, unit, fx, factor, known, converted in zip(
+            rents, normalized["currency"], normalized["source_unit"], normalized["fx_rate"],
+            normalized["unit_factor"], normalized["fx_known"], normalized["rent_eur_psm"]):
+        if not known:
+            labels.append(f"Unknown currency '{currency}', not converted")
+        elif fx == 1.0 and factor == 1.0:
+            labels.append("")
+        else:
+            symbol = CURRENCY_SYMBOLS.get(currency, f"{currency} ")
+            labels.append(f"Converted from {symbol}{raw} {UNIT_LABELS.get(unit, unit)} to €{converted:.2f} PSM")
+    return labels
+
+def normalize_lease_columns(columns: Dict[str, Dict[str, list]], default_currency: Optional[str] = None) -> Tuple[int, int]:
+    """
+    Fills the normalized lease and asset columns for rows appended since the last call.
+
+    Lease currency is taken from the owning asset. New lease rows always belong
+    to assets appended in the same batch, so only those assets' currencies are
+    looked up and each call costs O(batch), however many assets came before.
+    Returns the (start, end) range of lease rows that were normalized.
+    """
+    default_currency = default_currency or Config.DEFAULT_ASSET_CURRENCY
+    assets, leases = columns["assets"], columns["leases"]
+    start, end = len(leases["rent_eur_psm"]), len(leases["rent_psm_pa"])
+    asset_start, asset_end = len(assets["rent_eur_psm"]), len(assets["name"])
+
+    asset_index = np.asarray(leases["asset_index"][start:end], dtype=np.int64)
+    local = asset_index - asset_start
+    batch_currency = np.array([c or default_currency for c in assets["currency"][asset_start:asset_end]], dtype=object)
+    raw = np.asarray(leases["rent_psm_pa"][start:end], dtype=np.float64)
+    normalized = normalize_rents(raw, batch_currency[local] if end > start else np.array([], dtype=object))
+
+    leases["rent_eur_psm"].extend(np.round(normalized["rent_eur_psm"], 2).tolist())
+    leases["fx_rate"].extend(normalized["fx_rate"].tolist())
+    leases["unit_factor"].extend(normalized["unit_factor"].tolist())
+    leases["source_unit"].extend(normalized["source_unit"].tolist())
+    leases["rent_conversion"].extend(conversion_labels(raw.tolist(), normalized))
+
+    # Area-weighted average rent of each newly added asset
+    if asset_end > asset_start:
+        area = np.asarray(leases["area_m2"][start:end], dtype=np.float64)
+        count = asset_end - asset_start
+        rent_mass = np.bincount(local, weights=normalized["rent_eur_psm"] * area, minlength=count)
+        area_sum = np.bincount(local, weights=area, minlength=count)
+        average = np.divide(rent_mass, area_sum, out=np.zeros(count), where=area_sum > 0)
+        assets["rent_eur_psm"].extend(np.round(average, 2).tolist())
+    return start, end
+
+def annotate_asset_records(records: List[Dict[str, Any]], columns: Dict[str, Dict[str, list]],
+                           asset_start: int, lease_start: int):
+    """
+    Writes the normalized figures back onto the asset/lease dicts, so nodes that
+    read the records (metrics, deck, prompts) use the same numbers as the columns.
+    """
+    leases = columns["leases"]
+    row = lease_start
+    for offset, asset in enumerate(records):
+        asset["rent_eur_psm"] = columns["assets"]["rent_eur_psm"][asset_start + offset]
+        for lease in asset.get("leases", []) or []:
+            lease["display_rent_eur_psm"] = leases["rent_eur_psm"][row]
+            lease["rent_conversion"] = leases["rent_conversion"][row]
+            row += 1
+
+def normalize_comp_records(comps: List[Dict[str, Any]], default_currency: str = TARGET_CURRENCY):
+    """Adds rent_eur_psm and rent_conversion to a batch of comparable records in place."""
+    if not comps:
+        return
+    raw = [float(c.get("rent_psm_pa") or 0) for c in comps]
+    currencies = [c.get("currency") or default_currency for c in comps]
+    units = [c.get("rent_unit") or None for c in comps]
+    # Explicit units win; otherwise fall back to the per-market heuristic
+    inferred = infer_rent_units(np.asarray(raw, dtype=np.float64), np.asarray(currencies, dtype=object))
+    units = [u or i for u, i in zip(units, inferred.tolist())]
+    normalized = normalize_rents(raw, currencies, units)
+    for comp, rent, label in zip(comps, np.round(normalized["rent_eur_psm"], 2).tolist(), conversion_labels(raw, normalized)):
+        comp["rent_eur_psm"] = rent
+        comp["rent_conversion"] = label
+
+def passing_rent_summary(columns: Optional[Dict[str, Dict[str, list]]]) -> Dict[str, Any]:
+    """Area-weighted passing rent (EUR PSM) across all leases plus the distinct conversions applied."""
+    leases = (columns or {}).get("leases", {})
+    rents = np.asarray(leases.get("rent_eur_psm", []), dtype=np.float64)
+    areas = np.asarray(leases.get("area_m2", [])[:len(rents)], dtype=np.float64)
+    total_area = float(areas.sum())
+    return {
+        "rent_eur_psm": round(float((rents * areas).sum() / total_area), 2) if total_area > 0 else 0.0,
+        "conversions": sorted({label for label in leases.get("rent_conversion", []) if label}),
+    }
@@ -0,0 +1,104 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+import pdfminer
+
+from deal_agent.utils.config import Config
+
+# Bump the suffix whenever the extraction output changes shape or content,
+# so stale entries are never served after a parser upgrade.
+PARSER_VERSION = f"pdfminer-{pdfminer.__version__}-pages3"
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _cache_path(sha256: str, cache_dir: str) -> str:
+    # Two-level fan-out keeps directory listings small for large data rooms
+    return os.path.join(cache_dir, sha256[:2], f"{sha256}.{PARSER_VERSION}.json.gz")
+
+def get_cached_parse(sha256: str, cache_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Returns the cached parse for a file hash ({"pages": [...], ...}) or None.
+    A hit refreshes the entry's mtime, which eviction uses as its LRU clock.
+    """
+    path = _cache_path(sha256, cache_dir or Config.PDF_CACHE_DIR)
+    if not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            entry = json.load(f)
+        os.utime(path, None)
+        return entry
+    except Exception as e:
+        # Corrupt or partially written entry: drop it and re-parse
+        print(f"Discarding unreadable parse cache entry {path}: {e}")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+def put_cached_parse(sha256: str, entry: Dict[str, Any], cache_dir: Optional[str] = None):
+    """Stores a parse result atomically, then trims the cache back under its size limit."""
+    cache_dir = cache_dir or Config.PDF_CACHE_DIR
+    path = _cache_path(sha256, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Unique per writer: threads of one process may store the same hash at once
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+            json.dump({**entry, "sha256": sha256, "parser_version": PARSER_VERSION}, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Could not write parse cache entry for {sha256[:12]}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    evict_parse_cache(cache_dir)
+
+def evict_parse_cache(cache_dir: Optional[str] = None, max_bytes: Optional[int] = None) -> int:
+    """
+    Deletes least recently used entries until the cache fits in `max_bytes`.
+    Returns the number of entries removed.
+    """
+    cache_dir = cache_dir or Config.PDF_CACHE_DIR
+    max_bytes = Config.PDF_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    entries = []
+    total = 0
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            if not name.endswith(".json.gz"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            removed += 1
+        except OSError:
+            pass
+    return removed
@@ -0,0 +1,273 @@
+import zlib
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Tuple
+
+# Slide-sized pages (10in x 7.5in, the python-pptx default) in PDF points
+PAGE_WIDTH = 720
+PAGE_HEIGHT = 540
+
+# Helvetica advance widths (1/1000 em) for printable ASCII, from the standard AFM metrics.
+# Characters outside this range fall back to the average digit width.
+_HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+_DEFAULT_WIDTH = 556
+# Helvetica-Bold is slightly wider; a flat factor is close enough for wrapping
+_BOLD_FACTOR = 1.06
+
+_FONTS = {False: "F1", True: "F2"}
+
+# Theme colours (RGB 0-1)
+DARK = (0.12, 0.16, 0.22)
+ACCENT = (0.16, 0.38, 0.62)
+MUTED = (0.45, 0.48, 0.52)
+LIGHT = (0.93, 0.95, 0.97)
+NEGATIVE = (0.75, 0.25, 0.25)
+
+
+def text_width(text: str, size: float, bold: bool = False) -> float:
+    """Approximate rendered width of `text` in points."""
+    total = 0
+    for ch in text:
+        code = ord(ch)
+        total += _HELVETICA_WIDTHS[code - 32] if 32 <= code <= 126 else _DEFAULT_WIDTH
+    width = total * size / 1000.0
+    return width * _BOLD_FACTOR if bold else width
+
+def wrap_text(text: str, max_width: float, size: float, bold: bool = False) -> List[str]:
+    """Greedy word wrap that keeps explicit line breaks (\\n and the PPTX vertical tab)."""
+    lines = []
+    for raw_line in text.replace("\v", "\n").split("\n"):
+        words = raw_line.split(" ")
+        current = ""
+        for word in words:
+            candidate = f"{current} {word}" if current else word
+            if text_width(candidate, size, bold) <= max_width or not current:
+                current = candidate
+            else:
+                lines.append(current)
+                current = word
+        lines.append(current)
+    return lines
+
+def _escape(text: str) -> bytes:
+    # Standard 14 fonts with WinAnsiEncoding cover €, £, • and ² via cp1252
+    raw = text.encode("cp1252", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+def _rgb(color: Tuple[float, float, float]) -> str:
+    return " ".join(f"{c:.3f}" for c in color)
+
+
+class PdfPage:
+    """
+    Collects drawing operators for one page. Coordinates are top-left based, in points.
+    """
+
+    def __init__(self, width: float, height: float):
+        self.width = width
+        self.height = height
+        self._ops: List[bytes] = []
+
+    def text(self, x: float, y: float, text: str, size: float = 12, bold: bool = False,
+             color: Tuple[float, float, float] = DARK):
+        baseline = self.height - y - size
+        self._ops.append(
+            b"BT /%s %.1f Tf %s rg %.2f %.2f Td (" % (_FONTS[bold].encode(), size, _rgb(color).encode(), x, baseline)
+            + _escape(text) + b") Tj ET"
+        )
+
+    def text_block(self, x: float, y: float, text: str, max_width: float, size: float = 12,
+                   bold: bool = False, color: Tuple[float, float, float] = DARK,
+                   leading: float = 1.35, max_y: Optional[float] = None) -> float:
+        """Draws wrapped text and returns the y position below the last drawn line."""
+        line_height = size * leading
+        for line in wrap_text(text, max_width, size, bold):
+            if max_y is not None and y + line_height > max_y:
+                self.text(x, y, "...", size, bold, color)
+                return y + line_height
+            if line:
+                self.text(x, y, line, size, bold, color)
+            y += line_height
+        return y
+
+    def rect(self, x: float, y: float, w: float, h: float,
+             fill: Optional[Tuple[float, float, float]] = None,
+             stroke: Optional[Tuple[float, float, float]] = None, line_width: float = 0.5):
+        bottom = self.height - y - h
+        ops = []
+        if fill:
+            ops.append(f"{_rgb(fill)} rg")
+        if stroke:
+            ops.append(f"{_rgb(stroke)} RG {line_width:.2f} w")
+        paint = "B" if fill and stroke else ("f" if fill else "S")
+        ops.append(f"{x:.2f} {bottom:.2f} {w:.2f} {h:.2f} re {paint}")
+        self._ops.append(" ".join(ops).encode())
+
+    def line(self, x1: float, y1: float, x2: float, y2: float,
+             color: Tuple[float, float, float] = MUTED, line_width: float = 0.5):
+        self._ops.append(
+            f"{_rgb(color)} RG {line_width:.2f} w {x1:.2f} {self.height - y1:.2f} m "
+            f"{x2:.2f} {self.height - y2:.2f} l S".encode()
+        )
+
+    def content(self) -> bytes:
+        return b"\n".join(self._ops)
+
+
+class PdfStreamWriter:
+    """
+    Minimal PDF 1.4 writer that emits each page to `stream` as soon as it is finished.
+    Only the page tree, catalog and cross-reference table are written at close(), so
+    memory use stays flat no matter how many pages are rendered.
+
+    Usage:
+        writer = PdfStreamWriter(buffer)
+        page = writer.new_page()
+        page.text(40, 40, "Hello")
+        writer.finish_page(page)
+        writer.close()
+    """
+
+    # Fixed object numbers: 1 catalog, 2 page tree, 3-4 fonts
+    _CATALOG, _PAGES, _FONT_REGULAR, _FONT_BOLD = 1, 2, 3, 4
+
+    def __init__(self, stream: BinaryIO, width: float = PAGE_WIDTH, height: float = PAGE_HEIGHT,
+                 compress: bool = True):
+        self.stream = stream
+        self.width = width
+        self.height = height
+        self.compress = compress
+        self._offsets: Dict[int, int] = {}
+        self._page_ids: List[int] = []
+        self._next_id = 5
+        self._position = 0
+        self._closed = False
+
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        for obj_id, font in ((self._FONT_REGULAR, b"Helvetica"), (self._FONT_BOLD, b"Helvetica-Bold")):
+            self._write_object(obj_id, b"<< /Type /Font /Subtype /Type1 /BaseFont /" + font +
+                               b" /Encoding /WinAnsiEncoding >>")
+
+    def _write(self, data: bytes):
+        self.stream.write(data)
+        self._position += len(data)
+
+    def _write_object(self, obj_id: int, body: bytes):
+        self._offsets[obj_id] = self._position
+        self._write(b"%d 0 obj\n" % obj_id + body + b"\nendobj\n")
+
+    def _allocate(self) -> int:
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_ids)
+
+    def new_page(self) -> PdfPage:
+        return PdfPage(self.width, self.height)
+
+    def finish_page(self, page: PdfPage):
+        content = page.content()
+        content_id, page_id = self._allocate(), self._allocate()
+
+        if self.compress:
+            data = zlib.compress(content, 6)
+            header = b"<< /Length %d /Filter /FlateDecode >>" % len(data)
+        else:
+            data = content
+            header = b"<< /Length %d >>" % len(data)
+        self._write_object(content_id, header + b"\nstream\n" + data + b"\nendstream")
+
+        self._write_object(page_id, (
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> /Contents %d 0 R >>"
+        ) % (self._PAGES, int(page.width), int(page.height), self._FONT_REGULAR, self._FONT_BOLD, content_id))
+        self._page_ids.append(page_id)
+
+        if hasattr(self.stream, "flush"):
+            self.stream.flush()
+
+    def close(self):
+        if self._closed:
+            return
+        kids = b" ".join(b"%d 0 R" % pid for pid in self._page_ids)
+        self._write_object(self._PAGES, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._page_ids)))
+        self._write_object(self._CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % self._PAGES)
+
+        xref_offset = self._position
+        size = self._next_id
+        xref = [b"xref\n0 %d\n" % size, b"0000000000 65535 f \n"]
+        for obj_id in range(1, size):
+            xref.append(b"%010d 00000 n \n" % self._offsets.get(obj_id, 0))
+        self._write(b"".join(xref))
+        self._write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, self._CATALOG, xref_offset))
+        self._closed = True
+
+
+# --- Components --------------------------------------------------------------
+
+def draw_table(page: PdfPage, x: float, y: float, width: float, headers: Sequence[str],
+               rows: Sequence[Sequence[Any]], size: float = 10, max_y: Optional[float] = None) -> float:
+    """Draws a simple grid table with a shaded header row and returns the y below it."""
+    if not headers:
+        return y
+    col_width = width / len(headers)
+    row_height = size * 1.8
+
+    page.rect(x, y, width, row_height, fill=ACCENT)
+    for i, header in enumerate(headers):
+        page.text(x + i * col_width + 4, y + size * 0.4, str(header), size, bold=True, color=(1, 1, 1))
+    y += row_height
+
+    for r, row in enumerate(rows):
+        if max_y is not None and y + row_height > max_y:
+            page.text(x + 4, y + size * 0.4, f"... {len(rows) - r} more rows", size, color=MUTED)
+            return y + row_height
+        if r % 2 == 1:
+            page.rect(x, y, width, row_height, fill=LIGHT)
+        for i, value in enumerate(row):
+            cell = str(value)
+            while len(cell) > 1 and text_width(cell, size) > col_width - 8:
+                cell = cell[:-2] + "…"
+            page.text(x + i * col_width + 4, y + size * 0.4, cell, size)
+        y += row_height
+    page.line(x, y, x + width, y)
+    return y
+
+def draw_bar_chart(page: PdfPage, x: float, y: float, width: float, height: float,
+                   values: Sequence[float], labels: Optional[Sequence[str]] = None,
+                   title: Optional[str] = None, size: float = 9):
+    """Draws a vertical bar chart scaled to the value range, with a zero baseline."""
+    if title:
+        page.text(x, y, title, size + 2, bold=True)
+        y += (size + 2) * 1.8
+        height -= (size + 2) * 1.8
+    values = [float(v or 0) for v in values]
+    if not values:
+        return
+
+    label_space = size * 1.8
+    plot_height = height - label_space
+    hi = max(max(values), 0.0)
+    lo = min(min(values), 0.0)
+    span = (hi - lo) or 1.0
+    zero_y = y + plot_height * (hi / span)
+
+    slot = width / len(values)
+    bar_width = slot * 0.6
+    for i, value in enumerate(values):
+        bar_x = x + i * slot + (slot - bar_width) / 2
+        bar_h = plot_height * abs(value) / span
+        top = zero_y - bar_h if value >= 0 else zero_y
+        page.rect(bar_x, top, bar_width, bar_h, fill=ACCENT if value >= 0 else NEGATIVE)
+        if labels and i < len(labels):
+            label = str(labels[i])
+            page.text(bar_x + (bar_width - text_width(label, size)) / 2, y + plot_height + size * 0.4, label, size, color=MUTED)
+    page.line(x, zero_y, x + width, zero_y, color=DARK)
@@ -1,24 +1,346 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
 from langchain_core.tools import tool
-from pdfminer.high_level import extract_text
-from typing import Any
+from pdfminer.converter import PDFPageAggregator
+from pdfminer.layout import LAParams, LTContainer, LTPage, LTText, LTTextBox
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+
+from deal_agent.tools.parse_cache import file_sha256, get_cached_parse, put_cached_parse
+from deal_agent.tools.table_extractor import extract_page_tables
+from deal_agent.utils.config import Config
 
 @tool
 def parse_pdf_document(file_path: str) -> str:
     """
     Parse a PDF document and extract its text content.
     Useful for ingesting CIMs, NDAs, or financial reports.
-    
+
     Args:
         file_path: The absolute path to the PDF file.
     """
     try:
-        # Using pdfminer.six directly to avoid unstructured dependency issues
-        text_content = extract_text(file_path)
-        
-        # Truncate if too long for a single tool output (optional safety)
-        if len(text_content) > 10000:
-            return text_content[:10000] + "... (truncated)"
-            
-        return text_content
+        # Stream pages and stop at the output budget instead of parsing the whole file
+        text_content, truncated = read_pdf_text(file_path, max_chars=10000)
+        return text_content + "... (truncated)" if truncated else text_content
     except Exception as e:
         return f"Error parsing PDF: {str(e)}"
+
+# --- Page Extraction ---
+
+def parse_page_ranges(spec: Optional[str]) -> Optional[Set[int]]:
+    """
+    Parses a 1-based page range spec like "1-5,8,10-12" into 0-based page indexes.
+    Returns None (all pages) for an empty spec.
+    """
+    if not spec or not str(spec).strip():
+        return None
+    pages = set()
+    for part in str(spec).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = (int(p) for p in part.split("-", 1))
+            pages.update(range(start - 1, end))
+        else:
+            pages.add(int(part) - 1)
+    return {p for p in pages if p >= 0}
+
+def iter_page_layouts(file_path: str, page_numbers: Optional[Iterable[int]] = None) -> Iterator[Tuple[int, LTPage]]:
+    """
+    Yields (page_index, layout) for each page in order. Pages outside `page_numbers`
+    are never interpreted, and closing the generator early stops parsing.
+    """
+    wanted = set(page_numbers) if page_numbers is not None else None
+    with open(file_path, "rb") as fp:
+        rsrcmgr = PDFResourceManager(caching=True)
+        device = PDFPageAggregator(rsrcmgr, laparams=LAParams())
+        interpreter = PDFPageInterpreter(rsrcmgr, device)
+        try:
+            for index, page in enumerate(PDFPage.get_pages(fp, caching=True)):
+                if wanted is not None:
+                    if index not in wanted:
+                        continue
+                    wanted.discard(index)
+                interpreter.process_page(page)
+                yield index, device.get_result()
+                if wanted is not None and not wanted:
+                    break
+        finally:
+            device.close()
+
+def layout_text(ltpage: LTPage) -> str:
+    """Renders a page layout to text the same way pdfminer's TextConverter (extract_text) does."""
+    parts: List[str] = []
+
+    def render(item):
+        if isinstance(item, LTContainer):
+            for child in item:
+                render(child)
+        elif isinstance(item, LTText):
+            parts.append(item.get_text())
+        if isinstance(item, LTTextBox):
+            parts.append("\n")
+
+    render(ltpage)
+    return "".join(parts)
+
+def iter_page_texts(file_path: str, page_numbers: Optional[Iterable[int]] = None) -> Iterator[Tuple[int, str]]:
+    """Yields (page_index, text) for each page in order; see iter_page_layouts."""
+    for index, ltpage in iter_page_layouts(file_path, page_numbers):
+        yield index, layout_text(ltpage)
+
+def read_pdf_pages(file_path: str, page_numbers: Optional[Iterable[int]] = None,
+                   max_chars: Optional[int] = None, table_pages: int = 0) -> Dict[str, Any]:
+    """
+    Extracts only what is needed: the requested pages, and no further than the
+    page that crosses `max_chars` - or, when scanning for tables, the first
+    `table_pages` pages, whichever is later.
+
+    Returns {"pages": {index: text}, "tables": {index: [table, ...]}, "complete": bool};
+    `complete` is True only when every page of the document was read. Tables are
+    detected on every page that is read.
+    """
+    text_pages = set(page_numbers) if page_numbers is not None else None
+    wanted = text_pages | set(range(table_pages)) if text_pages is not None else None
+    pages: Dict[int, str] = {}
+    tables: Dict[int, List[Dict[str, Any]]] = {}
+    used = 0
+    generator = iter_page_layouts(file_path, wanted)
+    try:
+        for index, ltpage in generator:
+            pages[index] = layout_text(ltpage)
+            tables[index] = extract_page_tables(ltpage, index)
+            if text_pages is None or index in text_pages:
+                used += len(pages[index]) + 1
+            if max_chars is not None and used >= max_chars and index + 1 >= table_pages:
+                return {"pages": pages, "tables": tables, "complete": False}
+    finally:
+        generator.close()
+    return {"pages": pages, "tables": tables, "complete": page_numbers is None}
+
+def select_pages(pages: Dict[int, str], page_numbers: Optional[Iterable[int]] = None,
+                 max_chars: Optional[int] = None, complete: bool = False) -> Optional[Tuple[List[int], List[str], bool]]:
+    """
+    Picks the pages a request needs from already-extracted `pages`.
+
+    Returns (indexes, texts, truncated), or None when `pages` does not cover the
+    request (a page is needed that has not been extracted yet).
+    """
+    candidates = iter(sorted(set(page_numbers))) if page_numbers is not None else None
+    indexes, texts, used = [], [], 0
+    index = 0
+    while True:
+        if candidates is not None:
+            index = next(candidates, None)
+            if index is None:
+                return indexes, texts, False
+        if max_chars is not None and used >= max_chars:
+            return indexes, texts, True
+        if index not in pages:
+            # Past the end of a fully read document, or simply not extracted yet
+            return (indexes, texts, False) if complete else None
+        indexes.append(index)
+        texts.append(pages[index])
+        used += len(pages[index]) + 1
+        index += 1
+
+def join_pages(texts: List[str], max_chars: Optional[int] = None) -> Tuple[str, bool]:
+    """Joins page texts with form feeds (as extract_text does) and applies the budget."""
+    text = "\f".join(texts)
+    if max_chars is not None and len(text) > max_chars:
+        return text[:max_chars], True
+    return text, False
+
+def read_pdf_text(file_path: str, page_numbers: Optional[Iterable[int]] = None,
+                  max_chars: Optional[int] = None) -> Tuple[str, bool]:
+    """Returns (text, truncated) for the requested pages within a character budget."""
+    extracted = read_pdf_pages(file_path, page_numbers, max_chars)
+    _, texts, truncated = select_pages(extracted["pages"], page_numbers, max_chars, complete=True)
+    text, cut = join_pages(texts, max_chars)
+    return text, truncated or cut
+
+# --- Parallel Parsing ---
+
+def extract_pdf_text(file_path: str, page_numbers: Optional[List[int]] = None,
+                     max_chars: Optional[int] = None, table_pages: int = 0) -> Dict[str, Any]:
+    """
+    Worker entry point: extracts the per-page text and tables of one PDF within the given budget.
+    Runs in a child process, so it must stay a top-level (picklable) function.
+    """
+    start = time.perf_counter()
+    result = read_pdf_pages(file_path, page_numbers, max_chars, table_pages)
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    return result
+
+def _kill_workers(executor: ProcessPoolExecutor):
+    # A hung pdfminer call cannot be cancelled, only its process killed
+    for process in list((getattr(executor, "_processes", None) or {}).values()):
+        try:
+            process.terminate()
+        except Exception:
+            pass
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def _cached_pages(entry: Dict[str, Any], key: str = "pages") -> Dict[int, Any]:
+    # JSON object keys are strings
+    return {int(k): v for k, v in (entry.get(key) or {}).items()}
+
+def _covers(pages: Dict[int, Any], page_numbers: Optional[List[int]], max_chars: Optional[int],
+            table_pages: int, complete: bool) -> Optional[Tuple[List[int], List[str], bool]]:
+    """Text selection for a request, or None if the text or table scan is not covered yet."""
+    if table_pages and select_pages(pages, range(table_pages), complete=complete) is None:
+        return None
+    return select_pages(pages, page_numbers, max_chars, complete=complete)
+
+def parse_pdfs_parallel(file_paths: List[str], max_workers: Optional[int] = None,
+                        timeout: Optional[float] = None,
+                        on_result: Optional[Callable[[int, int, Dict[str, Any]], None]] = None,
+                        page_numbers: Optional[Iterable[int]] = None,
+                        max_chars: Optional[int] = None, table_pages: int = 0) -> List[Dict[str, Any]]:
+    """
+    Parses PDFs across a process pool with bounded concurrency and a per-file timeout.
+
+    Files are first looked up in the content-addressed parse cache (SHA-256 of the
+    bytes + parser version); hits never reach the pool, misses are cached once parsed.
+    Only `max_workers` files are in flight at once, so each file's timeout starts when
+    it actually begins parsing. A file that exceeds its timeout has its worker killed;
+    the pool is recycled and the other in-flight files are requeued.
+
+    Args:
+        file_paths: PDFs to parse.
+        max_workers: Concurrent worker processes. Defaults to Config.PDF_PARSE_WORKERS.
+        timeout: Seconds allowed per file. Defaults to Config.PDF_PARSE_TIMEOUT_SECONDS.
+        on_result: Optional progress callback(completed, total, result).
+        page_numbers: 0-based pages to read (see parse_page_ranges). Defaults to all.
+        max_chars: Per-file character budget; parsing stops at the page that crosses it.
+        table_pages: Also scan the first N pages for tables, beyond the text budget.
+
+    Returns:
+        One dict per input path, in input order: {"file", "path", "text", "pages",
+        "page_numbers", "truncated", "tables", "sha256", "cached", "error", "seconds"}.
+        `text` is the selected pages joined by form feeds within `max_chars`, and is ""
+        when `error` is set. `tables` lists the raw grids found in the first
+        `table_pages` pages (see table_extractor).
+    """
+    max_workers = max(1, min(max_workers or Config.PDF_PARSE_WORKERS, len(file_paths) or 1))
+    timeout = timeout or Config.PDF_PARSE_TIMEOUT_SECONDS
+    page_numbers = sorted(set(page_numbers)) if page_numbers is not None else None
+    total = len(file_paths)
+    results: List[Optional[Dict[str, Any]]] = [None] * total
+    completed = 0
+    hashes: List[Optional[str]] = [None] * total
+
+    def record(idx: int, selection: Optional[Tuple[List[int], List[str], bool]] = None,
+               error: Optional[str] = None, seconds: float = 0.0, cached: bool = False,
+               page_tables: Optional[Dict[int, List[Dict[str, Any]]]] = None):
+        nonlocal completed
+        path = file_paths[idx]
+        indexes, texts, truncated = selection or ([], [], False)
+        text, cut = join_pages(texts, max_chars)
+        tables = [t for index in sorted(page_tables or {}) if index < table_pages for t in page_tables[index]]
+        results[idx] = {
+            "file": os.path.basename(path), "path": path, "text": text, "pages": texts,
+            "page_numbers": indexes, "truncated": truncated or cut, "tables": tables,
+            "sha256": hashes[idx], "cached": cached, "error": error, "seconds": seconds,
+        }
+        completed += 1
+        if on_result:
+            on_result(completed, total, results[idx])
+
+    if not file_paths:
+        return []
+
+    # --- Cache lookup (parent process, no pool needed for hits) ---
+    to_parse = []
+    cached_entries: Dict[int, Dict[str, Any]] = {}
+    for idx, path in enumerate(file_paths):
+        try:
+            hashes[idx] = file_sha256(path)
+        except Exception as e:
+            record(idx, error=str(e) or type(e).__name__)
+            continue
+        entry = get_cached_parse(hashes[idx])
+        if entry is not None:
+            selection = _covers(_cached_pages(entry), page_numbers, max_chars, table_pages, entry.get("complete", False))
+            if selection is not None:
+                record(idx, selection, cached=True, page_tables=_cached_pages(entry, "tables"))
+                continue
+            # Cached pages do not cover this request; parse again and merge
+            cached_entries[idx] = entry
+        to_parse.append(idx)
+
+    if not to_parse:
+        return results
+    max_workers = min(max_workers, len(to_parse))
+
+    # spawn, not fork: the API server runs this node from a threaded event loop
+    context = get_context("spawn")
+    executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+    pending = deque(to_parse)
+    running: Dict[Any, tuple] = {}
+
+    try:
+        while pending or running:
+            while pending and len(running) < max_workers:
+                idx = pending.popleft()
+                future = executor.submit(extract_pdf_text, file_paths[idx], page_numbers, max_chars, table_pages)
+                running[future] = (idx, time.monotonic() + timeout)
+
+            next_deadline = min(deadline for _, deadline in running.values())
+            done, _ = wait(list(running), timeout=max(0.0, next_deadline - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+
+            broken = False
+            for future in done:
+                idx, _ = running.pop(future)
+                try:
+                    result = future.result()
+                    previous = cached_entries.get(idx, {})
+                    pages = {**_cached_pages(previous), **result["pages"]}
+                    page_tables = {**_cached_pages(previous, "tables"), **result["tables"]}
+                    put_cached_parse(hashes[idx], {
+                        "file": os.path.basename(file_paths[idx]),
+                        "pages": {str(k): v for k, v in pages.items()},
+                        "tables": {str(k): v for k, v in page_tables.items()},
+                        "complete": result["complete"] or previous.get("complete", False),
+                    })
+                    record(idx, select_pages(pages, page_numbers, max_chars, complete=True),
+                           seconds=result["seconds"], page_tables=page_tables)
+                except BrokenProcessPool:
+                    # A worker died (e.g. OOM); retrying would fail again, so report it
+                    broken = True
+                    record(idx, error="Parser process crashed")
+                except Exception as e:
+                    record(idx, error=str(e) or type(e).__name__)
+            if broken:
+                for future in list(running):
+                    idx, _ = running.pop(future)
+                    record(idx, error="Parser process crashed")
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+                continue
+
+            now = time.monotonic()
+            expired = [f for f, (_, deadline) in running.items() if deadline <= now and not f.done()]
+            if expired:
+                for future in expired:
+                    idx, _ = running.pop(future)
+                    record(idx, error=f"Timed out after {timeout:g}s", seconds=timeout)
+                # Requeue the innocent in-flight files at the front and start a fresh pool
+                for idx, _ in sorted(running.values(), reverse=True):
+                    pending.appendleft(idx)
+                running = {}
+                _kill_workers(executor)
+                executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
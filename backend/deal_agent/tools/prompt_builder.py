@@ -0,0 +1,217 @@
+import json
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a character estimate
+    tiktoken = None
+
+_encoders: Dict[str, Any] = {}
+_WORD = re.compile(r"[a-z0-9äöüß]{3,}")
+# Characters per token for English prose when no tokenizer is available
+_CHARS_PER_TOKEN = 4
+
+# Asset fields the alignment prompt needs; images, source-file listings etc. are dropped
+ASSET_PROMPT_FIELDS = ("name", "asset_type", "tenure", "address", "city", "country", "currency",
+                       "rent_eur_psm", "logistics_asset", "leases")
+LEASE_PROMPT_FIELDS = ("tenant", "area_m2", "display_rent_eur_psm", "rent_conversion", "lease_start", "lease_end")
+
+
+def _encoder(model: str):
+    if tiktoken is None:
+        return None
+    if model not in _encoders:
+        try:
+            _encoders[model] = tiktoken.encoding_for_model(model)
+        except Exception as e:
+            # Unknown model or the BPE file cannot be fetched (offline): estimate instead
+            print(f"Token counting falls back to estimates for {model}: {e}")
+            _encoders[model] = None
+    return _encoders[model]
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    encoder = _encoder(model)
+    if encoder is None:
+        return math.ceil(len(text) / _CHARS_PER_TOKEN)
+    return len(encoder.encode(text, disallowed_special=()))
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> str:
+    """Cuts text to at most max_tokens, at a token (or, when estimating, word) boundary."""
+    if max_tokens <= 0:
+        return ""
+    encoder = _encoder(model)
+    if encoder is None:
+        limit = max_tokens * _CHARS_PER_TOKEN
+        if len(text) <= limit:
+            return text
+        cut = text[:limit]
+        return cut[:cut.rfind(" ")] if " " in cut else cut
+    tokens = encoder.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoder.decode(tokens[:max_tokens])
+
+def compact_json(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+
+def project_asset(asset: Dict[str, Any]) -> Dict[str, Any]:
+    """Keeps only the asset and lease fields the LLM needs; None/empty values are dropped."""
+    projected = {k: asset[k] for k in ASSET_PROMPT_FIELDS if asset.get(k) not in (None, "", [], {})}
+    if "leases" in projected:
+        leases = []
+        for lease in projected["leases"]:
+            row = {k: lease[k] for k in LEASE_PROMPT_FIELDS if lease.get(k) not in (None, "", [], {})}
+            if isinstance(row.get("tenant"), dict):
+                row["tenant"] = row["tenant"].get("name")
+            leases.append(row)
+        projected["leases"] = leases
+    return projected
+
+def fit_json_records(records: List[Any], max_tokens: int, model: str = "gpt-4o") -> Tuple[str, int]:
+    """
+    Encodes whole records as a compact JSON array within max_tokens.
+    Records that do not fit are dropped (never cut mid-value); returns (json, records_included).
+    """
+    parts, used = [], 2  # the surrounding brackets
+    for record in records:
+        encoded = compact_json(record)
+        cost = count_tokens(encoded, model) + 1
+        if used + cost > max_tokens:
+            break
+        parts.append(encoded)
+        used += cost
+    return "[" + ",".join(parts) + "]", len(parts)
+
+# --- Chunk relevance (in-memory lexical index) ---
+
+def _terms(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+def index_chunks(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Term counts and document frequencies of a chunk list, computed once and
+    shared by every query ranked against it (e.g. one per asset in the map step).
+    Token counts of the chunk texts are filled in lazily by select_chunks.
+    """
+    chunk_terms = [Counter(_terms(c.get("embed_text") or c.get("text", ""))) for c in chunks]
+    return {
+        "size": len(chunks),
+        "terms": chunk_terms,
+        "lengths": [sum(terms.values()) or 1 for terms in chunk_terms],
+        "doc_freq": Counter(term for terms in chunk_terms for term in terms),
+        "tokens": {},
+    }
+
+def rank_chunks(chunks: List[Dict[str, Any]], query: str,
+                index: Optional[Dict[str, Any]] = None) -> List[Tuple[float, int]]:
+    """
+    Scores chunks against a query with TF-IDF over the chunks themselves.
+    Returns (score, chunk_position) pairs, best first, for chunks with any match.
+    Pass the index_chunks() of the same list to avoid re-tokenizing it.
+    """
+    query_terms = set(_terms(query))
+    if not chunks or not query_terms:
+        return []
+    index = index or index_chunks(chunks)
+    doc_freq, n = index["doc_freq"], index["size"]
+    scored = []
+    for position, terms in enumerate(index["terms"]):
+        score = sum((1 + math.log(terms[t])) * math.log(1 + n / doc_freq[t]) for t in query_terms if t in terms)
+        if score > 0:
+            scored.append((score / math.sqrt(index["lengths"][position]), position))
+    return sorted(scored, reverse=True)
+
+def select_chunks(chunks: List[Dict[str, Any]], queries: List[str], max_tokens: int,
+                  model: str = "gpt-4o", fill: bool = True, top_k: Optional[int] = None,
+                  index: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Picks the most relevant chunks for each query within a shared token budget.
+    Queries take turns (round robin by rank), so every asset gets context before
+    any one asset gets a second chunk. top_k caps the chunks taken per query.
+    With fill, budget left over is filled in document order, which also covers
+    queries with no lexical match. The result is in document order.
+    """
+    index = index or index_chunks(chunks)
+    rankings = [r[:top_k] for r in (rank_chunks(chunks, q, index) for q in queries) if r]
+    if fill:
+        rankings.append([(0.0, position) for position in range(len(chunks))])
+    token_counts = index["tokens"]
+    chosen, used = [], 0
+    seen = set()
+    depth = 0
+    while any(depth < len(r) for r in rankings):
+        for ranking in rankings:
+            if depth >= len(ranking):
+                continue
+            position = ranking[depth][1]
+            if position in seen:
+                continue
+            if (model, position) not in token_counts:
+                token_counts[(model, position)] = count_tokens(chunks[position]["text"], model) + 12  # header line
+            cost = token_counts[(model, position)]
+            if used + cost > max_tokens:
+                continue
+            seen.add(position)
+            chosen.append(position)
+            used += cost
+        depth += 1
+    return [chunks[p] for p in sorted(chosen)]
+
+def asset_query(asset: Dict[str, Any]) -> str:
+    """Search terms for one asset: its name, address, city and tenants."""
+    tenants = []
+    for lease in asset.get("leases", []) or []:
+        tenant = lease.get("tenant")
+        tenants.append(tenant.get("name", "") if isinstance(tenant, dict) else str(tenant or ""))
+    return " ".join([asset.get("name", ""), asset.get("address", ""), asset.get("city", ""), *tenants])
+
+def format_chunks(chunks: List[Dict[str, Any]]) -> str:
+    """Groups selected chunks under their document, citing page and section."""
+    blocks, current = [], None
+    for chunk in chunks:
+        if chunk["source"] != current:
+            current = chunk["source"]
+            blocks.append(f"--- Document: {current} ---")
+        pages = chunk["page_start"] if chunk["page_start"] == chunk["page_end"] else f"{chunk['page_start']}-{chunk['page_end']}"
+        section = f" | {chunk['section']}" if chunk.get("section") else ""
+        blocks.append(f"[p.{pages}{section}] {chunk['text']}")
+    return "\n".join(blocks)
+
+def build_alignment_context(structured_data: Dict[str, Any], chunks: List[Dict[str, Any]], max_tokens: int,
+                            task_query: str = "", json_share: float = 0.35, model: str = "gpt-4o",
+                            fill: bool = True, top_k: Optional[int] = None,
+                            chunk_index: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Splits a token budget between the structured assets (compact JSON, whole
+    records only) and the PDF chunks most relevant to each asset.
+
+    Unused JSON budget flows to the documents; fill, top_k and chunk_index are
+    passed on to select_chunks. Returns {"json", "documents",
+    "assets_included", "assets_total", "chunks_included", "chunks_total", "tokens"}.
+    """
+    assets = structured_data.get("assets", []) or []
+    projected = [project_asset(a) for a in assets]
+
+    json_text, included = fit_json_records(projected, int(max_tokens * json_share) if chunks else max_tokens, model)
+    comps = structured_data.get("comps", []) or []
+    if comps:
+        comps_text, _ = fit_json_records(comps, max(0, int(max_tokens * json_share) - count_tokens(json_text, model)), model)
+        json_text = f'{{"assets":{json_text},"comps":{comps_text}}}'
+    json_tokens = count_tokens(json_text, model)
+
+    # One query per asset, plus the extraction task itself (highlights, risks, specs...)
+    queries = [asset_query(a) for a in assets] + ([task_query] if task_query else [])
+    selected = select_chunks(chunks, queries, max_tokens - json_tokens, model, fill=fill, top_k=top_k,
+                             index=chunk_index)
+    documents = format_chunks(selected)
+
+    return {
+        "json": json_text,
+        "documents": documents,
+        "assets_included": included,
+        "assets_total": len(assets),
+        "chunks_included": len(selected),
+        "chunks_total": len(chunks),
+        "tokens": json_tokens + count_tokens(documents, model),
+    }
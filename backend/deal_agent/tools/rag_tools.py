@@ -1,14 +1,45 @@
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 from langchain_core.tools import tool
-from langchain_openai import OpenAIEmbeddings
+from deal_agent.tools.embedding_cache import get_embeddings
 from deal_agent.tools.vector_store import get_pinecone_index
+from deal_agent.utils.config import Config
+
+# Shared by all search calls; sized so two overlapping searches never queue
+_query_pool = None
+_query_pool_lock = threading.Lock()
+
+def _get_query_pool() -> ThreadPoolExecutor:
+    global _query_pool
+    with _query_pool_lock:
+        if _query_pool is None:
+            _query_pool = ThreadPoolExecutor(max_workers=max(2, 2 * len(Config.SEARCH_NAMESPACE_TOP_K)),
+                                             thread_name_prefix="deal-search")
+        return _query_pool
+
+def _format_match(namespace: str, match) -> str:
+    metadata = match.metadata or {}
+    source = metadata.get("source", "Unknown")
+    text = metadata.get("text", "")
+    if namespace == "market_comps":
+        return f"[Source: {source} (Market Comp)]\n{text}"
+    if metadata.get("record_type") == "pdf_chunk":
+        # Document chunks carry page and section for citation
+        pages = f"p. {int(metadata.get('page_start', 0))}"
+        if metadata.get("page_end") != metadata.get("page_start"):
+            pages += f"-{int(metadata.get('page_end', 0))}"
+        section = metadata.get("section")
+        label = f"{pages}, {section}" if section else pages
+        return f"[Source: {source} ({label})]\n{text}"
+    return f"[Source: {source} (Deal Asset)]\n{text}"
 
 @tool
 def search_documents(query: str, deal_id: str = None) -> str:
     """
     Search for relevant documents in the vector database based on a query.
-    Searches both the current deal's assets and market comparables.
+    Searches both the current deal's assets and market comparables, best matches first.
     
     Args:
         query: The search query string.
@@ -19,54 +50,32 @@ def search_documents(query: str, deal_id: str = None) -> str:
         if not index:
             return "Error: Vector database not configured."
 
-        # Initialize Embeddings
-        embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-        vector = embeddings.embed_query(query)
+        # Cached: repeated queries skip the embeddings API
+        vector = get_embeddings().embed_query(query)
 
-        results_text = []
-
-        # 1. Search 'deal' namespace (Current Deal Assets)
-        # Filter by deal_id if provided
+        # Filter by deal_id if provided (applies to both namespaces)
         filter_dict = {"deal_id": deal_id} if deal_id else {}
-        
-        try:
-            deal_results = index.query(
-                vector=vector,
-                top_k=5,
-                include_metadata=True,
-                namespace="deal",
-                filter=filter_dict
-            )
-            
-            for match in deal_results.matches:
-                # Remove threshold to ensure we get results even for broad queries
-                # if match.score > 0.5: 
-                source = match.metadata.get("source", "Unknown")
-                text = match.metadata.get("text", "")
-                results_text.append(f"[Source: {source} (Deal Asset)]\n{text}")
-        except Exception as e:
-            print(f"Error searching deal namespace: {e}")
 
-        # 2. Search 'market_comps' namespace (Market Comparables)
-        # We might want to search comps even without deal_id, or use deal_id if they are associated
-        # For "deals learned", we definitely want to check here.
-        try:
-            comp_results = index.query(
-                vector=vector,
-                top_k=5,
-                include_metadata=True,
-                namespace="market_comps",
-                filter=filter_dict # Filter by deal_id if we only want comps relevant to this deal context
-            )
-            
-            for match in comp_results.matches:
-                # Remove threshold to ensure we get results even for broad queries
-                # if match.score > 0.5:
-                source = match.metadata.get("source", "Unknown")
-                text = match.metadata.get("text", "")
-                results_text.append(f"[Source: {source} (Market Comp)]\n{text}")
-        except Exception as e:
-            print(f"Error searching market_comps namespace: {e}")
+        # Namespaces are queried concurrently, so the tool costs one round-trip
+        pool = _get_query_pool()
+        futures = {
+            namespace: pool.submit(index.query, vector=vector, top_k=top_k, include_metadata=True,
+                                   namespace=namespace, filter=filter_dict)
+            for namespace, top_k in Config.SEARCH_NAMESPACE_TOP_K.items()
+        }
+
+        # Merge by score; a record returned twice keeps its best-scoring hit
+        best: Dict[str, Any] = {}
+        for namespace, future in futures.items():
+            try:
+                for match in future.result().matches:
+                    if match.id not in best or match.score > best[match.id][0]:
+                        best[match.id] = (match.score, namespace, match)
+            except Exception as e:
+                print(f"Error searching {namespace} namespace: {e}")
+
+        results_text = [_format_match(namespace, match)
+                        for _, namespace, match in sorted(best.values(), key=lambda hit: hit[0], reverse=True)]
 
         if not results_text:
             return "No relevant documents found in the knowledge base."
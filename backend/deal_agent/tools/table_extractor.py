@@ -0,0 +1,314 @@
+import re
+from datetime import datetime
+from statistics import median
+from typing import Any, Dict, List, Optional, Tuple
+
+from pdfminer.layout import LTChar, LTPage, LTTextContainer, LTTextLineHorizontal
+
+# --- Header Vocabulary ---
+
+# Order matters: more specific patterns first ("rent/sqm" must not be read as "area")
+TENANCY_HEADERS: List[Tuple[str, str]] = [
+    ("rent_psm", r"(rent|miete).*(psm|/\s*(sq\s*m|sqm|m²|m2)|per\s*(sq\s*m|sqm|m²|m2))|^(eur|€)\s*/\s*(sqm|m²|m2)|^psm$"),
+    ("annual_rent", r"annual\s*rent|rent\s*(p\.?\s*a\.?|pa|per\s*annum)|passing\s*rent|contract(ed)?\s*rent|jahres\s*miete|jahresmiete|rental\s*income|^rent(\s*\((eur|€)\))?$"),
+    ("lease_start", r"lease\s*start|start|commence|beginn|^from$"),
+    ("lease_end", r"lease\s*end|expir|^end$|^until$|mietende|ende|lease\s*term\s*end"),
+    ("area", r"area|gla|nla|sq\s*m|sqm|m²|m2|size|fläche|flaeche"),
+    ("unit", r"^unit|premises|demise|floor|building|einheit|^hall"),
+    ("name", r"tenant|lessee|occupier|mieter|^company"),
+]
+_TENANCY_PATTERNS = [(field, re.compile(pattern, re.IGNORECASE)) for field, pattern in TENANCY_HEADERS]
+
+FINANCIAL_LABELS: List[Tuple[str, str]] = [
+    ("noi", r"\bnoi\b|net\s*operating\s*income"),
+    ("erv", r"\berv\b|estimated\s*rental\s*value|market\s*rent"),
+    ("passing_rent", r"passing\s*rent|rental\s*income|contracted\s*rent|in-?place\s*rent"),
+    ("cap_rate", r"cap(italisation|italization)?\s*rate"),
+    ("net_initial_yield", r"\bniy\b|net\s*initial\s*yield"),
+    ("purchase_price", r"purchase\s*price|asking\s*price|kaufpreis"),
+    ("walt", r"\bwalt\b|weighted\s*average\s*(unexpired\s*)?lease"),
+    ("occupancy", r"occupancy|vacancy\s*rate"),
+    ("lettable_area", r"lettable\s*area|\bgla\b|\bnla\b"),
+]
+_FINANCIAL_PATTERNS = [(field, re.compile(pattern, re.IGNORECASE)) for field, pattern in FINANCIAL_LABELS]
+
+_TOTAL_ROW = re.compile(r"^(total|sum|summe|gesamt|subtotal)\b", re.IGNORECASE)
+_TEXT_FIELDS = {"name", "unit"}
+
+
+def _clean(text: str) -> str:
+    text = text.strip()
+    tokens = text.split()
+    # Marketing PDFs letter-space headings ("L E T T A B L E   A R E A"); collapse them
+    if len(tokens) >= 4 and sum(len(t) == 1 for t in tokens) >= 0.8 * len(tokens):
+        text = " ".join(word.replace(" ", "") for word in re.split(r"\s{2,}", text))
+    return " ".join(text.split())
+
+def match_tenancy_header(text: str) -> Optional[str]:
+    for field, pattern in _TENANCY_PATTERNS:
+        if pattern.search(text):
+            return field
+    return None
+
+def match_financial_label(text: str) -> Optional[str]:
+    for field, pattern in _FINANCIAL_PATTERNS:
+        if pattern.search(text):
+            return field
+    return None
+
+# --- Value Parsing ---
+
+def parse_number(text: Any, integer_like: bool = False) -> Optional[float]:
+    """
+    Parses figures as they appear in IMs and rent rolls: '1,234.50', '1.234,50',
+    '€ 2.5m', '28,300 sqm', '5.25%' (returned as 0.0525).
+    `integer_like` reads a lone '28.300' as German thousands rather than a decimal.
+    """
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+    raw = str(text).strip().lower()
+    match = re.search(r"-?\d[\d.,\s]*", raw)
+    if not match:
+        return None
+    number = match.group(0).strip().replace(" ", "")
+    tail = raw[match.end():].strip()
+
+    if "," in number and "." in number:
+        decimal = "," if number.rfind(",") > number.rfind(".") else "."
+        thousands = "." if decimal == "," else ","
+        number = number.replace(thousands, "").replace(decimal, ".")
+    elif "," in number:
+        if re.fullmatch(r"-?\d{1,3}(,\d{3})+", number):
+            number = number.replace(",", "")
+        else:
+            number = number.replace(",", ".")
+    elif "." in number:
+        if re.fullmatch(r"-?\d{1,3}(\.\d{3}){2,}", number) or (integer_like and re.fullmatch(r"-?\d{1,3}\.\d{3}", number)):
+            number = number.replace(".", "")
+    number = number.rstrip(".")
+
+    try:
+        value = float(number)
+    except ValueError:
+        return None
+
+    if tail.startswith("%"):
+        return value / 100
+    if re.match(r"(m|mn|mio|million)\b", tail):
+        value *= 1_000_000
+    elif re.match(r"(k|tsd|thousand)\b", tail):
+        value *= 1_000
+    return value
+
+_DATE_FORMATS = ["%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%y", "%d/%m/%y",
+                 "%d %b %Y", "%d %B %Y", "%b %Y", "%B %Y", "%m/%Y", "%m.%Y", "%Y"]
+
+def parse_date(text: Any) -> Optional[str]:
+    """Returns an ISO date for common rent roll formats, or None."""
+    if not text:
+        return None
+    value = str(text).strip().rstrip(".")
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+# --- Layout → Cell Grid ---
+
+def _split_cells(line: LTTextLineHorizontal) -> List[Tuple[float, float, str]]:
+    """
+    Splits one layout line at wide horizontal gaps. pdfminer joins table cells
+    that sit closer than its char margin into a single line; a gap of half an em
+    is about twice a word space, so it marks a cell boundary.
+    """
+    segments: List[Tuple[float, float, str]] = []
+    x0 = x1 = None
+    text = ""
+    for item in line:
+        if not isinstance(item, LTChar):
+            # LTAnno: a virtual space or newline inserted by the layout analysis
+            text += item.get_text()
+            continue
+        if x1 is not None and item.x0 - x1 > item.size * 0.5:
+            segments.append((x0, x1, text))
+            x0, text = None, ""
+        if x0 is None:
+            x0 = item.x0
+        x1 = item.x1
+        text += item.get_text()
+    if x0 is not None:
+        segments.append((x0, x1, text))
+    return segments
+
+def _text_lines(ltpage: LTPage) -> List[Dict[str, Any]]:
+    """Flattens a page into cell-level text fragments with top-left based coordinates."""
+    lines = []
+
+    def walk(item):
+        if isinstance(item, LTTextLineHorizontal):
+            top, bottom = ltpage.height - item.y1, ltpage.height - item.y0
+            for x0, x1, raw in _split_cells(item):
+                text = _clean(raw)
+                if text:
+                    lines.append({"x0": x0, "x1": x1, "top": top, "bottom": bottom, "text": text})
+        elif isinstance(item, LTTextContainer) or hasattr(item, "__iter__"):
+            for child in item:
+                walk(child)
+
+    for element in ltpage:
+        walk(element)
+    return lines
+
+def group_rows(lines: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Clusters text lines into visual rows by vertical centre, each sorted left to right."""
+    if not lines:
+        return []
+    tolerance = median(l["bottom"] - l["top"] for l in lines) * 0.5
+    rows: List[List[Dict[str, Any]]] = []
+    centre = None
+    for line in sorted(lines, key=lambda l: (l["top"] + l["bottom"]) / 2):
+        mid = (line["top"] + line["bottom"]) / 2
+        if rows and abs(mid - centre) <= tolerance:
+            rows[-1].append(line)
+            centre = sum((l["top"] + l["bottom"]) / 2 for l in rows[-1]) / len(rows[-1])
+        else:
+            rows.append([line])
+            centre = mid
+    return [sorted(row, key=lambda l: l["x0"]) for row in rows]
+
+def _assign_column(cell: Dict[str, Any], columns: List[Dict[str, Any]]) -> int:
+    """Column with the largest horizontal overlap, else the nearest centre."""
+    best, best_overlap = None, 0.0
+    for i, column in enumerate(columns):
+        overlap = min(cell["x1"], column["x1"]) - max(cell["x0"], column["x0"])
+        if overlap > best_overlap:
+            best, best_overlap = i, overlap
+    if best is not None:
+        return best
+    mid = (cell["x0"] + cell["x1"]) / 2
+    return min(range(len(columns)), key=lambda i: abs((columns[i]["x0"] + columns[i]["x1"]) / 2 - mid))
+
+def extract_page_tables(ltpage: LTPage, page_index: int = 0) -> List[Dict[str, Any]]:
+    """
+    Finds tenancy tables (by header vocabulary) and financial key/value rows on one page.
+
+    Returns JSON-safe grids:
+        {"page", "kind": "rent_roll", "headers", "fields", "rows": [[cell, ...]]}
+        {"page", "kind": "financial", "rows": [[label, value], ...]}
+    """
+    rows = group_rows(_text_lines(ltpage))
+    tables: List[Dict[str, Any]] = []
+    financial_rows: List[List[str]] = []
+    heights = [r[0]["bottom"] - r[0]["top"] for r in rows] or [10.0]
+    line_height = median(heights)
+
+    i = 0
+    while i < len(rows):
+        row = rows[i]
+        fields = [match_tenancy_header(cell["text"]) for cell in row]
+        recognised = {f for f in fields if f}
+        if len(recognised) >= 3 and recognised & {"name", "area", "annual_rent", "rent_psm"}:
+            columns = [dict(cell, field=field) for cell, field in zip(row, fields)]
+            body: List[List[str]] = []
+            previous_bottom = max(c["bottom"] for c in row)
+            i += 1
+            while i < len(rows):
+                cells = rows[i]
+                top = min(c["top"] for c in cells)
+                if top - previous_bottom > line_height * 3:
+                    break
+                grid = [""] * len(columns)
+                for cell in cells:
+                    col = _assign_column(cell, columns)
+                    grid[col] = f"{grid[col]} {cell['text']}".strip()
+                filled = [c for c, value in enumerate(grid) if value]
+                if len(filled) == 1 and columns[filled[0]]["field"] in _TEXT_FIELDS and body:
+                    # Wrapped tenant/unit name continues the previous row
+                    body[-1][filled[0]] = f"{body[-1][filled[0]]} {grid[filled[0]]}".strip()
+                elif len(filled) < 2:
+                    break
+                elif not _TOTAL_ROW.match(grid[filled[0]]):
+                    body.append(grid)
+                previous_bottom = max(c["bottom"] for c in cells)
+                i += 1
+            if body:
+                tables.append({"page": page_index, "kind": "rent_roll",
+                               "headers": [c["text"] for c in columns],
+                               "fields": [c["field"] for c in columns], "rows": body})
+            continue
+
+        # Label on the left, figure on the right
+        if len(row) >= 2 and match_financial_label(row[0]["text"]):
+            value = next((c["text"] for c in row[1:] if re.search(r"\d", c["text"])), None)
+            if value:
+                financial_rows.append([row[0]["text"], value])
+        i += 1
+
+    if financial_rows:
+        tables.append({"page": page_index, "kind": "financial", "rows": financial_rows})
+    return tables
+
+# --- Grid → Typed Records ---
+
+def tenancy_records(tables: List[Dict[str, Any]], source: str = "") -> List[Dict[str, Any]]:
+    """
+    Converts rent roll grids into typed records with the tenancy_schedule keys
+    used by build_model and generate_deck.
+    """
+    records = []
+    for table in tables:
+        if table.get("kind") != "rent_roll":
+            continue
+        fields = table["fields"]
+        for row in table["rows"]:
+            cells = {field: row[i] for i, field in enumerate(fields) if field and i < len(row) and row[i]}
+            area = parse_number(cells.get("area"), integer_like=True)
+            annual_rent = parse_number(cells.get("annual_rent"), integer_like=True)
+            rent_psm = parse_number(cells.get("rent_psm"))
+            # Fill whichever rent figure the table does not state
+            if annual_rent is None and rent_psm is not None and area:
+                annual_rent = round(rent_psm * area, 2)
+            if rent_psm is None and annual_rent is not None and area:
+                rent_psm = round(annual_rent / area, 2)
+            records.append({
+                "name": cells.get("name", "Unknown"),
+                "unit": cells.get("unit", ""),
+                "area": area or 0,
+                "lease_start": parse_date(cells.get("lease_start")) or cells.get("lease_start", ""),
+                "lease_end": parse_date(cells.get("lease_end")) or cells.get("lease_end", ""),
+                "annual_rent": annual_rent or 0,
+                "rent_psm": rent_psm or 0,
+                "source": source,
+                "page": table["page"] + 1,
+            })
+    return records
+
+def financial_figures(tables: List[Dict[str, Any]], source: str = "") -> Dict[str, Any]:
+    """Collects labelled financial figures (NOI, ERV, cap rate, ...) keyed by field; first occurrence wins."""
+    figures: Dict[str, Any] = {}
+    for table in tables:
+        if table.get("kind") != "financial":
+            continue
+        for label, value in table["rows"]:
+            field = match_financial_label(label)
+            if not field or field in figures:
+                continue
+            figures[field] = {"value": parse_number(value), "text": value, "label": label,
+                              "source": source, "page": table["page"] + 1}
+    return figures
+
+def strip_table_text(text: str, tables: List[Dict[str, Any]]) -> str:
+    """
+    Removes the lines of `text` that are cells of the given rent roll tables, so
+    prompts carry the narrative and not a second, unstructured copy of the table.
+    """
+    cells = {_clean(cell) for table in tables if table.get("kind") == "rent_roll"
+             for row in [table["headers"], *table["rows"]] for cell in row if cell}
+    if not cells:
+        return text
+    kept = "\n".join(line for line in text.split("\n") if _clean(line) not in cells)
+    return re.sub(r"\n{3,}", "\n\n", kept)
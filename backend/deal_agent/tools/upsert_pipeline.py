@@ -0,0 +1,116 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from deal_agent.utils.config import Config
+from deal_agent.tools.embedding_cache import get_embeddings
+
+# (id, text to embed, metadata)
+Record = Tuple[str, str, Dict[str, Any]]
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """True for HTTP 429 / rate-limit errors from the OpenAI or Pinecone clients."""
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "too many requests" in message
+
+async def _with_backoff(label: str, fn, metrics: Dict[str, Any]):
+    """Awaits fn(), retrying rate-limited calls with exponential backoff and jitter."""
+    for attempt in range(Config.PIPELINE_MAX_RETRIES + 1):
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt == Config.PIPELINE_MAX_RETRIES or not is_rate_limited(e):
+                raise
+            delay = min(Config.PIPELINE_BACKOFF_MAX_SECONDS, Config.PIPELINE_BACKOFF_SECONDS * 2 ** attempt)
+            delay *= random.uniform(0.5, 1.0)
+            metrics["retries"] += 1
+            print(f"{label} rate limited, retrying in {delay:.1f}s ({attempt + 1}/{Config.PIPELINE_MAX_RETRIES})")
+            await asyncio.sleep(delay)
+
+async def embed_and_upsert_async(index, records: List[Record], namespace: str, embeddings=None,
+                                 embed_batch_size: Optional[int] = None,
+                                 upsert_batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Embeds and upserts records with bounded concurrency.
+
+    Each embedding batch is upserted as soon as its vectors arrive, so embedding
+    requests and upserts overlap. At most Config.PIPELINE_EMBED_CONCURRENCY
+    embedding and Config.PIPELINE_UPSERT_CONCURRENCY upsert requests are in
+    flight; rate-limited requests back off and retry. A failed batch does not
+    stop the others. Returns throughput metrics, including failed records.
+    """
+    embeddings = embeddings or get_embeddings()
+    embed_batch_size = embed_batch_size or Config.PIPELINE_EMBED_BATCH_SIZE
+    upsert_batch_size = upsert_batch_size or Config.PIPELINE_UPSERT_BATCH_SIZE
+    embed_slots = asyncio.Semaphore(Config.PIPELINE_EMBED_CONCURRENCY)
+    upsert_slots = asyncio.Semaphore(Config.PIPELINE_UPSERT_CONCURRENCY)
+    metrics = {"records": len(records), "upserted": 0, "failed": 0, "embed_batches": 0, "upsert_batches": 0,
+               "retries": 0, "embed_seconds": 0.0, "upsert_seconds": 0.0, "errors": []}
+    started = time.perf_counter()
+
+    async def upsert(batch: List[Tuple[str, List[float], Dict[str, Any]]]):
+        async with upsert_slots:
+            call_started = time.perf_counter()
+            await _with_backoff("Upsert", lambda: asyncio.to_thread(index.upsert, vectors=batch, namespace=namespace),
+                                metrics)
+            metrics["upsert_seconds"] += time.perf_counter() - call_started
+            metrics["upsert_batches"] += 1
+            metrics["upserted"] += len(batch)
+
+    async def process(batch: List[Record]):
+        try:
+            async with embed_slots:
+                call_started = time.perf_counter()
+                vectors = await _with_backoff("Embedding", lambda: embeddings.aembed_documents([r[1] for r in batch]),
+                                              metrics)
+                metrics["embed_seconds"] += time.perf_counter() - call_started
+                metrics["embed_batches"] += 1
+            # The embedding slot is released before upserting, so the next batch embeds meanwhile
+            rows = [(record_id, vector, meta) for (record_id, _, meta), vector in zip(batch, vectors)]
+            await asyncio.gather(*(upsert(rows[i:i + upsert_batch_size])
+                                   for i in range(0, len(rows), upsert_batch_size)))
+        except Exception as e:
+            metrics["errors"].append(str(e))
+
+    await asyncio.gather(*(process(records[i:i + embed_batch_size])
+                           for i in range(0, len(records), embed_batch_size)))
+
+    # Includes records of batches whose upsert only partly succeeded
+    metrics["failed"] = len(records) - metrics["upserted"]
+    metrics["seconds"] = round(time.perf_counter() - started, 3)
+    metrics["records_per_second"] = round(metrics["upserted"] / metrics["seconds"], 1) if metrics["seconds"] else 0.0
+    metrics["embed_seconds"] = round(metrics["embed_seconds"], 3)
+    metrics["upsert_seconds"] = round(metrics["upsert_seconds"], 3)
+    return metrics
+
+def embed_and_upsert(index, records: List[Record], namespace: str, **kwargs) -> Dict[str, Any]:
+    """
+    Synchronous entry point for embed_and_upsert_async. Called from a thread that
+    already runs an event loop, the pipeline runs on a fresh thread instead.
+    """
+    if not records:
+        return {"records": 0, "upserted": 0, "failed": 0, "errors": []}
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(embed_and_upsert_async(index, records, namespace, **kwargs))
+
+    result: Dict[str, Any] = {}
+    def run():
+        result.update(asyncio.run(embed_and_upsert_async(index, records, namespace, **kwargs)))
+    worker = threading.Thread(target=run, name="deal-upsert")
+    worker.start()
+    worker.join()
+    return result
+
+def format_metrics(metrics: Dict[str, Any]) -> str:
+    return (f"{metrics.get('upserted', 0)}/{metrics.get('records', 0)} records in {metrics.get('seconds', 0)}s "
+            f"({metrics.get('records_per_second', 0)}/s; {metrics.get('embed_batches', 0)} embedding and "
+            f"{metrics.get('upsert_batches', 0)} upsert batches, {metrics.get('retries', 0)} retries, "
+            f"{metrics.get('failed', 0)} failed)")
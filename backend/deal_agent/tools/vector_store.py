@@ -1,71 +1,270 @@
 import os
 import json
 import hashlib
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings
 from pinecone import Pinecone, ServerlessSpec
+from deal_agent.utils.config import Config
+from deal_agent.tools.local_index import get_local_index
+from deal_agent.tools.upsert_pipeline import embed_and_upsert, format_metrics
 
 # Load environment variables
 load_dotenv()
 
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 
-def get_pinecone_index():
-    """Initialize and return Pinecone Index"""
-    index_name = "deal-associate-index"
-    
+# Process-wide client and index handle: the control-plane lookups (list/describe)
+# run once, and every later call reuses the index's pooled HTTP connections
+_pinecone_client = None
+_pinecone_indexes: Dict[str, Any] = {}
+_pinecone_lock = threading.RLock()
+
+def get_pinecone_client():
+    """Shared Pinecone client, created on first use."""
+    global _pinecone_client
+    if _pinecone_client is None:
+        with _pinecone_lock:
+            if _pinecone_client is None:
+                _pinecone_client = Pinecone(api_key=PINECONE_API_KEY)
+    return _pinecone_client
+
+def vector_backend() -> str:
+    """Resolves Config.VECTOR_BACKEND; "auto" means Pinecone when an API key is set."""
+    if Config.VECTOR_BACKEND == "auto":
+        return "pinecone" if PINECONE_API_KEY else "local"
+    return Config.VECTOR_BACKEND
+
+def get_pinecone_index(index_name: str = None):
+    """
+    Initialize and return the vector index (cached per process after the first call).
+    With the local backend this is a LocalVectorIndex exposing the same methods.
+    """
+    index_name = index_name or Config.PINECONE_INDEX_NAME
+    index = _pinecone_indexes.get(index_name)
+    if index is not None:
+        return index
+
+    if vector_backend() == "local":
+        try:
+            index = get_local_index(index_name)
+        except Exception as e:
+            print(f"Error opening local vector index {index_name}: {e}")
+            return None
+        _pinecone_indexes[index_name] = index
+        return index
+
     if not PINECONE_API_KEY:
         print("Error: PINECONE_API_KEY not found in environment variables.")
         return None
 
-    pc = Pinecone(api_key=PINECONE_API_KEY)
-    
-    # Check if index exists, create if not
-    existing_indexes = [i.name for i in pc.list_indexes()]
-    if index_name not in existing_indexes:
-        print(f"Creating Pinecone index: {index_name}")
-        pc.create_index(
-            name=index_name,
-            dimension=1536, # text-embedding-3-small
-            metric='cosine',
-            spec=ServerlessSpec(cloud='aws', region='us-east-1')
-        )
-    
-    return pc.Index(index_name)
+    with _pinecone_lock:
+        if index_name in _pinecone_indexes:
+            return _pinecone_indexes[index_name]
+        try:
+            pc = get_pinecone_client()
+            
+            # Check if index exists, create if not (once per process)
+            existing_indexes = [i.name for i in pc.list_indexes()]
+            if index_name not in existing_indexes:
+                print(f"Creating Pinecone index: {index_name}")
+                pc.create_index(
+                    name=index_name,
+                    dimension=1536, # text-embedding-3-small
+                    metric='cosine',
+                    spec=ServerlessSpec(cloud='aws', region='us-east-1')
+                )
+            
+            # Resolve the data-plane host once so the handle never describes the index again
+            host = pc.describe_index(index_name).host
+            index = pc.Index(host=host, pool_threads=Config.PINECONE_POOL_THREADS)
+        except Exception as e:
+            # Not cached: the next call retries
+            print(f"Error connecting to Pinecone index {index_name}: {e}")
+            return None
+        _pinecone_indexes[index_name] = index
+        return index
 
 def generate_deterministic_id(content: str) -> str:
     """Generate deterministic ID to prevent duplicate data"""
     return hashlib.md5(content.encode()).hexdigest()
 
-def ingest_deal_assets(texts: List[str], metadatas: List[Dict[str, Any]], namespace="default"):
+def fetch_existing_metadata(index, ids: List[str], namespace: str, batch_size: int = 100) -> Dict[str, Dict[str, Any]]:
+    """Maps each of `ids` already present in the namespace to its stored metadata."""
+    existing = {}
+    for i in range(0, len(ids), batch_size):
+        response = index.fetch(ids=ids[i:i + batch_size], namespace=namespace)
+        for record_id, vector in (getattr(response, "vectors", None) or {}).items():
+            existing[record_id] = dict(getattr(vector, "metadata", None) or {})
+    return existing
+
+def fetch_existing_ids(index, ids: List[str], namespace: str, batch_size: int = 100) -> set:
+    """Returns the subset of `ids` already present in the namespace."""
+    return set(fetch_existing_metadata(index, ids, namespace, batch_size))
+
+def ingest_deal_assets(texts: List[str], metadatas: List[Dict[str, Any]], namespace="default",
+                       batch_size: int = 100, id_prefix: str = "",
+                       record_keys: Optional[List[Any]] = None) -> Dict[str, Any]:
     """
     Ingest text chunks and metadata into Pinecone.
+
+    With `record_keys`, each record keeps one ID (`id_prefix` + hashed key)
+    across versions and its text hash is stored as metadata["content_hash"]:
+    records whose text changed are re-embedded in place, identical ones are
+    skipped and ones whose metadata changed get a metadata-only update.
+    Without keys the ID is the text hash itself. `id_prefix` (see
+    document_key) lets all records of one file be listed and deleted by ID.
+
+    Returns {"inserted", "reembedded", "updated", "skipped"} counts and the
+    record "ids" (or {"error"}).
     """
     index = get_pinecone_index()
     if not index:
-        return "Pinecone not configured."
+        return {"error": "Pinecone not configured."}
 
-    # Use text-embedding-3-small
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-    
-    try:
-        vectors = embeddings.embed_documents(texts)
-    except Exception as e:
-        return f"Error generating embeddings: {e}"
-
-    to_upsert = []
-    for text, meta, vector in zip(texts, metadatas, vectors):
-        record_id = generate_deterministic_id(text)
+    keys = record_keys if record_keys is not None else [None] * len(texts)
+    records: Dict[str, Any] = {}
+    for text, meta, key in zip(texts, metadatas, keys):
         # Ensure text is stored in metadata for retrieval
         if "text" not in meta:
             meta["text"] = text
-        to_upsert.append((record_id, vector, meta))
+        meta["content_hash"] = generate_deterministic_id(text)
+        suffix = meta["content_hash"] if key is None else hashlib.sha256(str(key).encode("utf-8")).hexdigest()[:32]
+        # Duplicate IDs in one call collapse to a single record (last one wins)
+        records[f"{id_prefix}{suffix}"] = (text, meta)
+    ids = list(records)
+
+    try:
+        existing = fetch_existing_metadata(index, ids, namespace, batch_size)
+    except Exception as e:
+        print(f"Could not check existing records in '{namespace}', embedding all: {e}")
+        existing = {}
+
+    new_ids = [record_id for record_id in ids if record_id not in existing]
+    reembed = [record_id for record_id in ids if record_id in existing
+               and existing[record_id].get("content_hash") != records[record_id][1]["content_hash"]]
+    changed = [record_id for record_id in ids if record_id in existing and record_id not in reembed
+               and existing[record_id] != records[record_id][1]]
+
+    # Embedding and upsert batches overlap, with bounded concurrency and 429 backoff;
+    # upserting a changed record under its existing ID replaces the superseded vector
+    to_embed = new_ids + reembed
+    metrics = embed_and_upsert(index, [(record_id, *records[record_id]) for record_id in to_embed], namespace)
+    if to_embed:
+        print(f"Embedded into '{namespace}': {format_metrics(metrics)}")
+    if metrics["errors"]:
+        return {"error": f"Error ingesting into '{namespace}': {metrics['errors'][0]}"}
+
+    try:
+        # Same text, so the stored vector is still valid; only the metadata moves
+        for record_id in changed:
+            index.update(id=record_id, set_metadata=records[record_id][1], namespace=namespace)
+    except Exception as e:
+        return {"error": f"Error ingesting into '{namespace}': {e}"}
+
+    return {"inserted": len(new_ids), "reembedded": len(reembed), "updated": len(changed),
+            "skipped": len(ids) - len(to_embed) - len(changed), "ids": ids}
+
+# --- Document Chunks (incremental) ---
+
+def document_key(source: str, kind: str = "pdf") -> str:
+    """Stable, ASCII-safe ID prefix for all vectors of one data-room file ("pdf" chunks or "json" records)."""
+    return f"{kind}-{hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]}"
 
-    # Batch upsert
-    batch_size = 100
-    for i in range(0, len(to_upsert), batch_size):
-        batch = to_upsert[i:i+batch_size]
-        index.upsert(vectors=batch, namespace=namespace)
+def _list_ids(index, prefix: str, namespace: str) -> List[str]:
+    ids = []
+    for page in index.list(prefix=prefix, namespace=namespace):
+        # Older clients yield lists of IDs, newer ones ListResponse pages
+        if isinstance(page, (list, tuple)):
+            ids.extend(page)
+        else:
+            ids.extend(v.id for v in (getattr(page, "vectors", None) or []))
+    return ids
+
+def delete_stale_vectors(prefix: str, current_ids: List[str], namespace: str, batch_size: int = 100) -> int:
+    """Deletes the vectors under `prefix` that are not in `current_ids`; returns how many. Raises on failure."""
+    index = get_pinecone_index()
+    if not index:
+        raise RuntimeError("Pinecone not configured.")
+    current = set(current_ids)
+    stale = [record_id for record_id in _list_ids(index, prefix, namespace) if record_id not in current]
+    for i in range(0, len(stale), batch_size):
+        index.delete(ids=stale[i:i + batch_size], namespace=namespace)
+    return len(stale)
+
+def ingest_document_chunks(source: str, chunks: List[Dict[str, Any]], metadata: Dict[str, Any],
+                           namespace: str = "deal", batch_size: int = 100) -> Dict[str, Any]:
+    """
+    Embeds and upserts one document's chunks, skipping chunks whose content hash
+    is already indexed, and deletes chunks of earlier versions of the document.
+
+    Returns {"embedded", "skipped", "deleted"} counts (or {"error"}).
+    """
+    index = get_pinecone_index()
+    if not index:
+        return {"error": "Pinecone not configured."}
+
+    prefix = f"{document_key(source)}-"
+    ids = [f"{prefix}{chunk['hash'][:32]}" for chunk in chunks]
+
+    try:
+        existing = fetch_existing_ids(index, ids, namespace)
+    except Exception as e:
+        print(f"Could not check existing chunks for {source}, embedding all: {e}")
+        existing = set()
+
+    new = []
+    for record_id, chunk in zip(ids, chunks):
+        if record_id in existing:
+            continue
+        meta = {
+            **metadata,
+            "source": source,
+            "record_type": "pdf_chunk",
+            "chunk_index": chunk["chunk_index"],
+            "section": chunk["section"],
+            "page_start": chunk["page_start"],
+            "page_end": chunk["page_end"],
+            "text": chunk["text"],
+        }
+        new.append((record_id, chunk["embed_text"], meta))
+
+    metrics = embed_and_upsert(index, new, namespace, embed_batch_size=batch_size, upsert_batch_size=batch_size)
+    if new:
+        print(f"Embedded {source}: {format_metrics(metrics)}")
+    if metrics["errors"]:
+        # Raised so the caller marks this document failed; stale chunks are kept until a clean run
+        raise RuntimeError(metrics["errors"][0])
+
+    # Chunks from a previous version of this document are no longer referenced
+    deleted = 0
+    try:
+        deleted = delete_stale_vectors(prefix, ids, namespace, batch_size)
+    except Exception as e:
+        # list() is only supported on serverless indexes
+        print(f"Could not prune stale chunks for {source}: {e}")
+
+    return {"embedded": len(new), "skipped": len(existing), "deleted": deleted}
+
+def delete_document_vectors(source: str, namespaces: List[str]) -> int:
+    """
+    Removes every vector that came from `source` (a data-room filename): PDF
+    chunks and JSON records are both found by their ID prefix, which works on
+    serverless indexes (unlike deletes by metadata filter).
+
+    Raises when the index is unavailable or a list/delete call fails, so the
+    caller can keep the file's manifest row and retry. Returns the number of
+    vectors deleted.
+    """
+    index = get_pinecone_index()
+    if not index:
+        raise RuntimeError("Pinecone not configured.")
 
-    return f"Successfully ingested {len(texts)} items into Pinecone (Namespace: {namespace})."
+    deleted = 0
+    for namespace in namespaces:
+        for kind in ("pdf", "json"):
+            ids = _list_ids(index, f"{document_key(source, kind)}-", namespace)
+            for i in range(0, len(ids), 100):
+                index.delete(ids=ids[i:i + 100], namespace=namespace)
+            deleted += len(ids)
+    return deleted
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -7,4 +8,116 @@ class Config:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
     LANGCHAIN_API_KEY = os.getenv("LANGCHAIN_API_KEY")
+
+    # Vector store: "pinecone", "local" (in-process NumPy index) or "auto" (Pinecone when a key is set)
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "auto").lower()
+    LOCAL_INDEX_DIR = os.getenv(
+        "LOCAL_INDEX_DIR",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "vector_index"),
+    )
+    # Local namespaces this large are searched through IVF partitions instead of a full scan
+    LOCAL_INDEX_IVF_MIN_VECTORS = int(os.getenv("LOCAL_INDEX_IVF_MIN_VECTORS", "1000000"))
+    LOCAL_INDEX_IVF_PROBES = int(os.getenv("LOCAL_INDEX_IVF_PROBES", "8"))
+    PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "deal-associate-index")
+    # Threads (and pooled connections) of the shared index handle
+    PINECONE_POOL_THREADS = int(os.getenv("PINECONE_POOL_THREADS", "4"))
+    # Namespaces searched concurrently by search_documents, with the matches taken from each
+    SEARCH_NAMESPACE_TOP_K = json.loads(os.getenv("SEARCH_NAMESPACE_TOP_K", '{"deal": 5, "market_comps": 5}'))
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+    # Persistent embedding cache keyed by sha256(model + text); least recently used rows are evicted
+    EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    EMBED_CACHE_PATH = os.getenv(
+        "EMBED_CACHE_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "cache", "embeddings.sqlite"),
+    )
+    EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "200000"))
+
+    # Comp retrieval: index prefilters, relaxed until COMP_MIN_RESULTS match
+    COMP_CANDIDATES = int(os.getenv("COMP_CANDIDATES", "10"))
+    COMP_MIN_RESULTS = int(os.getenv("COMP_MIN_RESULTS", "5"))
+    # propose_comparables scores this many candidates and recommends the best COMP_RECOMMENDED
+    COMP_SCORING_CANDIDATES = int(os.getenv("COMP_SCORING_CANDIDATES", "50"))
+    COMP_RECOMMENDED = int(os.getenv("COMP_RECOMMENDED", "5"))
+    COMP_ASSET_TYPE_GROUPS = json.loads(os.getenv(
+        "COMP_ASSET_TYPE_GROUPS", '{"Logistics": ["Logistics", "Industrial", "Warehouse", "Distribution Centre"]}'))
+    # Comp size as a multiple of the subject's: [min, max]
+    COMP_SIZE_BAND = json.loads(os.getenv("COMP_SIZE_BAND", "[0.5, 2.0]"))
+    COMP_MAX_AGE_YEARS = int(os.getenv("COMP_MAX_AGE_YEARS", "5"))
+    # Comp scoring: weight of each similarity component (re-normalized over the components a comp has)
+    COMP_SCORE_WEIGHTS = json.loads(os.getenv(
+        "COMP_SCORE_WEIGHTS",
+        '{"relevance": 0.15, "size": 0.25, "eaves": 0.1, "distance": 0.2, "recency": 0.15, "yield": 0.15}'))
+    # Distance at which a component's similarity falls to 1/e: log size ratio, eaves metres, yield points
+    COMP_SIZE_SCALE = float(os.getenv("COMP_SIZE_SCALE", "0.7"))
+    COMP_EAVES_SCALE_M = float(os.getenv("COMP_EAVES_SCALE_M", "3"))
+    COMP_YIELD_SCALE = float(os.getenv("COMP_YIELD_SCALE", "0.0075"))
+    COMP_RECENCY_HALF_LIFE_YEARS = float(os.getenv("COMP_RECENCY_HALF_LIFE_YEARS", "3"))
+    # Geospatial comp search: radius around the subject asset, searched via lat/lon grid buckets
+    COMP_RADIUS_KM = float(os.getenv("COMP_RADIUS_KM", "100"))
+    COMP_DISTANCE_HALF_LIFE_KM = float(os.getenv("COMP_DISTANCE_HALF_LIFE_KM", "50"))
+    GEO_CELL_DEGREES = float(os.getenv("GEO_CELL_DEGREES", "0.5"))
+    # JSON file of city centroids for records without coordinates: {"city": [lat, lon]}
+    GEO_GAZETTEER_PATH = os.getenv(
+        "GEO_GAZETTEER_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "geo", "gazetteer.json"),
+    )
+
+    # Async embed/upsert pipeline: batch sizes, requests in flight, and 429 backoff
+    PIPELINE_EMBED_BATCH_SIZE = int(os.getenv("PIPELINE_EMBED_BATCH_SIZE", "100"))
+    PIPELINE_UPSERT_BATCH_SIZE = int(os.getenv("PIPELINE_UPSERT_BATCH_SIZE", "100"))
+    PIPELINE_EMBED_CONCURRENCY = int(os.getenv("PIPELINE_EMBED_CONCURRENCY", "4"))
+    PIPELINE_UPSERT_CONCURRENCY = int(os.getenv("PIPELINE_UPSERT_CONCURRENCY", "8"))
+    PIPELINE_MAX_RETRIES = int(os.getenv("PIPELINE_MAX_RETRIES", "6"))
+    PIPELINE_BACKOFF_SECONDS = float(os.getenv("PIPELINE_BACKOFF_SECONDS", "1"))
+    PIPELINE_BACKOFF_MAX_SECONDS = float(os.getenv("PIPELINE_BACKOFF_MAX_SECONDS", "30"))
+
+    # Structured JSON ingestion: records streamed (and embedded) per batch
+    JSON_BATCH_SIZE = int(os.getenv("JSON_BATCH_SIZE", "500"))
+    # Records per bundle array kept in graph state for prompts and slides; metrics use the columnar tables
+    JSON_STATE_MAX_RECORDS = int(os.getenv("JSON_STATE_MAX_RECORDS", "200"))
+
+    # Rent normalization: every rent is converted to EUR per sqm per year
+    FX_RATES_TO_EUR = json.loads(os.getenv("FX_RATES_TO_EUR", '{"EUR": 1.0, "GBP": 1.2, "USD": 0.92, "CHF": 1.05}'))
+    # Area units a rent can be quoted per, as units per square metre
+    AREA_UNITS_PER_SQM = json.loads(os.getenv("AREA_UNITS_PER_SQM", '{"sqm": 1.0, "sqft": 10.764}'))
+    # Markets that quote rent per sq ft: rents below the threshold are read as PSF
+    PSF_RENT_THRESHOLDS = json.loads(os.getenv("PSF_RENT_THRESHOLDS", '{"GBP": 20}'))
+    # Currency assumed for assets whose bundle omits it
+    DEFAULT_ASSET_CURRENCY = os.getenv("DEFAULT_ASSET_CURRENCY", "GBP")
+
+    # Vector upserts run on a background pool so they never delay the first agent message
+    BACKGROUND_EMBEDDING = os.getenv("BACKGROUND_EMBEDDING", "true").lower() in ("1", "true", "yes")
+    BACKGROUND_WORKERS = int(os.getenv("BACKGROUND_WORKERS", "2"))
+
+    # PDF ingestion
+    PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(min(8, os.cpu_count() or 1))))
+    PDF_PARSE_TIMEOUT_SECONDS = float(os.getenv("PDF_PARSE_TIMEOUT_SECONDS", "120"))
+    # Per-document preview kept in pdf_texts; alignment excerpts are chosen from the whole document
+    PDF_CHAR_BUDGET = int(os.getenv("PDF_CHAR_BUDGET", "10000"))
+    # Optional 1-based page ranges to read from every PDF, e.g. "1-20"
+    PDF_PAGE_RANGES = os.getenv("PDF_PAGE_RANGES", "")
+    # Leading pages of each PDF scanned for rent roll / financial tables (0 disables)
+    PDF_TABLE_PAGES = int(os.getenv("PDF_TABLE_PAGES", "30"))
+    # Full-document chunking for retrieval (deal namespace)
+    PDF_EMBED_DOCUMENTS = os.getenv("PDF_EMBED_DOCUMENTS", "true").lower() in ("1", "true", "yes")
+    PDF_CHUNK_CHARS = int(os.getenv("PDF_CHUNK_CHARS", "1500"))
+    PDF_CHUNK_OVERLAP = int(os.getenv("PDF_CHUNK_OVERLAP", "200"))
+    # Input-token budget for the align_with_llm context (JSON, PDF excerpts, tables)
+    ALIGN_PROMPT_TOKENS = int(os.getenv("ALIGN_PROMPT_TOKENS", "12000"))
+    # Multi-asset deals are aligned per asset (map) and merged (reduce)
+    ALIGN_MAP_REDUCE_MIN_ASSETS = int(os.getenv("ALIGN_MAP_REDUCE_MIN_ASSETS", "2"))
+    ALIGN_ASSET_PROMPT_TOKENS = int(os.getenv("ALIGN_ASSET_PROMPT_TOKENS", "4000"))
+    # Excerpts per asset in the map step: its best lexical matches only
+    ALIGN_ASSET_TOP_CHUNKS = int(os.getenv("ALIGN_ASSET_TOP_CHUNKS", "8"))
+    ALIGN_MAX_CONCURRENCY = int(os.getenv("ALIGN_MAX_CONCURRENCY", "8"))
+    ALIGN_REQUESTS_PER_SECOND = float(os.getenv("ALIGN_REQUESTS_PER_SECOND", "4"))
+    # Content-addressed cache of extracted PDF text (keyed by file SHA-256 + parser version)
+    PDF_CACHE_DIR = os.getenv(
+        "PDF_CACHE_DIR",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "cache", "pdf_text"),
+    )
+    PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+    # Render (and upload) the IC deck right after the model build, before the user confirms it
+    PRERENDER_IC_DECK = os.getenv("PRERENDER_IC_DECK", "false").lower() in ("1", "true", "yes")
     # Add other config variables here
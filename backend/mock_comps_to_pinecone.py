@@ -1,7 +1,6 @@
 import json
 import os
 import random
-import time
 from uuid import uuid4
 from dotenv import load_dotenv
 import sys
@@ -9,15 +8,17 @@ import sys
 # Add the current directory to sys.path to ensure we can import deal_agent
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from langchain_openai import OpenAIEmbeddings
+from deal_agent.tools.embedding_cache import get_embeddings
 from deal_agent.tools.vector_store import get_pinecone_index
+from deal_agent.tools.upsert_pipeline import embed_and_upsert, format_metrics
+from deal_agent.tools.comps_tools import comp_filter_metadata
 
 # Load environment variables
 load_dotenv()
 
 # --- Configuration ---
 PINECONE_NAMESPACE = "market_comps"
-NUM_COMPS_TO_GENERATE = 30
+NUM_COMPS_TO_GENERATE = int(os.getenv("NUM_MOCK_COMPS", "30"))
 # Construct path relative to this script
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 SAMPLE_FILE = os.path.join(BASE_DIR, "data", "structured_json", "sample_asset_bundle.json")
@@ -39,6 +40,7 @@ def generate_mock_comp(base_comp=None):
     # Randomize rent around 7.0 - 12.0 GBP/sq ft -> converted to sqm approx 75 - 130
     rent_val = round(random.uniform(75, 130), 2)
     
+    eaves_height = random.randint(10, 18)
     acquisition_year = random.randint(2018, 2024)
     acquisition_month = random.randint(1, 12)
     acquisition_day = random.randint(1, 28)
@@ -46,19 +48,19 @@ def generate_mock_comp(base_comp=None):
     comp = {
         "id": str(uuid4()),
         "name": f"{city} {random.choice(['Distribution Park', 'Logistics Hub', 'Gateway', 'Park', 'Centre'])} {random.randint(1, 20)}",
-        "distance_km": random.randint(1, 50),
         "asset_type": random.choice(ASSET_TYPES),
         "size_m2": size_base,
         "yield": yield_val,
         "rent_psm_pa": rent_val,
         "acquisition_date": f"{acquisition_year}-{acquisition_month:02d}-{acquisition_day:02d}",
+        "eaves_height_m": eaves_height,
         "city": city,
         "country": "United Kingdom",
         "source": f"internal://{city}_Market_Report_{acquisition_year}.pdf",
         "description": f"Modern {random.choice(ASSET_TYPES).lower()} facility located in {city}. "
                        f"Acquired in {acquisition_year}. "
                        f"Key tenant in {random.choice(TENANT_INDUSTRIES)} sector. "
-                       f"Good access to major transport links. Clear eaves height of {random.randint(10, 18)}m."
+                       f"Good access to major transport links. Clear eaves height of {eaves_height}m."
     }
     return comp
 
@@ -99,70 +101,42 @@ def main():
     print("--- 4. Generating Embeddings & Upserting ---")
     # Initialize embeddings
     try:
-        embeddings_model = OpenAIEmbeddings(model="text-embedding-3-small")
+        embeddings_model = get_embeddings()
     except Exception as e:
-        print(f"Failed to initialize OpenAIEmbeddings: {e}")
+        print(f"Failed to initialize embeddings: {e}")
         return
-    
-    batch_size = 10
-    total_upserted = 0
 
-    for i in range(0, len(mock_comps), batch_size):
-        batch = mock_comps[i : i + batch_size]
-        
-        vectors_to_upsert = []
-        texts_to_embed = []
-        
-        for comp in batch:
-            # Create a rich text description for embedding
-            text_representation = (
-                f"Market Comparable: {comp['name']}. "
-                f"Location: {comp['city']}, {comp['country']}. "
-                f"Type: {comp['asset_type']}. "
-                f"Size: {comp['size_m2']} sqm. "
-                f"Rent: {comp['rent_psm_pa']} per sqm. "
-                f"Yield: {comp['yield']*100}%. "
-                f"Description: {comp['description']}"
-            )
-            texts_to_embed.append(text_representation)
-            comp['text_representation'] = text_representation # Keep track
-        
-        # Batch embed
-        try:
-            print(f"Generating embeddings for batch {i//batch_size + 1}...")
-            embeddings_list = embeddings_model.embed_documents(texts_to_embed)
-        except Exception as e:
-            print(f"Error generating embeddings: {e}")
-            continue
+    records = []
+    for comp in mock_comps:
+        # Create a rich text description for embedding
+        text_representation = (
+            f"Market Comparable: {comp['name']}. "
+            f"Location: {comp['city']}, {comp['country']}. "
+            f"Type: {comp['asset_type']}. "
+            f"Size: {comp['size_m2']} sqm. "
+            f"Rent: {comp['rent_psm_pa']} per sqm. "
+            f"Yield: {comp['yield']*100}%. "
+            f"Description: {comp['description']}"
+        )
+        comp['text_representation'] = text_representation # Keep track
+        metadata = {
+            **comp_filter_metadata(comp), # asset type, city, size and date for prefiltering
+            "text": text_representation, # Store text for RAG retrieval
+            "name": comp["name"],
+            "rent_psm_pa": comp["rent_psm_pa"],
+            "yield": comp["yield"],
+            "source": comp["source"],
+            "type": "market_comp"
+        }
+        records.append((comp["id"], text_representation, metadata))
 
-        for j, comp in enumerate(batch):
-            vector = {
-                "id": comp["id"],
-                "values": embeddings_list[j],
-                "metadata": {
-                    "text": texts_to_embed[j], # Store text for RAG retrieval
-                    "name": comp["name"],
-                    "city": comp["city"],
-                    "size_m2": comp["size_m2"],
-                    "rent_psm_pa": comp["rent_psm_pa"],
-                    "yield": comp["yield"],
-                    "source": comp["source"],
-                    "acquisition_date": comp["acquisition_date"],
-                    "type": "market_comp"
-                }
-            }
-            vectors_to_upsert.append(vector)
-        
-        # Upsert
-        try:
-            print(f"Upserting batch {i//batch_size + 1} to Pinecone namespace '{PINECONE_NAMESPACE}'...")
-            index.upsert(vectors=vectors_to_upsert, namespace=PINECONE_NAMESPACE)
-            total_upserted += len(vectors_to_upsert)
-            print(f"Upserted batch {i//batch_size + 1}: {len(vectors_to_upsert)} vectors.")
-        except Exception as e:
-            print(f"Error upserting to Pinecone: {e}")
+    # Embedding and upsert batches overlap; concurrency and 429 backoff come from Config.PIPELINE_*
+    print(f"Embedding and upserting {len(records)} comps into namespace '{PINECONE_NAMESPACE}'...")
+    metrics = embed_and_upsert(index, records, PINECONE_NAMESPACE, embeddings=embeddings_model)
+    for error in metrics["errors"][:5]:
+        print(f"Batch failed: {error}")
 
-    print(f"--- Done! {total_upserted} comps added to Pinecone. ---")
+    print(f"--- Done! {metrics['upserted']} comps added to Pinecone. {format_metrics(metrics)} ---")
 
 if __name__ == "__main__":
     main()
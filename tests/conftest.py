@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+# deal_agent and api live under backend/ and read their settings at import time
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+_scratch = tempfile.mkdtemp(prefix="deal_agent_tests_")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SQL_ECHO", "false")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_scratch, 'deal_associate.db')}")
+os.environ.setdefault("VECTOR_BACKEND", "local")
+os.environ.setdefault("LOCAL_INDEX_DIR", os.path.join(_scratch, "vector_index"))
+os.environ.setdefault("EMBED_CACHE_PATH", os.path.join(_scratch, "embeddings.sqlite"))
+os.environ.setdefault("PDF_CACHE_DIR", os.path.join(_scratch, "pdf_text"))
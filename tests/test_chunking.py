@@ -0,0 +1,41 @@
+from deal_agent.tools.chunking import chunk_document
+
+SENTENCE = "The warehouse benefits from direct motorway access and a deep labour pool. "
+
+
+def test_chunks_respect_sections_and_pages():
+    pages = [
+        "1 Location\n\nThe site lies next to junction 18 of the M1.",
+        "KEY METRICS\n\nThe asset totals 28,300 sqm with 15m clear height.",
+    ]
+    chunks = chunk_document(pages, "im.pdf", max_chars=500, overlap=50, page_numbers=[4, 5])
+
+    assert [c["section"] for c in chunks] == ["1 Location", "KEY METRICS"]
+    assert [(c["page_start"], c["page_end"]) for c in chunks] == [(5, 5), (6, 6)]
+    assert chunks[1]["embed_text"] == "KEY METRICS\nThe asset totals 28,300 sqm with 15m clear height."
+    assert [c["chunk_index"] for c in chunks] == [0, 1]
+    assert all(c["source"] == "im.pdf" for c in chunks)
+
+def test_long_sections_split_with_overlap():
+    pages = ["\n\n".join(SENTENCE * 3 for _ in range(10))]
+    chunks = chunk_document(pages, "im.pdf", max_chars=400, overlap=80)
+
+    assert len(chunks) > 1
+    assert all(len(c["text"]) <= 400 + 80 for c in chunks)
+    # Each chunk starts with the tail of the one before it
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert previous["text"][-40:] in chunk["text"]
+
+def test_oversized_paragraph_is_hard_split():
+    chunks = chunk_document(["x" * 1000], "scan.pdf", max_chars=300, overlap=0)
+    assert [len(c["text"]) for c in chunks] == [300, 300, 300, 100]
+
+def test_hash_is_stable_and_source_specific():
+    pages = ["2 Tenancy\n\nLet to Acme until 2030."]
+    first = chunk_document(pages, "a.pdf")
+    assert [c["hash"] for c in first] == [c["hash"] for c in chunk_document(pages, "a.pdf")]
+    assert first[0]["hash"] != chunk_document(pages, "b.pdf")[0]["hash"]
+
+def test_empty_document():
+    assert chunk_document([], "empty.pdf") == []
+    assert chunk_document(["", "  \n\n "], "blank.pdf") == []
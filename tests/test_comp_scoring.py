@@ -0,0 +1,61 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from deal_agent.tools.comp_scoring import score_breakdowns, score_comps
+
+WEIGHTS = {"relevance": 1.0, "size": 1.0, "distance": 2.0}
+SUBJECT = {"size_m2": 20000, "location": "Rugby", "coordinates": (52.37, -1.26)}
+
+
+def test_missing_components_renormalize_weights():
+    candidates = [
+        {"relevance": 0.8, "size_m2": 20000, "distance_km": 0},
+        # No size: scored on relevance and distance only
+        {"relevance": 0.8, "distance_km": 0},
+        # No distance and no size: relevance alone
+        {"relevance": 0.6},
+    ]
+    scores, components = score_comps(candidates, SUBJECT, weights=WEIGHTS)
+
+    assert np.isnan(components["size"][1]) and np.isnan(components["distance"][2])
+    assert scores[0] == pytest.approx((0.8 + 1.0 + 2.0) / 4)
+    assert scores[1] == pytest.approx((0.8 + 2.0) / 3)
+    assert scores[2] == pytest.approx(0.6)
+
+    breakdown = score_breakdowns(scores, components, weights=WEIGHTS)[1]
+    assert breakdown["weights"] == pytest.approx({"relevance": 1 / 3, "distance": 2 / 3}, abs=1e-4)
+    assert "size" not in breakdown["components"]
+
+def test_unknown_distance_is_nan_when_subject_has_coordinates():
+    candidates = [{"relevance": 0.5, "city": "Rugby"}, {"relevance": 0.5, "distance_km": 50}]
+    _, components = score_comps(candidates, SUBJECT, weights=WEIGHTS)
+    assert np.isnan(components["distance"][0])
+    assert components["distance"][1] == pytest.approx(0.5 ** (50 / 50))
+
+def test_place_names_stand_in_without_subject_coordinates():
+    candidates = [{"city": "Rugby"}, {"city": "Lyon", "country": "France"}, {}]
+    _, components = score_comps(candidates, {"location": "Rugby"}, weights=WEIGHTS)
+    assert components["distance"][:2].tolist() == [1.0, 0.0]
+    assert np.isnan(components["distance"][2])
+
+def test_zero_is_a_value_not_missing():
+    candidates = [{"relevance": 0, "yield": 0.0}, {"relevance": 1.0, "yield": 0.06}, {"relevance": None, "size_m2": 0}]
+    scores, components = score_comps(candidates, {"size_m2": 20000}, weights={"relevance": 1.0, "size": 1.0})
+    assert components["relevance"][0] == 0.0
+    assert np.isnan(components["relevance"][2])
+    # Sizes of 0 stay unknown
+    assert np.isnan(components["size"][2])
+    assert scores[0] == 0.0 and scores[2] == 0.0
+
+def test_size_similarity_is_symmetric_and_recency_decays():
+    candidates = [{"size_m2": 10000, "acquisition_yyyymmdd": 20240101},
+                  {"size_m2": 40000, "acquisition_yyyymmdd": 20200101}]
+    _, components = score_comps(candidates, {"size_m2": 20000}, today=date(2025, 1, 1))
+    assert components["size"][0] == pytest.approx(components["size"][1])
+    assert components["recency"][0] > components["recency"][1]
+
+def test_no_candidates():
+    scores, components = score_comps([], SUBJECT)
+    assert len(scores) == 0 and set(components) >= {"relevance", "distance"}
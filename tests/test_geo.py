@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from deal_agent.tools import geo
+from deal_agent.tools.geo import cells_within, geocode, grid_cell, haversine_km
+
+LONDON = (51.5072, -0.1276)
+PARIS = (48.8566, 2.3522)
+
+
+def test_haversine_km_known_distances():
+    distances = haversine_km(*LONDON, [LONDON[0], PARIS[0]], [LONDON[1], PARIS[1]])
+    assert distances[0] == pytest.approx(0.0, abs=1e-9)
+    assert distances[1] == pytest.approx(343.5, abs=1.0)
+    # A quarter of the way round the equator
+    assert haversine_km(0, 0, [0], [90])[0] == pytest.approx(np.pi * geo.EARTH_RADIUS_KM / 2)
+
+@pytest.mark.parametrize("center, radius, size", [
+    (LONDON, 100, 0.5),
+    ((52.37, -1.26), 250, 1.0),
+    ((0.0, 179.9), 150, 0.5),
+    ((-33.9, 18.4), 40, 0.25),
+    ((78.2, 15.6), 300, 0.5),
+])
+def test_cells_within_cover_every_point_in_radius(center, radius, size):
+    rng = np.random.default_rng(7)
+    lats = center[0] + rng.uniform(-4, 4, 5000)
+    lons = (center[1] + rng.uniform(-12, 12, 5000) + 180) % 360 - 180
+    inside = haversine_km(center[0], center[1], lats, lons) <= radius
+    cells = set(cells_within(center[0], center[1], radius, size))
+    assert inside.any()
+    assert all(grid_cell(lat, lon, size) in cells for lat, lon in zip(lats[inside], lons[inside]))
+
+def test_geocode_sources():
+    assert geocode({"geocoordinates": {"coordinates": [4.8, 45.7]}}) == (45.7, 4.8)
+    assert geocode({"lat": 52.0, "lon": -1.0}) == (52.0, -1.0)
+    assert geocode({"city": "Lyon"}) == pytest.approx((45.764, 4.8357))
+    assert geocode({"name": "Rugby Gateway Park"}) == geo.gazetteer()["rugby"]
+    assert geocode({"city": "Atlantis"}) is None
+
+def test_gazetteer_reads_configured_file(tmp_path, monkeypatch):
+    path = tmp_path / "places.json"
+    path.write_text('{"Atlantis": [1.5, 2.5]}')
+    monkeypatch.setattr(geo.Config, "GEO_GAZETTEER_PATH", str(path))
+    monkeypatch.setattr(geo, "_gazetteer", None)
+    assert geocode({"city": "atlantis"}) == (1.5, 2.5)
@@ -0,0 +1,71 @@
+from deal_agent.nodes import ingestion
+from deal_agent.tools import prompt_builder
+from deal_agent.tools.prompt_builder import build_alignment_context, index_chunks, select_chunks
+from deal_agent.utils.config import Config
+
+FILLER = "The wider market saw steady take-up of logistics space across the region this year. "
+
+
+def _fake_parse(pages):
+    """Stands in for parse_pdfs_parallel, honouring max_chars like the real parser."""
+    def parse(paths, on_result=None, page_numbers=None, max_chars=None, table_pages=0):
+        kept, used = [], 0
+        for page in pages:
+            if max_chars is not None and used >= max_chars:
+                break
+            kept.append(page)
+            used += len(page)
+        return [{"file": "memo.pdf", "pages": kept, "page_numbers": list(range(len(kept))),
+                 "text": "\f".join(kept), "truncated": len(kept) < len(pages), "tables": [],
+                 "error": None, "cached": False, "seconds": 0.0}]
+    return parse
+
+def test_alignment_excerpt_past_char_budget(tmp_path, monkeypatch):
+    (tmp_path / "raw_pdfs").mkdir()
+    (tmp_path / "raw_pdfs" / "memo.pdf").write_bytes(b"%PDF-1.4")
+    pages = [FILLER * 40 for _ in range(8)]
+    pages.append("Rugby Gateway has 48 dock doors and a 15m clear height. " + FILLER * 5)
+    assert sum(len(p) for p in pages[:-1]) > Config.PDF_CHAR_BUDGET
+
+    monkeypatch.setattr(ingestion, "_data_root", lambda: str(tmp_path))
+    monkeypatch.setattr(ingestion, "_diff_manifest", lambda *args: None)
+    monkeypatch.setattr(ingestion, "_record_stage", lambda *args, **kwargs: None)
+    monkeypatch.setattr(ingestion, "parse_pdfs_parallel", _fake_parse(pages))
+
+    extracted = ingestion.load_pdf_documents({"current_deal_id": "deal-1"})["extracted_data"]
+    chunks = extracted["pdf_chunks"]
+    assert max(c["page_end"] for c in chunks) == 9
+    # The prompt preview stays within the budget
+    assert len(extracted["pdf_texts"][0]) < Config.PDF_CHAR_BUDGET + 100
+
+    context = build_alignment_context({"assets": [{"name": "Rugby Gateway", "city": "Rugby"}]}, chunks, 1500)
+    assert context["chunks_included"] < context["chunks_total"]
+    assert "48 dock doors" in context["documents"]
+
+def _chunk(text, page):
+    return {"text": text, "source": "memo.pdf", "page_start": page, "page_end": page}
+
+def test_map_step_selection_has_no_filler_and_caps_matches():
+    chunks = [_chunk(FILLER, i) for i in range(6)]
+    chunks += [_chunk(f"Rugby Gateway unit {i} has 48 dock doors.", 6 + i) for i in range(4)]
+
+    padded = select_chunks(chunks, ["Rugby Gateway"], 10000)
+    assert len(padded) == len(chunks)
+
+    selected = select_chunks(chunks, ["Rugby Gateway"], 10000, fill=False, top_k=2)
+    assert len(selected) == 2 and all("Rugby Gateway" in c["text"] for c in selected)
+    assert select_chunks(chunks, ["Lyon"], 10000, fill=False) == []
+
+def test_chunk_index_is_shared_across_queries(monkeypatch):
+    chunks = [_chunk(f"Asset {name} in {city}. " + FILLER, i)
+              for i, (name, city) in enumerate([("Rugby", "Rugby"), ("Lyon", "Lyon"), ("Hull", "Hull")])]
+    index = index_chunks(chunks)
+    tokenized = []
+    terms = prompt_builder._terms
+    monkeypatch.setattr(prompt_builder, "_terms", lambda text: tokenized.append(text) or terms(text))
+
+    for page, name in enumerate(["Rugby", "Lyon", "Hull"]):
+        selected = select_chunks(chunks, [name], 10000, fill=False, index=index)
+        assert [c["page_start"] for c in selected] == [page]
+    # Only the three queries were tokenized, never the chunks again
+    assert tokenized == ["Rugby", "Lyon", "Hull"]
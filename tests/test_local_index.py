@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from deal_agent.tools.local_index import LocalVectorIndex, matches_filter
+from deal_agent.utils.config import Config
+
+COMP = {"city": "Rugby", "size_m2": 25000, "tags": ["cross-dock", "rail"], "asset_type": "Logistics"}
+
+
+@pytest.mark.parametrize("metadata_filter, expected", [
+    (None, True),
+    ({"city": "Rugby"}, True),
+    ({"city": {"$eq": "Lyon"}}, False),
+    ({"city": {"$in": ["Lyon", "Rugby"]}}, True),
+    ({"city": {"$nin": ["Rugby"]}}, False),
+    ({"size_m2": {"$gte": 20000, "$lt": 30000}}, True),
+    ({"size_m2": {"$gt": 25000}}, False),
+    ({"tags": "rail"}, True),
+    ({"tags": {"$ne": "rail"}}, False),
+    ({"yield": {"$exists": False}}, True),
+    ({"yield": {"$gt": 0.05}}, False),
+    ({"size_m2": {"$gt": "big"}}, False),
+    ({"$or": [{"city": "Lyon"}, {"size_m2": {"$lte": 25000}}]}, True),
+    ({"$and": [{"asset_type": "Logistics"}, {"city": "Lyon"}]}, False),
+])
+def test_matches_filter(metadata_filter, expected):
+    assert matches_filter(COMP, metadata_filter) is expected
+
+def test_matches_filter_rejects_unknown_operator():
+    with pytest.raises(ValueError):
+        matches_filter(COMP, {"city": {"$regex": "R.*"}})
+
+@pytest.fixture
+def index(tmp_path):
+    index = LocalVectorIndex(str(tmp_path / "index"))
+    index.upsert([
+        ("rugby", [1.0, 0.0, 0.0], {"city": "Rugby", "size_m2": 25000}),
+        ("coventry", [0.9, 0.1, 0.0], {"city": "Coventry", "size_m2": 40000}),
+        ("lyon", [0.0, 1.0, 0.0], {"city": "Lyon", "size_m2": 30000}),
+        {"id": "hamburg", "values": [0.0, 0.0, 2.0], "metadata": {"city": "Hamburg", "size_m2": 18000}},
+    ], namespace="comps")
+    return index
+
+def test_query_ranks_by_cosine_similarity(index):
+    result = index.query([2.0, 0.0, 0.0], top_k=2, namespace="comps", include_metadata=True)
+    assert [m.id for m in result.matches] == ["rugby", "coventry"]
+    assert result.matches[0].score == pytest.approx(1.0)
+    assert result.matches[0].metadata["city"] == "Rugby"
+
+def test_query_applies_filter_and_namespace(index):
+    result = index.query([1.0, 0.0, 0.0], top_k=10, namespace="comps", filter={"size_m2": {"$lte": 30000}})
+    assert [m.id for m in result.matches] == ["rugby", "lyon", "hamburg"]
+    assert result.matches[0].metadata is None
+    assert index.query([1.0, 0.0, 0.0], namespace="deal").matches == []
+
+def test_query_after_upsert_and_delete(index):
+    index.upsert([("rugby", [0.0, 1.0, 0.0], {"city": "Rugby"})], namespace="comps")
+    index.delete(ids=["lyon"], namespace="comps")
+    result = index.query([0.0, 1.0, 0.0], top_k=1, namespace="comps")
+    assert [m.id for m in result.matches] == ["rugby"]
+    assert index.describe_index_stats().namespaces["comps"].vector_count == 3
+
+def test_query_survives_reopen(index, tmp_path):
+    reopened = LocalVectorIndex(str(tmp_path / "index"))
+    assert [m.id for m in reopened.query([0.0, 0.0, 1.0], top_k=1, namespace="comps").matches] == ["hamburg"]
+
+def test_ivf_query_finds_nearest(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "LOCAL_INDEX_IVF_MIN_VECTORS", 100)
+    monkeypatch.setattr(Config, "LOCAL_INDEX_IVF_PROBES", 4)
+    vectors = np.random.default_rng(1).normal(size=(2000, 16))
+    index = LocalVectorIndex(str(tmp_path / "ivf"))
+    index.upsert([(f"v{i}", v.tolist()) for i, v in enumerate(vectors)], namespace="comps")
+    result = index.query((vectors[123] + 0.01).tolist(), top_k=1, namespace="comps")
+    assert result.matches[0].id == "v123"
+
+def test_upsert_grows_past_capacity_after_ivf_build(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "LOCAL_INDEX_IVF_MIN_VECTORS", 100)
+    vectors = np.random.default_rng(2).normal(size=(1100, 8))
+    index = LocalVectorIndex(str(tmp_path / "grow"))
+    index.upsert([(f"v{i}", v.tolist()) for i, v in enumerate(vectors[:1000])], namespace="comps")
+    index.query(vectors[0].tolist(), top_k=1, namespace="comps")
+
+    index.upsert([(f"v{i}", v.tolist()) for i, v in enumerate(vectors[1000:], start=1000)], namespace="comps")
+
+    assert index.describe_index_stats().namespaces["comps"].vector_count == 1100
+    assert index.query(vectors[1050].tolist(), top_k=1, namespace="comps").matches[0].id == "v1050"
+    reopened = LocalVectorIndex(str(tmp_path / "grow"))
+    assert reopened.describe_index_stats().namespaces["comps"].vector_count == 1100
@@ -0,0 +1,68 @@
+import os
+import uuid
+
+import pytest
+
+from deal_agent.tools import manifest
+from deal_agent.tools.manifest import diff_data_room, forget_documents, mark_stage, needs_stage
+
+
+@pytest.fixture
+def data_room(tmp_path):
+    (tmp_path / "raw_pdfs").mkdir()
+    for name in ("a.pdf", "b.pdf"):
+        (tmp_path / "raw_pdfs" / name).write_bytes(name.encode() * 100)
+    (tmp_path / "raw_pdfs" / "notes.txt").write_text("ignored")
+    return tmp_path
+
+def _diff(deal_id, root):
+    return diff_data_room(deal_id, str(root), "raw_pdfs", ".pdf")
+
+def test_diff_data_room_tracks_changes(data_room):
+    deal_id = f"deal-{uuid.uuid4().hex[:8]}"
+    first = _diff(deal_id, data_room)
+    assert first["added"] == ["raw_pdfs/a.pdf", "raw_pdfs/b.pdf"]
+    assert needs_stage(first, "raw_pdfs/a.pdf", "parse")
+
+    mark_stage(deal_id, ["raw_pdfs/a.pdf", "raw_pdfs/b.pdf"], "parse")
+    mark_stage(deal_id, ["raw_pdfs/b.pdf"], "embed", ok=False)
+    second = _diff(deal_id, data_room)
+    assert second["unchanged"] == ["raw_pdfs/a.pdf", "raw_pdfs/b.pdf"] and not second["added"]
+    assert not needs_stage(second, "raw_pdfs/a.pdf", "parse")
+    assert needs_stage(second, "raw_pdfs/b.pdf", "embed")
+
+    # Touched but identical content stays unchanged; new content resets its stages
+    path = data_room / "raw_pdfs" / "a.pdf"
+    os.utime(path, (1, 1))
+    (data_room / "raw_pdfs" / "b.pdf").write_bytes(b"new content")
+    (data_room / "raw_pdfs" / "c.pdf").write_bytes(b"c")
+    third = _diff(deal_id, data_room)
+    assert third["unchanged"] == ["raw_pdfs/a.pdf"]
+    assert third["changed"] == ["raw_pdfs/b.pdf"]
+    assert third["added"] == ["raw_pdfs/c.pdf"]
+    assert third["documents"]["raw_pdfs/b.pdf"]["parse_status"] == "pending"
+
+    os.remove(path)
+    fourth = _diff(deal_id, data_room)
+    assert fourth["removed"] == ["raw_pdfs/a.pdf"]
+    forget_documents(deal_id, fourth["removed"])
+    assert _diff(deal_id, data_room)["removed"] == []
+
+def test_non_numeric_deal_ids_do_not_share_rows(data_room):
+    first, second = f"alpha-{uuid.uuid4().hex[:8]}", f"beta-{uuid.uuid4().hex[:8]}"
+    _diff(first, data_room)
+    mark_stage(first, ["raw_pdfs/a.pdf"], "parse")
+    diff = _diff(second, data_room)
+    assert diff["added"] == ["raw_pdfs/a.pdf", "raw_pdfs/b.pdf"]
+    assert needs_stage(diff, "raw_pdfs/a.pdf", "parse")
+
+def test_embed_status_resets_when_vector_backend_changes(data_room, monkeypatch):
+    deal_id = f"deal-{uuid.uuid4().hex[:8]}"
+    monkeypatch.setattr(manifest, "vector_backend", lambda: "local")
+    _diff(deal_id, data_room)
+    mark_stage(deal_id, ["raw_pdfs/a.pdf"], "embed")
+    diff = _diff(deal_id, data_room)
+    assert not needs_stage(diff, "raw_pdfs/a.pdf", "embed")
+
+    monkeypatch.setattr(manifest, "vector_backend", lambda: "pinecone")
+    assert needs_stage(diff, "raw_pdfs/a.pdf", "embed")
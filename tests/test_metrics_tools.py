@@ -0,0 +1,75 @@
+from datetime import date
+
+import pytest
+
+from deal_agent.tools.json_stream import append_asset_columns, empty_portfolio_columns
+from deal_agent.tools.metrics_tools import compute_column_metrics, compute_lease_metrics
+from deal_agent.tools.normalization import annotate_asset_records, normalize_lease_columns
+
+AS_OF = date(2025, 1, 1)
+
+
+def test_compute_lease_metrics_portfolio_and_assets():
+    bundle = {"assets": [
+        {"name": "Rugby", "city": "Rugby", "logistics_asset": {"area_m2": 10000}, "leases": [
+            {"area_m2": 6000, "display_rent_eur_psm": 80, "lease_end": "2030-01-01"},
+            {"area_m2": 2000, "rent_psm_pa": 60, "lease_end": "2027-01-01"},
+            # Expired and undated leases carry no income
+            {"area_m2": 1000, "rent_psm_pa": 70, "lease_end": "2024-06-30"},
+            {"area_m2": 500, "rent_psm_pa": 70},
+        ]},
+        # No GLA stated: falls back to the leased area
+        {"name": "Lyon", "leases": [{"area_m2": 4000, "rent_psm_pa": 50, "lease_end": "2028-01-01"}]},
+    ]}
+    metrics = compute_lease_metrics(bundle, as_of=AS_OF)
+
+    rugby, lyon = metrics["assets"]
+    assert rugby["total_gla_m2"] == 10000
+    assert rugby["leased_area_m2"] == 8000
+    assert rugby["occupancy"] == 0.8
+    assert rugby["in_place_rent_pa"] == 600000
+    assert rugby["in_place_rent_psm"] == 75.0
+    assert rugby["lease_count"] == 4 and rugby["active_lease_count"] == 2
+    years = [(date(2030, 1, 1) - AS_OF).days / 365.25, (date(2027, 1, 1) - AS_OF).days / 365.25]
+    assert rugby["walt_years"] == pytest.approx((480000 * years[0] + 120000 * years[1]) / 600000, abs=0.01)
+    assert lyon["total_gla_m2"] == 4000 and lyon["occupancy"] == 1.0
+
+    assert metrics["total_gla_m2"] == 14000
+    assert metrics["leased_area_m2"] == 12000
+    assert metrics["occupancy"] == round(12000 / 14000, 4)
+    assert metrics["in_place_rent_pa"] == 800000
+    assert metrics["asset_count"] == 2
+    assert metrics["as_of"] == "2025-01-01"
+
+def test_leased_area_is_capped_at_gla():
+    bundle = {"assets": [{"logistics_asset": {"area_m2": 1000},
+                          "leases": [{"area_m2": 1500, "rent_psm_pa": 10, "lease_end": "2030-01-01"}]}]}
+    metrics = compute_lease_metrics(bundle, as_of=AS_OF)
+    assert metrics["leased_area_m2"] == 1000
+    assert metrics["occupancy"] == 1.0
+
+def test_empty_bundle():
+    metrics = compute_lease_metrics({}, as_of=AS_OF)
+    assert metrics["total_gla_m2"] == 0
+    assert metrics["occupancy"] == 0.0
+    assert metrics["walt_years"] == 0.0
+    assert metrics["assets"] == []
+
+def test_column_metrics_match_record_metrics():
+    assets = [
+        {"name": "Rugby", "city": "Rugby", "currency": "EUR", "logistics_asset": {"area_m2": 10000}, "leases": [
+            {"tenant": {"name": "A"}, "area_m2": 6000, "rent_psm_pa": 80, "lease_end": "2030-01-01"},
+            {"tenant": {"name": "B"}, "area_m2": 1000, "rent_psm_pa": 70, "lease_end": "2024-06-30"},
+        ]},
+        # An asset without leases must not shift the next asset's lease slice
+        {"name": "Empty", "city": "Hull", "currency": "EUR", "logistics_asset": {"area_m2": 500}, "leases": []},
+        {"name": "Lyon", "city": "Lyon", "currency": "EUR", "leases": [
+            {"tenant": {"name": "C"}, "area_m2": 4000, "rent_psm_pa": 50, "lease_end": "2028-01-01"}]},
+    ]
+    columns = empty_portfolio_columns()
+    for asset in assets:
+        append_asset_columns(columns, asset, source="deal.json")
+    normalize_lease_columns(columns)
+    annotate_asset_records(assets, columns, 0, 0)
+
+    assert compute_column_metrics(columns, as_of=AS_OF) == compute_lease_metrics({"assets": assets}, as_of=AS_OF)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from deal_agent.tools.json_stream import append_asset_columns, empty_portfolio_columns
+from deal_agent.tools.normalization import infer_rent_units, normalize_lease_columns, normalize_rents
+from deal_agent.utils.config import Config
+
+
+@pytest.fixture(autouse=True)
+def market_conventions(monkeypatch):
+    monkeypatch.setattr(Config, "FX_RATES_TO_EUR", {"EUR": 1.0, "GBP": 1.2})
+    monkeypatch.setattr(Config, "AREA_UNITS_PER_SQM", {"sqm": 1.0, "sqft": 10.764})
+    monkeypatch.setattr(Config, "PSF_RENT_THRESHOLDS", {"GBP": 20})
+    monkeypatch.setattr(Config, "DEFAULT_ASSET_CURRENCY", "GBP")
+
+def test_infer_rent_units_reads_low_uk_rents_as_psf():
+    rents = np.array([5.5, 75.0, 5.5, 0.0])
+    currencies = np.array(["GBP", "GBP", "EUR", "GBP"], dtype=object)
+    assert infer_rent_units(rents, currencies).tolist() == ["sqft", "sqm", "sqm", "sqm"]
+
+def test_normalize_rents_converts_currency_and_unit():
+    result = normalize_rents([5.5, 80.0, 60.0, None], ["GBP", "EUR", "XYZ", "EUR"])
+
+    assert result["rent_eur_psm"].tolist() == pytest.approx([5.5 * 10.764 * 1.2, 80.0, 60.0, 0.0])
+    assert result["source_unit"].tolist() == ["sqft", "sqm", "sqm", "sqm"]
+    assert result["fx_rate"].tolist() == [1.2, 1.0, 1.0, 1.0]
+    # Unknown currencies pass through unconverted but flagged
+    assert result["fx_known"].tolist() == [True, True, False, True]
+
+def test_normalize_rents_explicit_units_win():
+    result = normalize_rents([5.5], ["GBP"], units=["sqm"])
+    assert result["rent_eur_psm"].tolist() == pytest.approx([6.6])
+
+def test_normalize_lease_columns_by_batch():
+    columns = empty_portfolio_columns()
+    append_asset_columns(columns, {"name": "Rugby", "currency": "GBP", "leases": [
+        {"tenant": {"name": "A"}, "area_m2": 1000, "rent_psm_pa": 5.0},
+        {"tenant": {"name": "B"}, "area_m2": 3000, "rent_psm_pa": 70.0},
+    ]}, source="a.json")
+    assert normalize_lease_columns(columns) == (0, 2)
+
+    append_asset_columns(columns, {"name": "Lyon", "currency": "EUR", "leases": [
+        {"tenant": {"name": "C"}, "area_m2": 2000, "rent_psm_pa": 55.0},
+    ]}, source="b.json")
+    # No currency: the default (GBP) applies
+    append_asset_columns(columns, {"name": "Leeds", "leases": [{"tenant": {"name": "D"}, "area_m2": 500, "rent_psm_pa": 90.0}]},
+                         source="b.json")
+    assert normalize_lease_columns(columns) == (2, 4)
+
+    leases, assets = columns["leases"], columns["assets"]
+    assert leases["rent_eur_psm"] == pytest.approx([64.58, 84.0, 55.0, 108.0])
+    assert leases["source_unit"] == ["sqft", "sqm", "sqm", "sqm"]
+    assert assets["rent_eur_psm"] == pytest.approx([(64.58 * 1000 + 84.0 * 3000) / 4000, 55.0, 108.0], abs=0.01)
@@ -0,0 +1,67 @@
+import os
+import time
+import uuid
+
+from deal_agent.tools import pdf_parser
+
+
+def _fake_extract(file_path, page_numbers=None, max_chars=None, table_pages=0):
+    """Stands in for extract_pdf_text in the worker processes; the file's text says how to behave."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    log = os.path.join(os.environ["PDF_POOL_TEST_LOG"], f"{os.getpid()}-{uuid.uuid4().hex}")
+    start = time.time()
+    if text.startswith("hang"):
+        time.sleep(600)
+    time.sleep(0.3)
+    with open(log, "w") as f:
+        f.write(f"{start} {time.time()}")
+    return {"pages": {0: text}, "tables": {}, "complete": True, "seconds": round(time.time() - start, 2)}
+
+def _write_files(tmp_path, texts):
+    paths = []
+    for i, text in enumerate(texts):
+        path = tmp_path / f"doc{i}.pdf"
+        # Unique content, so nothing is served from the parse cache
+        path.write_text(f"{text} {uuid.uuid4().hex}", encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+def test_hung_file_is_killed_and_others_return_in_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_parser, "extract_pdf_text", _fake_extract)
+    monkeypatch.setenv("PDF_POOL_TEST_LOG", str(tmp_path))
+    paths = _write_files(tmp_path, ["first", "hang", "third", "fourth", "fifth"])
+    progress = []
+
+    started = time.monotonic()
+    results = pdf_parser.parse_pdfs_parallel(paths, max_workers=2, timeout=3,
+                                             on_result=lambda done, total, result: progress.append((done, total)))
+    elapsed = time.monotonic() - started
+
+    assert [r["file"] for r in results] == [os.path.basename(p) for p in paths]
+    assert results[1]["error"] == "Timed out after 3s"
+    for result, expected in zip([results[0], *results[2:]], ["first", "third", "fourth", "fifth"]):
+        assert result["error"] is None
+        assert result["text"].startswith(expected)
+    assert progress == [(n, 5) for n in range(1, 6)]
+    # The hung worker was killed rather than waited for
+    assert elapsed < 30
+
+def test_pool_bounds_concurrent_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_parser, "extract_pdf_text", _fake_extract)
+    log_dir = tmp_path / "log"
+    log_dir.mkdir()
+    monkeypatch.setenv("PDF_POOL_TEST_LOG", str(log_dir))
+    paths = _write_files(tmp_path, [f"file {i}" for i in range(6)])
+
+    results = pdf_parser.parse_pdfs_parallel(paths, max_workers=2, timeout=30)
+
+    assert all(r["error"] is None for r in results)
+    spans = [tuple(map(float, (log_dir / name).read_text().split())) for name in os.listdir(log_dir)]
+    assert len(spans) == 6
+    overlap = max(sum(start <= t < end for start, end in spans) for t, _ in spans)
+    assert overlap <= 2
+
+def test_unreadable_file_is_reported(tmp_path):
+    results = pdf_parser.parse_pdfs_parallel([str(tmp_path / "missing.pdf")])
+    assert results[0]["error"] and results[0]["text"] == ""
@@ -0,0 +1,49 @@
+import pytest
+
+from deal_agent.tools.table_extractor import parse_number, tenancy_records
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1,234.50", 1234.5),
+    ("1.234,50", 1234.5),
+    ("28,300 sqm", 28300.0),
+    ("1.234.567", 1234567.0),
+    ("€ 2.5m", 2_500_000.0),
+    ("450k", 450_000.0),
+    ("5.25%", 0.0525),
+    ("-12,5", -12.5),
+    (42, 42.0),
+])
+def test_parse_number(text, expected):
+    assert parse_number(text) == pytest.approx(expected)
+
+@pytest.mark.parametrize("text", [None, "", "n/a", "TBC"])
+def test_parse_number_without_figure(text):
+    assert parse_number(text) is None
+
+def test_parse_number_integer_like_reads_german_thousands():
+    assert parse_number("28.300") == pytest.approx(28.3)
+    assert parse_number("28.300", integer_like=True) == 28300.0
+
+def test_tenancy_records_types_rows_and_fills_missing_rent():
+    tables = [
+        {"kind": "financial", "page": 0, "rows": [["NOI", "€ 1.2m"]]},
+        {"kind": "rent_roll", "page": 2, "fields": ["name", "unit", "area", "rent_psm", "annual_rent", "lease_end"],
+         "rows": [
+             ["Acme Logistics", "Hall A", "10.000", "6,50", "", "31.12.2030"],
+             ["Beta GmbH", "Hall B", "5,000", "", "€ 300,000", "2029"],
+         ]},
+    ]
+    records = tenancy_records(tables, source="im.pdf")
+
+    assert len(records) == 2
+    acme, beta = records
+    assert acme["name"] == "Acme Logistics" and acme["unit"] == "Hall A"
+    assert acme["area"] == 10000.0
+    assert acme["rent_psm"] == 6.5
+    assert acme["annual_rent"] == 65000.0
+    assert acme["lease_end"] == "2030-12-31"
+    assert acme["page"] == 3 and acme["source"] == "im.pdf"
+    assert beta["annual_rent"] == 300000.0
+    assert beta["rent_psm"] == 60.0
+    assert beta["lease_end"] == "2029-01-01"
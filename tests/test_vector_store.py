@@ -0,0 +1,121 @@
+import hashlib
+
+import pytest
+
+from deal_agent.nodes import ingestion
+from deal_agent.tools import upsert_pipeline, vector_store
+from deal_agent.tools.local_index import LocalVectorIndex
+from deal_agent.tools.vector_store import delete_document_vectors, document_key, ingest_deal_assets
+
+
+class FakeEmbeddings:
+    """Deterministic 8-dim vectors derived from the text, counting what gets embedded."""
+
+    def __init__(self):
+        self.embedded = []
+
+    async def aembed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[b / 255 for b in hashlib.sha256(t.encode()).digest()[:8]] for t in texts]
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    index = LocalVectorIndex(str(tmp_path / "index"))
+    monkeypatch.setattr(vector_store, "get_pinecone_index", lambda *args: index)
+    return index
+
+@pytest.fixture
+def embeddings(monkeypatch):
+    fake = FakeEmbeddings()
+    monkeypatch.setattr(upsert_pipeline, "get_embeddings", lambda *args: fake)
+    return fake
+
+def _ids(index, namespace):
+    return sorted(i for page in index.list(namespace=namespace) for i in page)
+
+def test_delete_document_vectors_by_id_prefix(index, embeddings):
+    for source in ("a.json", "b.json"):
+        result = ingest_deal_assets([f"{source} asset 1", f"{source} asset 2"], [{"source": source}, {"source": source}],
+                                    namespace="deal", id_prefix=f"{document_key(source, 'json')}-")
+        assert result["inserted"] == 2
+    index.upsert([(f"{document_key('a.pdf')}-chunk", [1.0] * 8, {"source": "a.pdf"})], namespace="deal")
+
+    assert delete_document_vectors("a.json", ["deal", "market_comps"]) == 2
+    assert delete_document_vectors("a.pdf", ["deal"]) == 1
+    assert all(i.startswith(document_key("b.json", "json")) for i in _ids(index, "deal"))
+    assert len(_ids(index, "deal")) == 2
+
+def test_failed_delete_keeps_manifest_row(monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("index unavailable")
+    forgotten = []
+    monkeypatch.setattr(ingestion, "delete_document_vectors", fail)
+    monkeypatch.setattr(ingestion, "forget_documents", lambda deal_id, paths: forgotten.extend(paths))
+
+    diff = {"removed": ["structured_json/old.json"]}
+    assert ingestion._purge_removed("deal-1", diff, ["deal"]) == []
+    assert forgotten == []
+
+def _bundle(path, rents):
+    import json
+    assets = [{"id": f"A{i}", "name": f"Park {i}", "city": "Rugby", "currency": "EUR",
+               "logistics_asset": {"area_m2": 10000},
+               "leases": [{"tenant": {"name": "Acme"}, "area_m2": 10000, "rent_psm_pa": rent}]}
+              for i, rent in rents.items()]
+    path.write_text(json.dumps({"assets": assets, "comps": []}))
+
+@pytest.fixture
+def data_room(tmp_path, monkeypatch):
+    """A data room whose bundles are loaded inline, streamed in batches of two."""
+    (tmp_path / "structured_json").mkdir()
+    monkeypatch.setattr(ingestion, "_data_root", lambda: str(tmp_path))
+    monkeypatch.setattr(ingestion, "_diff_manifest", lambda *args: None)
+    monkeypatch.setattr(ingestion.Config, "BACKGROUND_EMBEDDING", False)
+    monkeypatch.setattr(ingestion.Config, "JSON_BATCH_SIZE", 2)
+    return tmp_path / "structured_json"
+
+def test_changed_records_keep_their_id_and_removed_ones_are_deleted(index, embeddings, data_room, monkeypatch):
+    stages = []
+    monkeypatch.setattr(ingestion, "_record_stage", lambda deal_id, paths, stage, ok=True: stages.append((stage, ok)))
+    bundle = data_room / "deal.json"
+    state = {"current_deal_id": "deal-1"}
+
+    _bundle(bundle, {1: 60, 2: 70, 3: 80})
+    ingestion.load_json_data(state)
+    first = _ids(index, "deal")
+    assert len(first) == 3 and len(embeddings.embedded) == 3
+
+    # Asset 2's rent changes, asset 3 leaves the bundle
+    _bundle(bundle, {1: 60, 2: 75})
+    ingestion.load_json_data(state)
+    second = _ids(index, "deal")
+    assert len(second) == 2 and set(second) < set(first)
+    assert len(embeddings.embedded) == 4
+    texts = [v.metadata["text"] for v in index.fetch(second, namespace="deal").vectors.values()]
+    assert any("75.0" in t for t in texts) and not any("70.0" in t for t in texts)
+    assert stages == [("parse", True), ("embed", True)] * 2
+
+def test_bundle_is_streamed_once_and_state_keeps_a_sample(index, embeddings, data_room, monkeypatch):
+    streamed = []
+    iter_batches = ingestion.iter_bundle_batches
+    monkeypatch.setattr(ingestion, "iter_bundle_batches",
+                        lambda path, size: streamed.append(path) or iter_batches(path, size))
+    monkeypatch.setattr(ingestion.Config, "JSON_STATE_MAX_RECORDS", 3)
+    _bundle(data_room / "deal.json", {i: 50 + i for i in range(5)})
+
+    extracted = ingestion.load_json_data({"current_deal_id": "deal-1"})["extracted_data"]
+    assert len(streamed) == 1
+    assert len(_ids(index, "deal")) == 5
+    assert len(extracted["source_json"]["assets"]) == 3
+    assert extracted["portfolio_counts"] == {"assets": 5, "comps": 0}
+
+    metrics = ingestion.compute_deal_metrics({"extracted_data": extracted})["extracted_data"]["metrics"]
+    assert metrics["asset_count"] == 5
+
+def test_ingest_deal_assets_counts(index, embeddings):
+    keys = ["a", "b"]
+    ingest_deal_assets(["one", "two"], [{"v": 1}, {"v": 1}], namespace="deal", id_prefix="json-x-", record_keys=keys)
+    result = ingest_deal_assets(["one", "TWO"], [{"v": 2}, {"v": 1}], namespace="deal", id_prefix="json-x-",
+                                record_keys=keys)
+    assert (result["inserted"], result["reembedded"], result["updated"], result["skipped"]) == (0, 1, 1, 0)
+    assert embeddings.embedded == ["one", "two", "TWO"]